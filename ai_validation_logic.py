@@ -3,6 +3,8 @@
 import re
 from datetime import datetime
 
+from economic_regime_logic import classify_economic_regime, SLOWDOWN_REGIMES
+
 PROFILES_DATA_EXAMPLE = {
     "W1": {"min_income": 0, "max_income": 30000, "typical_income": 20000, "occupation_type": "White-Collar"},
     "B1": {"min_income": 0, "max_income": 12000, "typical_income": 8000, "occupation_type": "Blue-Collar"},
@@ -80,22 +82,34 @@ def validate_income_against_profile(
 def validate_income_with_economic_context(
     income: float,
     occupation: str,
-    economic_indicators: dict = None
+    economic_indicators: dict = None,
+    regime_snapshot: dict = None
 ) -> tuple[bool, str]:
-    """Provides suggestions if income seems unusually high/low given economic context."""
-    if economic_indicators is None:
-        return True, "Economic context not available for income validation."
-
-    gdp_growth = economic_indicators.get("gdp_growth_rate")
+    """
+    Provides suggestions if income seems unusually high/low given economic context. Reads the shared regime
+    snapshot (economic_regime_logic.get_current_regime()); bare indicators are classified the same way.
+    """
+    if regime_snapshot is None:
+        if economic_indicators is None:
+            return True, "Economic context not available for income validation."
+        gdp_growth = economic_indicators.get("gdp_growth_rate")
+        if gdp_growth is None:
+            return True, "Income seems plausible within the current economic context."
+        cpi_inflation = economic_indicators.get("cpi_inflation")
+        regime_snapshot = {**classify_economic_regime(gdp_growth, 0.0 if cpi_inflation is None else cpi_inflation),
+                           "inputs": {"gdp_growth": gdp_growth}}
+
+    gdp_growth = regime_snapshot["inputs"]["gdp_growth"]
     suggestions = []
     is_consistent = True
 
-    if gdp_growth is not None and gdp_growth < 4.0:
+    if regime_snapshot["regime"] in SLOWDOWN_REGIMES:
+        context = f"Given current economic {regime_snapshot['regime']} (GDP growth: {gdp_growth}%)"
         if occupation == "Blue-Collar" and income > 50000:
-            suggestions.append(f"Given current economic slowdown (GDP growth: {gdp_growth}%), income {income:,.0f} for Blue-Collar profile is notably high. Please double-check.")
+            suggestions.append(f"{context}, income {income:,.0f} for Blue-Collar profile is notably high. Please double-check.")
             is_consistent = False
         elif occupation == "White-Collar" and income > 200000:
-             suggestions.append(f"Given current economic slowdown (GDP growth: {gdp_growth}%), income {income:,.0f} for White-Collar profile is notably high. Please double-check.")
+             suggestions.append(f"{context}, income {income:,.0f} for White-Collar profile is notably high. Please double-check.")
              is_consistent = False
     
     if not suggestions:
@@ -103,8 +117,9 @@ def validate_income_with_economic_context(
     
     return is_consistent, " ".join(suggestions)
 
-def run_all_validations(investor_data: dict, economic_indicators: dict = None, profile_id: str = None, all_profiles_master_data=None) -> dict:
-    """Runs all validation checks and returns a dictionary of results."""
+def run_all_validations(investor_data: dict, economic_indicators: dict = None, profile_id: str = None, all_profiles_master_data=None,
+                        regime_snapshot: dict = None) -> dict:
+    """Runs all validation checks and returns a dictionary of results. `regime_snapshot` takes precedence over `economic_indicators`."""
     validation_summary = {
         "overall_valid": True,
         "issues": [],
@@ -141,11 +156,12 @@ def run_all_validations(investor_data: dict, economic_indicators: dict = None, p
     validation_summary["suggestions_log"].append({"field": "individual_monthly_income", "check": "profile_consistency", "status": "consistent" if consistent_income_profile else "warning", "message": msg_income_profile})
 
     # Check if economic_indicators is not None and, if it's a pandas Series/DataFrame, that it's not empty
-    if economic_indicators is not None and not getattr(economic_indicators, "empty", True):
+    if regime_snapshot is not None or (economic_indicators is not None and not getattr(economic_indicators, "empty", False)):
         consistent_income_econ, msg_income_econ = validate_income_with_economic_context(
             investor_data.get("individual_monthly_income", 0.0),
             investor_data.get("occupation", ""),
-            economic_indicators
+            economic_indicators,
+            regime_snapshot
         )
         if not consistent_income_econ:
             validation_summary["issues"].append({"field": "individual_monthly_income", "message": msg_income_econ, "type": "context_warning"})
@@ -165,6 +181,7 @@ if __name__ == "__main__":
     
     mock_econ_normal = {"gdp_growth_rate": 5.0}
     mock_econ_slowdown = {"gdp_growth_rate": 3.5}
+    mock_econ_stagflation = {"gdp_growth_rate": 3.0, "cpi_inflation": 7.2}
 
     print("\nTest 1: Valid data, normal economy, profile W8")
     results_valid = run_all_validations(sample_investor_valid, mock_econ_normal, profile_id="W8")
@@ -207,3 +224,10 @@ if __name__ == "__main__":
     print(f"Overall Valid: {results_bad_fields['overall_valid']}")
     print(f"Issues: {results_bad_fields['issues']}")
 
+
+    print("\nTest 5: High income for Blue-Collar during stagflation, from a regime snapshot")
+    stagflation_snapshot = {"regime": "stagflation", "confidence": 0.9, "version": 1, "inputs": {"gdp_growth": 3.0, "cpi_inflation": 7.2}}
+    results_stagflation = run_all_validations(sample_investor_high_income_slowdown_bc, mock_econ_normal, profile_id="B8", regime_snapshot=stagflation_snapshot)
+    print(f"Overall Valid: {results_stagflation['overall_valid']}")
+    print(f"Issues: {results_stagflation['issues']}")
+    print(f"Same from indicators: {validate_income_with_economic_context(60000, 'Blue-Collar', mock_econ_stagflation)}")
@@ -9,13 +9,25 @@ import plotly.express as px
 import re
 import os
 
-# Attempt to import fetch_economic_data, handle if not found for local testing
-try:
-    from economic_data_fetcher import fetch_economic_data
-except ImportError:
-    st.warning("economic_data_fetcher.py not found. Economic data features will use fallbacks.")
-    def fetch_economic_data(): # Fallback function
-        return {}
+from economic_data_refresher import EconomicDataRefresher, format_snapshot_age
+from profile_transition_logic import ensure_profile_transition_schema, refresh_profile_transition_dates, run_daily_profile_transitions
+from goal_inflation_logic import ensure_goal_inflation_schema, reindex_goal_targets
+from indicator_store_logic import ensure_indicator_store_schema, record_snapshot_observations
+from economic_data_adapters import sync_economic_data_sources
+from forecasting_logic import ensure_forecast_schema, refresh_forecasts, load_forecasts
+from early_warning_logic import ensure_early_warning_schema, process_new_observations, get_active_warnings, EARLY_WARNING_FREQUENCIES, SLOWDOWN_FUND_SUGGESTION
+from communication_logic import generate_economic_slowdown_alert, send_app_notification
+from economic_regime_logic import (ensure_economic_regime_schema, refresh_economic_regime, get_current_regime, regime_risk_adjustment, regime_economic_condition,
+                                   describe_regime)
+from financial_goals_logic import calculate_step_up_sips_batch
+from dependents_logic import ensure_dependents_schema, save_investor_dependents, stage_investor_ids
+from goal_generation_logic import ensure_goal_generation_schema, regenerate_auto_generated_goals
+from fund_returns_logic import ensure_fund_return_schema, load_fund_return_master
+from emergency_fund_logic import calculate_emergency_fund_requirement, derive_essential_monthly_expenses
+from savings_logic import calculate_savings_details, get_annual_savings_adjustment_rate
+from ai_validation_logic import run_all_validations
+from self_education_logic import (is_self_education_eligible, validate_self_education_goal, build_self_education_goals, save_self_education_goals, ensure_self_education_schema,
+                                  get_occupation_type, SELF_EDUCATION_PROGRAMS, SELF_EDUCATION_PRIORITY_RANKS, DEFAULT_SELF_EDUCATION_PRIORITY)
 
 # Streamlit app configuration
 st.set_page_config(page_title="Financial Planning App", layout="wide")
@@ -255,6 +267,17 @@ def init_db():
         FOREIGN KEY (investor_id) REFERENCES investors(investor_id)
     )''')
     conn.commit()
+    ensure_profile_transition_schema(conn)
+    ensure_indicator_store_schema(conn)
+    ensure_forecast_schema(conn)
+    ensure_early_warning_schema(conn)
+    ensure_economic_regime_schema(conn)
+    ensure_goal_inflation_schema(conn)
+    ensure_dependents_schema(conn)
+    ensure_goal_generation_schema(conn)
+    ensure_fund_return_schema(conn)
+    ensure_self_education_schema(conn)
+    load_fund_return_master(conn)
     return conn
 
 def generate_investor_id(conn):
@@ -271,24 +294,30 @@ DEFAULT_ECONOMIC_DATA = {
     "cpi_inflation": {"value": 5.0, "year": "N/A (Fallback)", "indicator": "CPI Inflation (Annual %)"}
 }
 
-def fetch_and_store_economic_data(conn):
+def store_refreshed_economic_data(data):
+    """
+    Runs in the background refresh thread: stores the new snapshot, syncs the indicator store from every
+    economic data source (World Bank, MFD file drop), refits the forecasts of the indicators with new data,
+    runs the early warning rules over the new observations, classifies the economic regime once for every
+    investor and re-indexes goal targets, on its own connection. Returns notes for the refresh status file.
+    """
+    conn = sqlite3.connect('financial_planning.db')
     try:
-        fetched_data = fetch_economic_data()
-        if not fetched_data or (not fetched_data.get("gdp_growth") and not fetched_data.get("cpi_inflation")):
-            st.warning("Economic data fetcher returned empty/invalid data. Using fallback.")
-            data_to_store = DEFAULT_ECONOMIC_DATA
-            is_fallback_flag = True
-        else:
-            data_to_store = fetched_data
-            is_fallback_flag = "N/A (Fallback)" in fetched_data.get("gdp_growth", {}).get("year", "")
-        save_economic_data(conn, datetime.now().strftime("%Y-%m-%d"), data_to_store, is_fallback=is_fallback_flag)
-        st.session_state.latest_economic_data = data_to_store
-        return True, data_to_store
-    except Exception as e:
-        st.error(f"Error fetching economic data: {e}. Using fallback.")
-        save_economic_data(conn, datetime.now().strftime("%Y-%m-%d"), DEFAULT_ECONOMIC_DATA, is_fallback=True)
-        st.session_state.latest_economic_data = DEFAULT_ECONOMIC_DATA
-        return False, DEFAULT_ECONOMIC_DATA
+        save_economic_data(conn, datetime.now().strftime("%Y-%m-%d"), data, is_fallback=False)
+        sync_result = sync_economic_data_sources(conn)
+        notes = [f"Indicator store sync: {sync_result['written']} rows written; " +
+                 ", ".join(f"{metric['source']} {metric['seconds']}s ({metric['status']})" for metric in sync_result["metrics"])]
+        refresh_forecasts(conn)
+        for frequency in EARLY_WARNING_FREQUENCIES:
+            for event in process_new_observations(conn, frequency):
+                notes.append(f"Early warning {event['state']} ({frequency}, {event['period']}): {event['message']}")
+        notes.append(describe_regime(refresh_economic_regime(conn)))
+        notes.append(f"Goal targets re-indexed: {reindex_goal_targets(conn)}")
+        return notes
+    finally:
+        conn.close()
+
+economic_data_refresher = EconomicDataRefresher(on_refreshed=store_refreshed_economic_data)
 
 def get_latest_economic_data_from_db(conn):
     c = conn.cursor()
@@ -309,6 +338,8 @@ def save_economic_data(conn, date_str, data_dict, is_fallback=False):
     c.execute("INSERT OR REPLACE INTO economic_indicators (date, data, is_fallback) VALUES (?, ?, ?)",
               (date_str, json.dumps(data_dict), is_fallback))
     conn.commit()
+    if not is_fallback:
+        record_snapshot_observations(conn, data_dict, date_str)
 
 def calculate_age(dob_str, today_date_obj):
     if not dob_str: return 0
@@ -387,101 +418,106 @@ def assign_investor_profile_id(investor_data_dict):
             return profile_id
     return "UnknownProfile"
 
-DEFAULT_GOALS_BY_PROFILE_TYPE = {
-    "Young Adult": [
-        {"name": "Emergency Fund Creation", "type": "Emergency Fund", "priority": 1, "target_months_expenses": 3},
-        {"name": "Debt Reduction (if any)", "type": "Debt Reduction", "priority": 2},
-        {"name": "Short-term Savings (e.g., Skill Upgradation)", "type": "Short-Term Savings", "priority": 3, "target_years": 2},
-        {"name": "Retirement Planning (Start Early)", "type": "Retirement", "priority": 4}
-    ],
-    "Young Family": [
-        {"name": "Emergency Fund (Maintain/Increase)", "type": "Emergency Fund", "priority": 1, "target_months_expenses": 4},
-        {"name": "Children's Education Fund", "type": "Education", "priority": 2, "child_ref": "oldest"},
-        {"name": "Home Purchase (Down Payment)", "type": "Home Purchase", "priority": 3, "target_years": 5},
-        {"name": "Retirement Planning", "type": "Retirement", "priority": 4}
-    ],
-    "Mid-Career Family": [
-        {"name": "Emergency Fund (Maintain)", "type": "Emergency Fund", "priority": 1, "target_months_expenses": 6},
-        {"name": "Children's Higher Education", "type": "Education", "priority": 2, "child_ref": "all"},
-        {"name": "Children's Marriage (Optional)", "type": "Marriage", "priority": 3},
-        {"name": "Retirement Corpus Building", "type": "Retirement", "priority": 4, "target_age": 60},
-        {"name": "Wealth Creation", "type": "Wealth Creation", "priority": 5}
-    ],
-}
+def run_profile_transitions(conn):
+    """Reassigns the profiles of investors whose age boundary is due, with the same assigner as profile save, and notifies them."""
+    def assign_profile(investor_data_dict):
+        profile_id = assign_investor_profile_id(investor_data_dict)
+        return None if profile_id == "UnknownProfile" else profile_id
+    transitions = run_daily_profile_transitions(conn, assign_profile)
+    for transition in transitions:
+        send_app_notification(transition["investor_id"], transition["notification"])
+    return transitions
+
+def load_goal_generation_inputs(conn, investor_ids=None):
+    """One row per investor with the columns goal_generation_logic.build_template_goals() needs (and its optional ones)."""
+    query = """SELECT i.investor_id, i.dob, i.occupation, i.investor_profile_id, i.individual_income, i.spouse_income, i.urban_rural_status,
+                      i.emi_amount AS loan_emis, i.home_ownership AS owns_home, i.rent_amount, i.monthly_household_expenses,
+                      COUNT(d.dependent_id) AS num_dependents, GROUP_CONCAT(d.birth_year) AS dependent_birth_years
+               FROM investors i LEFT JOIN dependents d ON d.investor_id = i.investor_id"""
+    if investor_ids is not None:
+        query += f" WHERE i.investor_id IN ({stage_investor_ids(conn, investor_ids)})"
+    investors = pd.read_sql_query(query + " GROUP BY i.investor_id", conn)
+    today = date.today()
+    investors["age"] = [calculate_age(dob, today) for dob in investors["dob"]]
+    investors["birth_year"] = pd.to_datetime(investors["dob"], errors="coerce").dt.year.fillna(today.year - investors["age"]).astype(int)
+    investors["life_cycle_stage"] = [get_investor_life_cycle_stage(age, num_dependents) for age, num_dependents in zip(investors["age"], investors["num_dependents"])]
+    investors["dependent_ages"] = [[max(today.year - int(birth_year), 0) for birth_year in birth_years.split(",")] if birth_years else []
+                                   for birth_years in investors.pop("dependent_birth_years")]
+    investors["income_level"] = [
+        get_income_level_from_value(0.0 if pd.isna(income) else income, occupation or 'Other', age, num_dependents)
+        for income, occupation, age, num_dependents in zip(investors["individual_income"], investors["occupation"], investors["age"], investors["num_dependents"])
+    ]
+    return investors
 
-def auto_generate_financial_goals(conn, investor_id, investor_data_dict, investor_profile_id):
+def regenerate_financial_goals_batch(conn, investor_ids=None):
+    """Replaces auto-generated goals for the given investors (all if None) in one transaction, keeping MFD-edited goals."""
+    return regenerate_auto_generated_goals(conn, load_goal_generation_inputs(conn, investor_ids))
+
+def auto_generate_financial_goals(conn, investor_id):
     c = conn.cursor()
     c.execute("SELECT COUNT(*) FROM financial_goals WHERE investor_id = ? AND is_auto_generated = 1", (investor_id,))
     if c.fetchone()[0] > 0:
         st.info(f"Automatic financial goals already exist for {investor_id}. Skipping generation.")
         return
 
-    age = calculate_age(investor_data_dict.get('dob'), date.today())
-    num_dependents = investor_data_dict.get('num_dependents', 0)
-    profile_category_for_goals = get_investor_life_cycle_stage(age, num_dependents)
-    default_goals_template = DEFAULT_GOALS_BY_PROFILE_TYPE.get(profile_category_for_goals, [])
-    generated_goals_count = 0
-    for goal_template in default_goals_template:
-        goal_name = goal_template["name"]
-        goal_type = goal_template["type"]
-        priority = goal_template["priority"]
-        target_amount = 0
-        target_year = date.today().year + (goal_template.get("target_years", 10))
-        notes = "Automatically generated based on investor profile."
-        monthly_expenses_for_goal_calc = investor_data_dict.get('monthly_household_expenses', 20000) 
-
-        if goal_type == "Emergency Fund":
-            target_months = goal_template.get("target_months_expenses", 3)
-            target_amount = monthly_expenses_for_goal_calc * target_months 
-            target_year = date.today().year + 1
-        
-        elif goal_type == "Retirement":
-            annual_expenses = monthly_expenses_for_goal_calc * 12
-            target_amount = annual_expenses * 20 
-            retirement_age = goal_template.get("target_age", 60)
-            target_year = datetime.strptime(investor_data_dict.get('dob'), "%Y-%m-%d").year + retirement_age
-            if target_year <= date.today().year: target_year = date.today().year + 20
-
-        elif goal_type == "Education" and "child_ref" in goal_template:
-            target_amount = 500000 
-            target_year = date.today().year + 10 + (priority * 2) 
-            goal_name = f"{goal_name} (Child {priority-1 if priority > 1 else 1})"
-
-        if target_amount > 0:
-            try:
-                c.execute("""INSERT INTO financial_goals 
-                             (investor_id, goal_name, goal_type, target_amount, target_year, priority, notes, creation_date, is_auto_generated)
-                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                          (investor_id, goal_name, goal_type, target_amount, target_year, priority, notes, date.today().isoformat(), True))
-                generated_goals_count += 1
-            except sqlite3.Error as e:
-                st.error(f"Error saving auto-generated goal '{goal_name}': {e}")
-        
+    try:
+        generated_goals_count = regenerate_financial_goals_batch(conn, [investor_id])["goals_created"]
+    except sqlite3.Error as e:
+        st.error(f"Error saving auto-generated goals: {e}")
+        return
     if generated_goals_count > 0:
-        conn.commit()
         st.success(f"{generated_goals_count} financial goals automatically generated for {investor_id}.")
     else:
         st.info(f"No applicable automatic financial goals generated for {investor_id} based on current profile/rules.")
 
-def calculate_required_emergency_fund(investor_data_dict):
-    monthly_household_expenses = investor_data_dict.get('monthly_household_expenses', 0.0)
-    total_emis = investor_data_dict.get('loan_emis', 0.0)
+def build_savings_input(investor_data_dict):
+    """Maps the app's investor fields onto the savings_logic.calculate_savings_details() input."""
+    occupation_raw = investor_data_dict.get('occupation') or 'Other'
     rent = 0.0
     if investor_data_dict.get('owns_home') is False:
-        rent = investor_data_dict.get('rent_amount', 0.0)
+        rent = investor_data_dict.get('rent_amount', 0.0) or 0.0
+    return {
+        "individual_monthly_income": investor_data_dict.get('individual_income', 0.0) or 0.0,
+        "spouse_monthly_income": investor_data_dict.get('spouse_income', 0.0) or 0.0,
+        "occupation": "White-Collar" if "White-Collar" in occupation_raw else "Blue-Collar",
+        "monthly_rent": rent,
+        "monthly_emi": investor_data_dict.get('loan_emis', 0.0) or 0.0,
+        "urban_rural_status": investor_data_dict.get('urban_rural_status'),
+        "home_ownership": bool(investor_data_dict.get('owns_home')),
+        "dependents": [{"age": dep.get('age') or 0} for dep in investor_data_dict.get('dependents_details') or [] if isinstance(dep, dict)]
+    }
 
-    essential_monthly_expenses = monthly_household_expenses + total_emis + rent
-    occupation_raw = investor_data_dict.get('occupation', 'Other')
-    urban_rural = investor_data_dict.get('urban_rural_status', 'Urban')
-
-    num_months = 0
-    if "White-Collar" in occupation_raw: num_months = 6
-    elif "Blue-Collar" in occupation_raw: num_months = 4
-    else: num_months = 3
-    if urban_rural == "Rural": num_months += 1
-    required_fund = essential_monthly_expenses * num_months
+def validate_investor_inputs(conn, investor_data_dict, profile_id=None):
+    """AI input validation issues, with the income read against the current regime snapshot. An empty mobile number is optional here."""
+    validation_input = {
+        "mobile_number": investor_data_dict.get('mobile_number') or "",
+        "email": investor_data_dict.get('email_address') or "",
+        "dob": investor_data_dict.get('dob') or "",
+        "individual_monthly_income": investor_data_dict.get('individual_income', 0.0) or 0.0,
+        "occupation": build_savings_input(investor_data_dict)["occupation"]
+    }
+    results = run_all_validations(validation_input, profile_id=profile_id, regime_snapshot=get_current_regime(conn))
+    return [issue for issue in results["issues"] if issue["field"] != "mobile_number" or validation_input["mobile_number"]]
+
+def calculate_required_emergency_fund(investor_data_dict):
+    # Essential expenses = household income - calculated savings, as everywhere else (emergency_fund_logic).
+    savings_input = build_savings_input(investor_data_dict)
+    essential_monthly_expenses = derive_essential_monthly_expenses(calculate_savings_details(savings_input))
+    profile_id = investor_data_dict.get('investor_profile_id') or assign_investor_profile_id(investor_data_dict)
+    required_fund = calculate_emergency_fund_requirement(
+        profile_id, essential_monthly_expenses, monthly_emi=savings_input["monthly_emi"], monthly_rent=savings_input["monthly_rent"],
+        num_dependents=investor_data_dict.get('num_dependents', 0) or 0
+    )["required_emergency_fund"]
     return max(0, required_fund)
 
+def calculate_goal_step_up_plan(conn, investor_id, profile_id):
+    """Flat and step-up SIPs for an investor's goals, stepping up at the profile's rate for the current regime's economic condition."""
+    goals = pd.read_sql_query("""SELECT goal_name, goal_type, target_amount, target_year, current_savings_for_goal, return_master_version
+                                 FROM financial_goals WHERE investor_id = ? ORDER BY priority, target_year""", conn, params=(investor_id,))
+    goals["investor_profile_id"] = profile_id
+    economic_condition = regime_economic_condition(get_current_regime(conn))
+    return calculate_step_up_sips_batch(goals, economic_condition=economic_condition), economic_condition
+
 def calculate_risk_score(db_conn, investor_id_for_log, investor_data_dict, answers_psychometric):
     base_score_100 = 0
     market_experience_raw = investor_data_dict.get('market_linked_experience') # New first question
@@ -561,15 +597,10 @@ def calculate_risk_score(db_conn, investor_id_for_log, investor_data_dict, answe
     base_score_100 += income_occupation_points
     base_score_100 = max(0, min(100, base_score_100))
 
-    latest_economic_data, is_fallback = get_latest_economic_data_from_db(db_conn)
-    gdp_growth = latest_economic_data.get("gdp_growth", {}).get("value", 6.5) 
-    cpi_inflation = latest_economic_data.get("cpi_inflation", {}).get("value", 5.0)
-    economic_conditions_summary = f"GDP Growth: {gdp_growth}%, CPI Inflation: {cpi_inflation}%"
-    economic_adjustment_factor = 0
-    if gdp_growth > 7 and cpi_inflation < 4: economic_adjustment_factor = 2
-    elif gdp_growth < 5 or cpi_inflation > 7: economic_adjustment_factor = -2
-    elif gdp_growth < 6 or cpi_inflation > 6: economic_adjustment_factor = -1
-    elif gdp_growth > 6 and cpi_inflation < 5: economic_adjustment_factor = 1
+    regime_snapshot = get_current_regime(db_conn)
+    is_fallback = regime_snapshot["is_fallback"]
+    economic_conditions_summary = describe_regime(regime_snapshot)
+    economic_adjustment_factor = regime_risk_adjustment(regime_snapshot)
     
     adjusted_score_100 = base_score_100 + economic_adjustment_factor
     goal_adjustment_details_str = "No specific goal adjustments applied in this version."
@@ -812,6 +843,10 @@ def create_investor_profile_tab_content(conn):
 
     st.markdown(f"### Step {current_step_index + 1} of {len(profile_steps_config)}: {current_step['name']}")
     current_step["content_func"](conn, investor_id)
+    if current_step['name'] == "Finance Tab" and st.session_state.form_data_finance.get("individual_income") is not None:
+        investor_data_for_validation = {**st.session_state.form_data_personal, **st.session_state.form_data_family, **st.session_state.form_data_finance}
+        for issue in validate_investor_inputs(conn, investor_data_for_validation, assign_investor_profile_id(investor_data_for_validation)):
+            st.warning(f"Please review {issue['field'].replace('_', ' ')}: {issue['message']}")
 
     is_current_step_valid = True
     missing_fields_display = []
@@ -914,9 +949,11 @@ def create_investor_profile_tab_content(conn):
                                finance_data.get('monthly_household_expenses'), finance_data.get('individual_income'), finance_data.get('spouse_income')
                                ))
                     conn.commit()
+                    save_investor_dependents(conn, investor_id, family_data.get("dependents_details", []))
+                    refresh_profile_transition_dates(conn, [investor_id])
                     st.success(f"Investor profile for {personal_data.get('name')} ({investor_id}) saved successfully!")
                     st.balloons()
-                    auto_generate_financial_goals(conn, investor_id, full_investor_data_for_calc_and_encrypt, assigned_profile_id)
+                    auto_generate_financial_goals(conn, investor_id)
                     st.session_state.current_investor_id = None 
                     st.session_state.current_profile_creator_step = 0
                     st.session_state.active_tab_label = main_tabs_config["mfd_dashboard"]["label"]
@@ -1041,10 +1078,20 @@ def investor_dashboard_tab_content(conn):
                     "individual_income": investor_db_data.get("individual_income", 0),
                     "spouse_income": investor_db_data.get("spouse_income", 0),
                     "monthly_household_expenses": investor_db_data.get("monthly_household_expenses", 0),
-                    "loan_emis": investor_db_data.get("emi_amount", 0)
+                    "loan_emis": investor_db_data.get("emi_amount", 0),
+                    "owns_home": bool(investor_db_data.get("home_ownership")),
+                    "rent_amount": investor_db_data.get("rent_amount", 0),
+                    "num_dependents": family_data_display.get("num_dependents", 0),
+                    "dependents_details": family_data_display.get("dependents_details", []),
+                    "occupation": investor_db_data.get("occupation"),
+                    "urban_rural_status": investor_db_data.get("urban_rural_status"),
+                    "investor_profile_id": investor_db_data.get("investor_profile_id")
                 }
                 required_ef = calculate_required_emergency_fund(finance_data_for_calc)
                 st.markdown(f"_Required Emergency Fund (Est.): ₹{required_ef:,.0f}_)")
+                economic_condition = regime_economic_condition(get_current_regime(conn))
+                savings_step_up = get_annual_savings_adjustment_rate(investor_db_data.get("investor_profile_id"), economic_condition)
+                st.markdown(f"_Annual Savings Step-Up ({economic_condition} economy): {savings_step_up:.0%}_")
             with goals_tab:
                 st.subheader("Financial Goals")
                 c.execute("SELECT goal_name, goal_type, target_amount, target_year, priority, is_auto_generated FROM financial_goals WHERE investor_id = ? ORDER BY priority, target_year", (investor_id,))
@@ -1053,8 +1100,38 @@ def investor_dashboard_tab_content(conn):
                     goals_df = pd.DataFrame(goals, columns=["Goal Name", "Type", "Target Amount (₹)", "Target Year", "Priority", "Auto-Generated"])
                     goals_df["Target Amount (₹)"] = goals_df["Target Amount (₹)"].apply(lambda x: f"{x:,.0f}")
                     st.dataframe(goals_df, use_container_width=True, hide_index=True)
+                    step_up_plan, economic_condition = calculate_goal_step_up_plan(conn, investor_id, investor_db_data.get('investor_profile_id'))
+                    st.caption(f"Step-up SIPs at the annual savings adjustment rate for the current economic condition ({economic_condition}).")
+                    st.dataframe(step_up_plan[["goal_name", "fund_type", "flat_sip", "step_up_rate", "step_up_sip"]].rename(columns={
+                        "goal_name": "Goal Name", "fund_type": "Fund Type", "flat_sip": "Flat SIP (₹)", "step_up_rate": "Annual Step-Up", "step_up_sip": "Starting Step-Up SIP (₹)"
+                    }).round(2), use_container_width=True, hide_index=True)
                 else:
                     st.info("No financial goals recorded.")
+                if is_self_education_eligible(calculate_age(investor_db_data.get('dob'), date.today()), investor_db_data.get('investor_profile_id')):
+                    with st.expander("Self-Education Goal"):
+                        self_education_enabled = st.checkbox("Include a self-education goal", key=f"self_education_enabled_{investor_id}")
+                        occupation_type = get_occupation_type(investor_db_data.get('investor_profile_id'))
+                        programs = SELF_EDUCATION_PROGRAMS[occupation_type]
+                        program = st.selectbox("Programme", list(programs), key=f"self_education_program_{investor_id}")
+                        cost_min, _, default_years = programs[program]
+                        target_year = st.number_input("Target Year", min_value=date.today().year + 1, step=1, value=date.today().year + default_years, key=f"self_education_year_{investor_id}")
+                        estimated_cost = st.number_input("Estimated Cost (₹, today's prices)", min_value=0.0, step=10000.0, value=float(cost_min), key=f"self_education_cost_{investor_id}")
+                        priority_level = st.selectbox("Priority", list(SELF_EDUCATION_PRIORITY_RANKS), index=list(SELF_EDUCATION_PRIORITY_RANKS).index(DEFAULT_SELF_EDUCATION_PRIORITY), key=f"self_education_priority_{investor_id}")
+                        if self_education_enabled and st.button("Save Self-Education Goal", key=f"self_education_save_{investor_id}"):
+                            validation_errors = validate_self_education_goal(target_year, estimated_cost)
+                            if validation_errors:
+                                for error in validation_errors: st.error(error)
+                            else:
+                                monthly_savings = calculate_savings_details(build_savings_input(financial_details_decrypted))["final_monthly_savings_amount"]
+                                self_education_goals = build_self_education_goals(pd.DataFrame([{
+                                    "investor_id": investor_id, "age": calculate_age(investor_db_data.get('dob'), date.today()),
+                                    "investor_profile_id": investor_db_data.get('investor_profile_id'), "program": program,
+                                    "estimated_cost": estimated_cost, "target_year": target_year, "priority_level": priority_level,
+                                    "final_monthly_savings_amount": monthly_savings
+                                }]))
+                                save_self_education_goals(conn, self_education_goals)
+                                st.success(f"Self-Education goal saved: ₹{self_education_goals['target_amount'].iloc[0]:,.0f} by {target_year}.")
+                                st.rerun()
             with plan_tab:
                 st.subheader("Automated Investment Plan")
                 st.write("(Placeholder - This section will show the auto-generated investment plan.)")
@@ -1115,6 +1192,13 @@ def mfd_dashboard_tab_content(conn):
         if all_investors:
             df_investors = pd.DataFrame(all_investors, columns=["ID", "Name", "DOB", "Gender", "Occupation", "Location Type", "Risk Score", "Profile ID", "Indiv. Income", "Spouse Income"])
             st.dataframe(df_investors, use_container_width=True, hide_index=True)
+            if st.button("Regenerate Automatic Goals for All Investors", key="regenerate_all_goals_btn"):
+                try:
+                    regeneration = regenerate_financial_goals_batch(conn)
+                    st.success(f"Regenerated {regeneration['goals_created']} goals for {regeneration['investors']} investors in {regeneration['seconds']:.2f}s "
+                               f"({regeneration['goals_per_second']:,.0f} goals/s). {regeneration['goals_kept']} MFD-edited goals kept.")
+                except sqlite3.Error as e:
+                    st.error(f"Error regenerating goals: {e}")
             st.markdown("---_Search & Load Investor for Editing_---")
             investor_options_load = {f"{name} ({inv_id})": inv_id for inv_id, name, *_ in all_investors}
             selected_investor_to_load_display = st.selectbox("Select Investor to Load/Edit Profile", options=list(investor_options_load.keys()), index=None, placeholder="Search or select an investor...", key="load_investor_select_mfd")
@@ -1194,17 +1278,40 @@ def mfd_dashboard_tab_content(conn):
 
 def economic_overview_tab_content(conn):
     st.header("📈 Economic Overview")
-    if st.button("Refresh Economic Data"): fetch_and_store_economic_data(conn); st.rerun()
-    latest_data, is_fallback = get_latest_economic_data_from_db(conn)
+    if st.button("Refresh Economic Data"):
+        if economic_data_refresher.refresh_in_background(): st.info("Refreshing economic data in the background.")
+        else: st.info("An economic data refresh is already running.")
+    snapshot = economic_data_refresher.snapshot()
+    refresh_status = "refreshing" if snapshot["refreshing"] else snapshot["state"]
+    if snapshot["state"] == "failed" and snapshot["last_error"]: refresh_status += f" ({snapshot['last_error']})"
+    st.caption(f"Snapshot age: {format_snapshot_age(snapshot['age_seconds'])} | Refresh status: {refresh_status}")
+    if snapshot["notes"]:
+        with st.expander("Last refresh details"):
+            for note in snapshot["notes"]: st.text(note)
+    latest_data, is_fallback = (snapshot["data"], False) if snapshot["data"] else get_latest_economic_data_from_db(conn)
     if is_fallback: st.warning("Displaying fallback economic data.")
     gdp = latest_data.get("gdp_growth", {}); cpi = latest_data.get("cpi_inflation", {})
     st.metric(label=f"GDP Growth ({gdp.get('indicator', '')} - {gdp.get('year', 'N/A')})", value=f"{gdp.get('value', 'N/A')}")
     st.metric(label=f"CPI Inflation ({cpi.get('indicator', '')} - {cpi.get('year', 'N/A')})", value=f"{cpi.get('value', 'N/A')}")
+    st.info(describe_regime(get_current_regime(conn)))
+    active_warnings = get_active_warnings(conn)
+    for warning in active_warnings: st.warning(f"{warning['message']} ({warning['frequency']} data)")
+    if any(warning["slowdown"] for warning in active_warnings) and isinstance(gdp.get("value"), (int, float)):
+        st.error(generate_economic_slowdown_alert(gdp_growth=gdp["value"], fund_suggestion=SLOWDOWN_FUND_SUGGESTION)["content"])
+    forecasts = load_forecasts(conn, refresh=False)  # refitted by the background refresh, not on page load
+    if not forecasts.empty:
+        st.subheader("Indicator Forecasts")
+        st.dataframe(forecasts[["indicator", "frequency", "period", "forecast", "lower_80", "upper_80", "lower_95", "upper_95"]].round(2), hide_index=True)
 
 main_tabs_config = {}
 def main_app_logic():
     conn = init_db()
-    if 'latest_economic_data' not in st.session_state: st.session_state.latest_economic_data, _ = get_latest_economic_data_from_db(conn)
+    if 'latest_economic_data' not in st.session_state:
+        economic_data_refresher.snapshot()  # revalidates in the background if the snapshot is stale
+        st.session_state.latest_economic_data, _ = get_latest_economic_data_from_db(conn)
+        profile_transitions = run_profile_transitions(conn)
+        if profile_transitions:
+            st.sidebar.info(f"{len(profile_transitions)} investor profile(s) moved to a new age band today.")
     st.sidebar.title("Navigation")
     global main_tabs_config 
     main_tabs_ordered_keys = ["create_profile", "investor_dashboard", "mfd_dashboard", "financial_goals", "risk_profile", "investor_guide", "economic_overview"]
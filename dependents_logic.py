@@ -0,0 +1,248 @@
+# dependents_logic.py
+
+import json
+import sqlite3
+import time
+from datetime import date
+
+import numpy as np
+
+from goal_inflation_logic import load_cpi_series, build_cpi_path, calculate_inflation_factors, TARGET_ROUNDING
+from financial_goals_logic import GOAL_PRIORITIES
+
+# --- Education (Master for Allocation for Education of Dependents) ---
+# (stage name, starting age, base cost in 2025 urban rupees)
+EDUCATION_STAGES = [
+    ("Class 11/12", 16, 100000),
+    ("Graduation", 18, 400000)
+]
+# --- Marriage (Master for Allocation for Marriage (of Daughters)) ---
+DEFAULT_MARRIAGE_AGE = 25
+MARRIAGE_AGE_RANGE = (21, 30)
+MARRIAGE_BASE_COSTS = {"White-Collar": 500000, "Blue-Collar": 300000}
+RURAL_COST_DISCOUNT = 0.40  # rural costs are ~40% lower for both goals
+
+EDUCATION_GOAL_TYPE = "Child Education"
+MARRIAGE_GOAL_TYPE = "Child Marriage"
+# Stored priorities follow the goal-type defaults, so allocation ranks these goals as it ranks unsaved ones.
+EDUCATION_GOAL_PRIORITY = GOAL_PRIORITIES[EDUCATION_GOAL_TYPE]
+MARRIAGE_GOAL_PRIORITY = GOAL_PRIORITIES[MARRIAGE_GOAL_TYPE]
+
+AUTO_GOAL_COLUMNS = ("investor_id", "goal_name", "goal_type", "target_amount", "target_year", "priority", "notes", "creation_date",
+                          "is_auto_generated", "present_value_amount", "present_value_year", "dependent_id")
+INSERT_AUTO_GOAL_SQL = (f"INSERT INTO financial_goals ({', '.join(AUTO_GOAL_COLUMNS)}) "
+                             f"VALUES ({', '.join('?' * len(AUTO_GOAL_COLUMNS))})")
+
+# --- Database Integration ---
+def ensure_dependents_schema(conn: sqlite3.Connection):
+    """
+    Creates the normalized dependents table (one row per dependent, indexed by investor and birth year)
+    and links financial_goals to it via dependent_id (idempotent). A newly created table is backfilled
+    from investors.dependents.
+    The form captures ages, not DOBs, so birth_year is derived from the age on the date it was recorded.
+    """
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dependents'")
+    is_new_table = c.fetchone() is None
+    c.execute('''CREATE TABLE IF NOT EXISTS dependents (
+        dependent_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        investor_id TEXT NOT NULL,
+        dependent_index INTEGER NOT NULL,
+        gender TEXT,
+        birth_year INTEGER,
+        age_recorded_on TEXT,
+        UNIQUE (investor_id, dependent_index),
+        FOREIGN KEY (investor_id) REFERENCES investors(investor_id)
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_dependents_birth_year ON dependents (birth_year)")
+    c.execute("PRAGMA table_info(financial_goals)")
+    if "dependent_id" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE financial_goals ADD COLUMN dependent_id INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_financial_goals_dependent ON financial_goals (dependent_id)")
+    conn.commit()
+    if is_new_table:
+        backfill_dependents_from_json(conn)
+
+def _dependent_rows(investor_id: str, dependents_details: list, recorded_on: date) -> list:
+    rows = []
+    for dependent_index, dep in enumerate(dependents_details or []):
+        age = dep.get("age") if isinstance(dep, dict) else None
+        birth_year = recorded_on.year - int(age) if age is not None else None
+        rows.append((investor_id, dependent_index, dep.get("gender") if isinstance(dep, dict) else None, birth_year, recorded_on.isoformat()))
+    return rows
+
+def save_investor_dependents(conn: sqlite3.Connection, investor_id: str, dependents_details: list, recorded_on: date = None):
+    """
+    Writes an investor's dependents (the form's dependents_details list) to the dependents table.
+    Existing rows keep their dependent_id (so linked goals stay attached); removed dependents are deleted.
+    """
+    recorded_on = recorded_on or date.today()
+    rows = _dependent_rows(investor_id, dependents_details, recorded_on)
+    c = conn.cursor()
+    c.executemany("""INSERT INTO dependents (investor_id, dependent_index, gender, birth_year, age_recorded_on) VALUES (?, ?, ?, ?, ?)
+                     ON CONFLICT (investor_id, dependent_index) DO UPDATE SET
+                     gender = excluded.gender, birth_year = excluded.birth_year, age_recorded_on = excluded.age_recorded_on""", rows)
+    c.execute("DELETE FROM dependents WHERE investor_id = ? AND dependent_index >= ?", (investor_id, len(rows)))
+    conn.commit()
+
+def backfill_dependents_from_json(conn: sqlite3.Connection) -> int:
+    """
+    One-off migration: loads every investor's investors.dependents JSON into the dependents table.
+    Ages are taken as recorded today. Returns the number of dependent rows written.
+    """
+    c = conn.cursor()
+    c.execute("SELECT investor_id, dependents FROM investors WHERE dependents IS NOT NULL")
+    today = date.today()
+    rows = []
+    for investor_id, dependents_json in c.fetchall():
+        try:
+            details = json.loads(dependents_json).get("dependents_details", [])
+        except (json.JSONDecodeError, AttributeError):
+            continue
+        rows.extend(_dependent_rows(investor_id, details, today))
+    c.executemany("""INSERT OR IGNORE INTO dependents (investor_id, dependent_index, gender, birth_year, age_recorded_on)
+                     VALUES (?, ?, ?, ?, ?)""", rows)
+    conn.commit()
+    return len(rows)
+
+def stage_investor_ids(conn: sqlite3.Connection, investor_ids: list) -> str:
+    """
+    Loads investor_ids into a temporary table and returns a subquery selecting them, so set-based
+    queries can filter any number of investors without hitting SQLite's bound-parameter limit.
+    """
+    c = conn.cursor()
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS staged_investor_ids (investor_id TEXT PRIMARY KEY)")
+    c.execute("DELETE FROM temp.staged_investor_ids")
+    c.executemany("INSERT OR IGNORE INTO temp.staged_investor_ids VALUES (?)", [(investor_id,) for investor_id in investor_ids])
+    return "SELECT investor_id FROM temp.staged_investor_ids"
+
+def find_dependents_turning_age(conn: sqlite3.Connection, age: int, year: int) -> list:
+    """All dependents turning `age` in `year` (e.g. 17 next year), via the birth_year index. Returns (investor_id, dependent_id, gender)."""
+    c = conn.cursor()
+    c.execute("SELECT investor_id, dependent_id, gender FROM dependents WHERE birth_year = ? ORDER BY investor_id, dependent_index", (year - age,))
+    return c.fetchall()
+
+# --- Goal Generation ---
+def build_dependent_goal_rows(
+    conn: sqlite3.Connection,
+    investor_ids: list = None,
+    current_year: int = None,
+    marriage_age: int = DEFAULT_MARRIAGE_AGE
+) -> list:
+    """
+    financial_goals rows (in AUTO_GOAL_COLUMNS order) for one education goal per dependent and one
+    marriage goal per daughter, timed from each dependent's birth year, for the given investors (all if None).
+    Dependents who already have a goal of that type are skipped, so the rows can be generated repeatedly.
+    Education: due at the start of the next remaining stage (Class 11/12 at 16, Graduation at 18), sized
+    for all remaining stages. Marriage: due at `marriage_age`. Costs are 2025 urban rupees, 40% lower for
+    rural investors; targets are stored as present values and CPI-indexed to the target year.
+    Does not write; see generate_dependent_goals().
+    """
+    current_year = current_year or date.today().year
+    investor_filter = ""
+    if investor_ids is not None:
+        if not investor_ids:
+            return []
+        investor_filter = f"AND d.investor_id IN ({stage_investor_ids(conn, investor_ids)})"
+
+    c = conn.cursor()
+    c.execute(f"""SELECT d.dependent_id, d.investor_id, d.dependent_index, d.gender, d.birth_year, i.occupation, i.urban_rural_status,
+                         EXISTS (SELECT 1 FROM financial_goals g WHERE g.dependent_id = d.dependent_id AND g.goal_type = ?),
+                         EXISTS (SELECT 1 FROM financial_goals g WHERE g.dependent_id = d.dependent_id AND g.goal_type = ?)
+                  FROM dependents d JOIN investors i ON i.investor_id = d.investor_id
+                  WHERE d.birth_year IS NOT NULL {investor_filter}""", (EDUCATION_GOAL_TYPE, MARRIAGE_GOAL_TYPE))
+    candidates = c.fetchall()
+    if not candidates:
+        return []
+
+    (dependent_ids, owner_ids, dependent_indexes, genders, birth_years, occupations, residences,
+     has_education_goal, has_marriage_goal) = (np.array(column, dtype=object) for column in zip(*candidates))
+    birth_years = birth_years.astype(np.int64)
+    cost_factor = np.where(residences == "Rural", 1 - RURAL_COST_DISCOUNT, 1.0)
+
+    # Education: the next stage that has not started yet; its cost plus every later stage's.
+    education_year = np.zeros(len(candidates), dtype=np.int64)
+    education_cost = np.zeros(len(candidates))
+    for _, start_age, base_cost in reversed(EDUCATION_STAGES):
+        not_started = birth_years + start_age > current_year
+        education_year = np.where(not_started, birth_years + start_age, education_year)
+        education_cost = education_cost + not_started * base_cost
+    needs_education = (education_cost > 0) & ~has_education_goal.astype(bool)
+
+    marriage_year = birth_years + marriage_age
+    marriage_cost = np.where([("White-Collar" in (occupation or "")) for occupation in occupations],
+                             MARRIAGE_BASE_COSTS["White-Collar"], MARRIAGE_BASE_COSTS["Blue-Collar"])
+    needs_marriage = (genders == "Female") & (marriage_year > current_year) & ~has_marriage_goal.astype(bool)
+
+    target_years = np.concatenate([education_year[needs_education], marriage_year[needs_marriage]])
+    present_values = np.concatenate([(education_cost * cost_factor)[needs_education], (marriage_cost * cost_factor)[needs_marriage]])
+    if len(target_years) == 0:
+        return []
+    cpi_path = build_cpi_path(load_cpi_series(conn), int(target_years.max()))
+    factors = calculate_inflation_factors(np.full(len(target_years), current_year), target_years, cpi_path)
+    target_amounts = np.round(present_values * factors / TARGET_ROUNDING) * TARGET_ROUNDING
+
+    goal_specs = (
+        [(EDUCATION_GOAL_TYPE, "Education", EDUCATION_GOAL_PRIORITY, index) for index in np.flatnonzero(needs_education)] +
+        [(MARRIAGE_GOAL_TYPE, "Marriage", MARRIAGE_GOAL_PRIORITY, index) for index in np.flatnonzero(needs_marriage)]
+    )
+    today_str = date.today().isoformat()
+    rows = [
+        (owner_ids[index], f"{label} (Dependent {dependent_indexes[index] + 1}, born {birth_years[index]})", goal_type,
+         target_amount, int(target_year), priority, "Automatically generated from dependent's age.", today_str, True,
+         present_value, current_year, int(dependent_ids[index]))
+        for (goal_type, label, priority, index), target_amount, target_year, present_value
+        in zip(goal_specs, target_amounts.tolist(), target_years.tolist(), present_values.tolist())
+    ]
+    return rows
+
+def generate_dependent_goals(
+    conn: sqlite3.Connection,
+    investor_ids: list = None,
+    current_year: int = None,
+    marriage_age: int = DEFAULT_MARRIAGE_AGE
+) -> int:
+    """Inserts the goals from build_dependent_goal_rows() in one executemany. Returns the number of goals created."""
+    rows = build_dependent_goal_rows(conn, investor_ids, current_year, marriage_age)
+    conn.cursor().executemany(INSERT_AUTO_GOAL_SQL, rows)
+    conn.commit()
+    return len(rows)
+
+if __name__ == "__main__":
+    print("--- Test Cases for Dependents Logic ---")
+    from goal_inflation_logic import ensure_goal_inflation_schema
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE investors (investor_id TEXT PRIMARY KEY, occupation TEXT, urban_rural_status TEXT, dependents TEXT)")
+    conn.execute("""CREATE TABLE financial_goals (goal_id INTEGER PRIMARY KEY AUTOINCREMENT, investor_id TEXT, goal_name TEXT, goal_type TEXT,
+                    target_amount REAL, target_year INTEGER, current_savings_for_goal REAL DEFAULT 0, priority INTEGER, notes TEXT,
+                    creation_date TEXT, is_auto_generated BOOLEAN DEFAULT FALSE)""")
+    conn.execute("CREATE TABLE economic_indicators (date TEXT PRIMARY KEY, data TEXT, is_fallback BOOLEAN DEFAULT FALSE)")
+    ensure_goal_inflation_schema(conn)
+
+    conn.execute("INSERT INTO investors VALUES (?, ?, ?, ?)", ("INV-1", "Salaried (White-Collar - Private Sector)", "Urban",
+                 json.dumps({"num_dependents": 2, "dependents_details": [{"age": 14, "gender": "Female"}, {"age": 17, "gender": "Male"}]})))
+    conn.execute("INSERT INTO investors VALUES (?, ?, ?, ?)", ("INV-2", "Salaried (Blue-Collar - Skilled)", "Rural",
+                 json.dumps({"num_dependents": 1, "dependents_details": [{"age": 8, "gender": "Female"}]})))
+    ensure_dependents_schema(conn)
+    print(f"Dependents backfilled on table creation: {conn.execute('SELECT COUNT(*) FROM dependents').fetchone()[0]}")
+    print(f"Goals generated: {generate_dependent_goals(conn, current_year=date.today().year)}")
+    print(f"Re-run generates: {generate_dependent_goals(conn, current_year=date.today().year)} (Expected 0)")
+    for row in conn.execute("SELECT investor_id, goal_name, goal_type, target_amount, target_year, present_value_amount FROM financial_goals ORDER BY investor_id, goal_id"):
+        print(f"  {row}")
+    print(f"Stored priorities by type (Expected Child Education 3, Child Marriage 4): "
+          f"{dict(conn.execute('SELECT DISTINCT goal_type, priority FROM financial_goals').fetchall())}")
+    next_year = date.today().year + 1
+    print(f"Dependents turning 15 in {next_year}: {find_dependents_turning_age(conn, 15, next_year)}")
+
+    rng = np.random.default_rng(9)
+    investors = [(f"B-{i}", rng.choice(["Salaried (White-Collar - Private Sector)", "Salaried (Blue-Collar - Skilled)"]), rng.choice(["Urban", "Rural"]), None) for i in range(20000)]
+    conn.executemany("INSERT INTO investors VALUES (?, ?, ?, ?)", investors)
+    for investor_id, *_ in investors:
+        save_investor_dependents(conn, investor_id, [{"age": int(rng.integers(0, 22)), "gender": rng.choice(["Male", "Female"])} for _ in range(rng.integers(0, 4))])
+    start_time = time.perf_counter()
+    created = generate_dependent_goals(conn)
+    print(f"\nGenerated {created} dependent goals for 20,000 investors in {time.perf_counter() - start_time:.2f}s")
+    start_time = time.perf_counter()
+    turning = find_dependents_turning_age(conn, 17, next_year)
+    print(f"{len(turning)} dependents turn 17 in {next_year} (indexed lookup in {(time.perf_counter() - start_time) * 1000:.1f} ms)")
@@ -0,0 +1,262 @@
+# economic_data_adapters.py
+
+import glob
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+
+from economic_data_fetcher import fetch_world_bank_series, TokenBucket, BASE_URL, COUNTRY, INDICATORS
+from indicator_store_logic import (
+    build_incremental_date_ranges, get_last_periods, upsert_observations,
+    HISTORY_START_YEAR, WORLD_BANK_SOURCE, FILE_DROP_SOURCE, RBI_SOURCE, MOSPI_SOURCE
+)
+
+# --- Sources (Framework Part 2, Sec 19.2 indicators) ---
+# Indicator names are those of economic_data_logic.INDICATOR_NAMES, except GDP, which the indicator store
+# has always called "gdp_growth" (economic_data_fetcher.INDICATORS); adapters' names are mapped through
+# INDICATOR_ALIASES so every source lands in the same series.
+INDICATOR_ALIASES = {"gdp_growth_rate": "gdp_growth"}
+WORLD_BANK_INDICATORS = {
+    **INDICATORS,
+    "unemployment_rate": "SL.UEM.TOTL.ZS",  # Unemployment (% of labour force, ILO estimate)
+    "inr_usd_exchange_rate": "PA.NUS.FCRF"  # Official exchange rate (INR per USD, period average)
+}
+FILE_DROP_DIR = "economic_data_drop"  # MFD-supplied .csv/.xlsx files, long (indicator, period, value) or wide (period/data_month + indicator columns)
+FILE_DROP_PATTERNS = ("*.csv", "*.xlsx", "*.xls")
+
+def canonical_indicator_name(indicator: str) -> str:
+    return INDICATOR_ALIASES.get(indicator, indicator)
+
+def normalize_periods(periods) -> pd.Series:
+    """Periods as store keys: years stay "YYYY", anything date-like becomes "YYYY-MM"; unparseable gives NaN."""
+    periods = pd.Series(periods).astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    is_year = periods.str.fullmatch(r"\d{4}")
+    months = pd.to_datetime(periods.where(~is_year), errors="coerce", format="mixed").dt.strftime("%Y-%m")
+    return periods.where(is_year, months)
+
+class EconomicDataAdapter:
+    """
+    A source of indicator observations. Subclasses set `source` and implement fetch(last_periods), returning
+    [(indicator, period, value)]; `last_periods` is {indicator: latest stored period} for this source, so
+    incremental sources can ask only for newer periods. Failures are raised; the sync records them.
+    """
+    source = None
+
+    def fetch(self, last_periods: dict) -> list:
+        raise NotImplementedError
+
+class WorldBankAdapter(EconomicDataAdapter):
+    """Annual World Bank series, fetched concurrently and only for the years after the last stored one."""
+    source = WORLD_BANK_SOURCE
+
+    def __init__(self, indicators=WORLD_BANK_INDICATORS, country=COUNTRY, base_url=BASE_URL, rate_limiter=None,
+                 start_year=HISTORY_START_YEAR, end_year=None, max_workers=4):
+        self.indicators = indicators
+        self.country = country
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.start_year = start_year
+        self.end_year = end_year
+        self.max_workers = max_workers
+
+    def fetch(self, last_periods: dict) -> list:
+        date_ranges = build_incremental_date_ranges(last_periods, self.indicators, self.end_year, self.start_year)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched = dict(zip(date_ranges, executor.map(
+                lambda name: fetch_world_bank_series(self.indicators[name], self.country, date_ranges[name], self.base_url, self.rate_limiter),
+                date_ranges
+            )))
+        failed = [name for name, observations in fetched.items() if observations is None]
+        if failed and len(failed) == len(fetched):
+            raise RuntimeError(f"No World Bank indicators fetched ({', '.join(failed)})")
+        for name in failed:
+            print(f"Failed to fetch {name} history for {date_ranges[name]}.")
+        return [(name, point["period"], point["value"]) for name, observations in fetched.items() if observations for point in observations]
+
+class FileDropAdapter(EconomicDataAdapter):
+    """
+    Every .csv/.xlsx file in `directory`, in long format (indicator, period, value columns) or wide format
+    (a period or data_month column plus one column per indicator). Files are re-read in full each sync, so
+    a corrected file replaces earlier values. Excel needs openpyxl; without it .xlsx files are skipped.
+    """
+    source = FILE_DROP_SOURCE
+
+    def __init__(self, directory=FILE_DROP_DIR, patterns=FILE_DROP_PATTERNS):
+        self.directory = directory
+        self.patterns = patterns
+
+    def _read_file(self, path) -> pd.DataFrame:
+        if path.lower().endswith(".csv"):
+            return pd.read_csv(path)
+        try:
+            return pd.read_excel(path)
+        except ImportError as e:
+            print(f"Skipping {path}: {e}")
+            return pd.DataFrame()
+
+    def fetch(self, last_periods: dict) -> list:
+        paths = sorted(path for pattern in self.patterns for path in glob.glob(os.path.join(self.directory, pattern)))
+        frames = []
+        for path in paths:
+            frame = self._read_file(path)
+            frame.columns = [str(column).strip().lower() for column in frame.columns]
+            if {"indicator", "period", "value"} <= set(frame.columns):
+                frame = frame[["indicator", "period", "value"]]
+            else:
+                period_column = "period" if "period" in frame.columns else "data_month" if "data_month" in frame.columns else None
+                if period_column is None:
+                    print(f"Skipping {path}: no indicator/period/value or period/data_month columns.")
+                    continue
+                frame = frame.melt(id_vars=period_column, var_name="indicator", value_name="value").rename(columns={period_column: "period"})
+            frames.append(frame)
+        if not frames:
+            return []
+        observations = pd.concat(frames, ignore_index=True)
+        observations["period"] = normalize_periods(observations["period"])
+        observations["value"] = pd.to_numeric(observations["value"], errors="coerce")
+        observations = observations.dropna(subset=["indicator", "period", "value"])
+        return list(observations[["indicator", "period", "value"]].itertuples(index=False, name=None))
+
+# --- Local Feed Stubs ---
+# Offline stand-ins for RBI (DBIE) and MOSPI releases: {indicator: (frequency, level, swing)}. Monthly series
+# use "YYYY-MM" periods; quarterly ones are reported in the quarter's last month.
+RBI_STUB_INDICATORS = {
+    "bank_credit_growth": ("monthly", 15.0, 3.0),
+    "forex_reserves_usd_billion": ("monthly", 620.0, 40.0),
+    "inr_usd_exchange_rate": ("monthly", 83.0, 2.5)
+}
+MOSPI_STUB_INDICATORS = {
+    "gdp_growth_rate": ("quarterly", 7.0, 1.5),
+    "iip_growth": ("monthly", 5.0, 3.0),
+    "core_sector_growth": ("monthly", 6.0, 3.0),
+    "cpi_inflation": ("monthly", 5.0, 1.5),
+    "unemployment_rate": ("quarterly", 7.5, 1.0)
+}
+
+class LocalFeedStubAdapter(EconomicDataAdapter):
+    """
+    Deterministic RBI- or MOSPI-style feed: one value per indicator-period from `start_period` through
+    `end_period` (default: last month), answering only for periods after the last stored one. `latency`
+    simulates the round trip; `fail` makes every fetch raise, to exercise the sync's error path.
+    """
+
+    def __init__(self, source, indicators, start_period="2020-01", end_period=None, latency=0.0, fail=False):
+        self.source = source
+        self.indicators = indicators
+        self.start_period = start_period
+        self.end_period = end_period
+        self.latency = latency
+        self.fail = fail
+
+    def fetch(self, last_periods: dict) -> list:
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError(f"{self.source} feed unavailable")
+        end_period = self.end_period or (pd.Period(date.today(), "M") - 1).strftime("%Y-%m")
+        months = pd.period_range(self.start_period, end_period, freq="M")
+        observations = []
+        for indicator, (frequency, level, swing) in self.indicators.items():
+            periods = months[months.month % 3 == 0] if frequency == "quarterly" else months
+            last_period = last_periods.get(canonical_indicator_name(indicator), "")
+            for period in periods.strftime("%Y-%m"):
+                if period > last_period:
+                    digest = hashlib.sha256(f"{self.source}:{indicator}:{period}".encode()).digest()
+                    observations.append((indicator, period, round(level + (int.from_bytes(digest[:4], "big") / 2**32 * 2 - 1) * swing, 2)))
+        return observations
+
+def default_adapters() -> list:
+    """Production sources: the World Bank API and the MFD file drop. RBI/MOSPI adapters are still local stubs."""
+    return [WorldBankAdapter(), FileDropAdapter()]
+
+# --- Concurrent Fetch, Merge and Bulk Write ---
+def _timed_fetch(adapter: EconomicDataAdapter, last_periods: dict):
+    start_time = time.perf_counter()
+    try:
+        observations, error = adapter.fetch(last_periods), None
+    except Exception as e:
+        observations, error = [], f"{type(e).__name__}: {e}"
+    return observations, {
+        "source": adapter.source,
+        "seconds": round(time.perf_counter() - start_time, 3),
+        "observations": len(observations),
+        "status": "failed" if error else "ok",
+        "error": error
+    }
+
+def merge_observations(results: dict) -> pd.DataFrame:
+    """
+    {source: [(indicator, period, value)]} -> one row per (indicator, period, source), under canonical indicator
+    names. Every source's rows are kept: which source wins is decided on read (indicator_store_logic.SOURCE_PRIORITY),
+    so a lower-priority source still has its own history for its incremental fetches.
+    """
+    frames = [pd.DataFrame(observations, columns=["indicator", "period", "value"]).assign(source=source)
+              for source, observations in results.items() if observations]
+    if not frames:
+        return pd.DataFrame(columns=["indicator", "period", "value", "source"])
+    merged = pd.concat(frames, ignore_index=True)
+    merged["indicator"] = merged["indicator"].map(canonical_indicator_name)
+    return merged.drop_duplicates(["indicator", "period", "source"], keep="last").reset_index(drop=True)
+
+def sync_economic_data_sources(conn: sqlite3.Connection, adapters=None) -> dict:
+    """
+    Fetches every adapter concurrently (each asking only for periods after its own last stored one) and writes
+    every source's observations in one transaction on the calling thread; readers resolve overlapping sources by
+    priority. Returns {"written": rows inserted or updated, "observations": merged rows, "metrics": [per-adapter
+    latency/status]}. A failing adapter is reported in its metrics and does not stop the others.
+    """
+    adapters = default_adapters() if adapters is None else adapters
+    last_periods = {adapter.source: get_last_periods(conn, adapter.source) for adapter in adapters}
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(len(adapters), 1)) as executor:
+        outcomes = list(executor.map(lambda adapter: _timed_fetch(adapter, last_periods[adapter.source]), adapters))
+    fetch_seconds = time.perf_counter() - start_time
+
+    metrics = [metric for _, metric in outcomes]
+    for metric in metrics:
+        if metric["error"]:
+            print(f"Economic data source {metric['source']} failed after {metric['seconds']}s: {metric['error']}")
+    merged = merge_observations({metric["source"]: observations for observations, metric in outcomes})
+    fetched_at = datetime.now().isoformat(timespec="seconds")
+    written = upsert_observations(conn, [(row.indicator, row.period, float(row.value), row.source, fetched_at) for row in merged.itertuples(index=False)])
+    return {"written": written, "observations": len(merged), "fetch_seconds": round(fetch_seconds, 3), "metrics": metrics}
+
+if __name__ == "__main__":
+    import tempfile
+    from indicator_store_logic import ensure_indicator_store_schema, load_indicator_series, load_indicator_frame
+    from world_bank_stub import WorldBankStubServer
+
+    print("--- Test Cases for Multi-Source Economic Data ---")
+    conn = sqlite3.connect(":memory:")
+    ensure_indicator_store_schema(conn)
+    with tempfile.TemporaryDirectory() as drop_dir, WorldBankStubServer(latency=0.2) as stub:
+        pd.DataFrame({"indicator": ["cpi_inflation", "cpi_inflation", "gst_collections_inr_lakh_crore"],
+                      "period": ["2025-06", "2024", "2025-06-01"], "value": [3.1, 4.95, 1.84]}).to_csv(os.path.join(drop_dir, "corrections.csv"), index=False)
+        pd.DataFrame({"data_month": ["2025-05-01", "2025-06-01"], "automobile_sales_units": [341000, 352500],
+                      "rural_demand_indicator_value": [101.5, 103.2]}).to_csv(os.path.join(drop_dir, "industry_wide.csv"), index=False)
+        adapters = [
+            WorldBankAdapter(base_url=stub.base_url, end_year=2026),
+            FileDropAdapter(drop_dir),
+            LocalFeedStubAdapter(RBI_SOURCE, RBI_STUB_INDICATORS, end_period="2025-09", latency=0.3),
+            LocalFeedStubAdapter(MOSPI_SOURCE, MOSPI_STUB_INDICATORS, end_period="2025-09", latency=0.25)
+        ]
+        first = sync_economic_data_sources(conn, adapters)
+        print(f"First sync: {first['written']} rows written from {first['observations']} merged observations in {first['fetch_seconds']}s "
+              f"(sum of adapter latencies {sum(m['seconds'] for m in first['metrics']):.2f}s)")
+        for metric in first["metrics"]:
+            print(f"  {metric}")
+        print(f"File drop beats MOSPI for CPI 2025-06: {load_indicator_series(conn, 'cpi_inflation')['2025-06']} (Expected 3.1)")
+        print(f"File drop beats World Bank for CPI 2024: {load_indicator_series(conn, 'cpi_inflation')['2024']} (Expected 4.95)")
+        print(f"MOSPI's own CPI 2025-06 is still stored: {load_indicator_series(conn, 'cpi_inflation', source=MOSPI_SOURCE).index.isin(['2025-06']).any()} (Expected True)")
+        print(f"MOSPI GDP stored under 'gdp_growth': {load_indicator_series(conn, 'gdp_growth').index[-3:].tolist()}")
+
+        adapters[2].end_period = adapters[3].end_period = "2025-10"
+        adapters[3].fail = True
+        second = sync_economic_data_sources(conn, adapters)
+        sources = ", ".join(f"{m['source']}={m['observations']} ({m['status']})" for m in second["metrics"])
+        print(f"Second sync: {second['written']} rows written; {sources}")
+        print(f"Indicators covered: {sorted(load_indicator_frame(conn).columns)}")
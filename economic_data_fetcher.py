@@ -2,6 +2,11 @@ import requests
 import time
 import json
 import os
+import random
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # World Bank API base URL
@@ -19,75 +24,223 @@ COUNTRY = "IN"
 # Date range for data (last 5 years up to 2025)
 DATE_RANGE = "2020:2025"
 
-# Delay between requests to avoid rate limiting (seconds)
+# One page holds every annual observation since 1960, so no pagination is needed
+PER_PAGE = 1000
+
+# Delay between requests in the sequential fetcher (seconds)
 REQUEST_DELAY = 2  # 2 seconds between requests
 
+# Concurrent fetcher: shared request budget, bounded retries and per-request timeouts
+MAX_WORKERS = 4
+RATE_LIMIT_PER_SECOND = 2.0  # sustained requests per second across all workers
+RATE_LIMIT_BURST = 2
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 # Cache file to store fetched data
 CACHE_FILE = "economic_data_cache.json"
 CACHE_DURATION_DAYS = 1  # Cache data for 1 day
+CACHE_TTL_SECONDS = CACHE_DURATION_DAYS * 24 * 60 * 60
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file in the same directory, then rename it over `path`, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
-def is_cache_valid():
-    """Check if the cached data is still valid (less than 1 day old)."""
-    if not os.path.exists(CACHE_FILE):
-        return False
-    cache_time = datetime.fromtimestamp(os.path.getmtime(CACHE_FILE))
-    return (datetime.now() - cache_time).days < CACHE_DURATION_DAYS
+def load_cache_snapshot(cache_file=CACHE_FILE):
+    """
+    (data, fetched_at) from the cache, or (None, None). Caches written before snapshots carried
+    `fetched_at` are plain indicator dicts; their file mtime is used instead.
+    """
+    try:
+        with open(cache_file, "r") as f:
+            cached = json.load(f)
+        if isinstance(cached, dict) and "fetched_at" in cached:
+            return cached["data"], datetime.fromisoformat(cached["fetched_at"])
+        return cached, datetime.fromtimestamp(os.path.getmtime(cache_file))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, None
+
+def is_cache_valid(cache_file=CACHE_FILE, ttl_seconds=CACHE_TTL_SECONDS):
+    """Check if the cached data is still valid (younger than the TTL)."""
+    data, fetched_at = load_cache_snapshot(cache_file)
+    return data is not None and (datetime.now() - fetched_at).total_seconds() < ttl_seconds
 
 def load_cached_data():
     """Load data from the cache if available and valid."""
     if is_cache_valid():
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
+        return load_cache_snapshot()[0]
     return None
 
-def save_to_cache(data):
-    """Save data to the cache."""
-    with open(CACHE_FILE, "w") as f:
-        json.dump(data, f)
+def save_to_cache(data, cache_file=CACHE_FILE):
+    """Save data to the cache (atomically) with the time it was fetched."""
+    write_json_atomic(cache_file, {"fetched_at": datetime.now().isoformat(timespec="seconds"), "data": data})
 
-def fetch_world_bank_data(indicator_code, country, date_range):
+class TokenBucket:
     """
-    Fetch data for a specific indicator from the World Bank API.
+    Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`.
+    acquire() blocks until a token is available, so concurrent workers share one request budget.
     """
-    # Construct the API URL
-    url = f"{BASE_URL}/country/{country}/indicator/{indicator_code}?date={date_range}&format=json"
 
-    try:
-        # Make the API request
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an error for bad status codes
+    def __init__(self, rate: float = RATE_LIMIT_PER_SECOND, capacity: int = RATE_LIMIT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
 
-        # Parse the JSON response
-        data = response.json()
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
 
-        # World Bank API returns a list where the second element contains the data
-        if len(data) < 2 or not data[1]:
-            print(f"No data returned for indicator {indicator_code}")
-            return None
+def get_backoff_delay(attempt: int, retry_after: str = None) -> float:
+    """
+    Seconds to wait before retry `attempt` (1-based): the server's Retry-After if given, else
+    full-jitter exponential backoff; both capped at BACKOFF_MAX_SECONDS.
+    """
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
 
-        # Extract the latest non-null entry
-        entries = data[1]
-        for entry in sorted(entries, key=lambda x: x["date"], reverse=True):
-            if entry["value"] is not None:
-                return {
-                    "year": entry["date"],
-                    "value": entry["value"],
-                    "indicator": entry.get("indicator", {}).get("value", indicator_code)
-                }
-        print(f"No non-null values found for indicator {indicator_code}")
+_thread_local = threading.local()
+
+def _get_session() -> requests.Session:
+    """One requests.Session (connection pool) per worker thread."""
+    if not hasattr(_thread_local, "session"):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
+
+def parse_world_bank_response(data, indicator_code):
+    """Latest non-null entry of a World Bank indicator response, or None."""
+    # World Bank API returns a list where the second element contains the data
+    if not isinstance(data, list) or len(data) < 2 or not data[1]:
+        print(f"No data returned for indicator {indicator_code}")
+        return None
+
+    # Extract the latest non-null entry
+    entries = data[1]
+    for entry in sorted(entries, key=lambda x: x["date"], reverse=True):
+        if entry["value"] is not None:
+            return {
+                "year": entry["date"],
+                "value": entry["value"],
+                "indicator": entry.get("indicator", {}).get("value", indicator_code)
+            }
+    print(f"No non-null values found for indicator {indicator_code}")
+    return None
+
+def parse_world_bank_series(data, indicator_code):
+    """
+    Every non-null entry of a World Bank indicator response as [{"period", "value"}], oldest first.
+    An empty page (no observations in the requested range yet) gives []; a malformed response gives None.
+    """
+    if not isinstance(data, list) or len(data) < 2:
+        print(f"Unexpected response for indicator {indicator_code}: {str(data)[:200]}")
         return None
+    entries = [entry for entry in (data[1] or []) if entry.get("value") is not None]
+    return [{"period": entry["date"], "value": float(entry["value"])} for entry in sorted(entries, key=lambda x: x["date"])]
+
+def fetch_world_bank_data(indicator_code, country, date_range, base_url=BASE_URL, rate_limiter=None,
+                          timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES, parse=parse_world_bank_response):
+    """
+    Fetch data for a specific indicator from the World Bank API; `parse(json, indicator_code)` shapes the
+    result (the latest point by default, parse_world_bank_series for the full history).
+    Each attempt takes a token from `rate_limiter` (if given). HTTP 429/5xx responses, timeouts and
+    connection errors are retried at most `max_retries` times with jittered exponential backoff.
+    """
+    # Construct the API URL
+    url = f"{base_url}/country/{country}/indicator/{indicator_code}?date={date_range}&format=json&per_page={PER_PAGE}"
 
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 429:
-            print("Rate limit exceeded. Waiting before retrying...")
-            time.sleep(10)  # Wait 10 seconds before retrying
-            return fetch_world_bank_data(indicator_code, country, date_range)  # Retry once
-        else:
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        retry_after = None
+        try:
+            # Make the API request
+            response = _get_session().get(url, timeout=timeout)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                retry_after = response.headers.get("Retry-After")
+                reason = f"HTTP {response.status_code}"
+            else:
+                response.raise_for_status()  # Raise an error for bad status codes
+                return parse(response.json(), indicator_code)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            reason = type(e).__name__
+        except requests.exceptions.HTTPError as e:
             print(f"HTTP Error for indicator {indicator_code}: {e}")
             return None
-    except requests.exceptions.RequestException as e:
-        print(f"Request failed for indicator {indicator_code}: {e}")
-        return None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Request failed for indicator {indicator_code}: {e}")
+            return None
+
+        if attempt == max_retries:
+            print(f"Giving up on indicator {indicator_code} after {max_retries + 1} attempts ({reason}).")
+            return None
+        delay = get_backoff_delay(attempt + 1, retry_after)
+        print(f"{reason} for indicator {indicator_code}. Retrying in {delay:.2f}s ({attempt + 1}/{max_retries})...")
+        time.sleep(delay)
+
+def fetch_world_bank_series(indicator_code, country, date_range, base_url=BASE_URL, rate_limiter=None,
+                            timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES):
+    """All observations of an indicator in `date_range` ([] if none yet, None if the fetch failed)."""
+    return fetch_world_bank_data(indicator_code, country, date_range, base_url, rate_limiter, timeout, max_retries,
+                                 parse=parse_world_bank_series)
+
+def fetch_indicators_concurrently(indicators=INDICATORS, country=COUNTRY, date_range=DATE_RANGE, base_url=BASE_URL,
+                                  rate_limiter=None, max_workers=MAX_WORKERS):
+    """
+    Fetch several indicators in a thread pool sharing one token bucket. Returns {indicator_name: data}
+    for the indicators that were fetched. Worst-case wall time is bounded by the timeouts and retry limits.
+    """
+    rate_limiter = rate_limiter or TokenBucket()
+    output = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_world_bank_data, indicator_code, country, date_range, base_url, rate_limiter): indicator_name
+            for indicator_name, indicator_code in indicators.items()
+        }
+        for future in as_completed(futures):
+            data = future.result()
+            if data:
+                output[futures[future]] = data
+            else:
+                print(f"Failed to fetch {futures[future]} data.")
+    return output
+
+def fetch_indicators_sequentially(indicators=INDICATORS, country=COUNTRY, date_range=DATE_RANGE, base_url=BASE_URL,
+                                  request_delay=REQUEST_DELAY):
+    """The original one-at-a-time fetch with a fixed delay after every call; kept for comparison."""
+    output = {}
+    for indicator_name, indicator_code in indicators.items():
+        data = fetch_world_bank_data(indicator_code, country, date_range, base_url)
+        time.sleep(request_delay)
+        if data:
+            output[indicator_name] = data
+    return output
 
 def fetch_economic_data():
     """
@@ -100,18 +253,8 @@ def fetch_economic_data():
         return cached_data
 
     # Fetch fresh data
-    output = {}
-    for indicator_name, indicator_code in INDICATORS.items():
-        print(f"Fetching {indicator_name} data...")
-        data = fetch_world_bank_data(indicator_code, COUNTRY, DATE_RANGE)
-        
-        # Add delay to avoid rate limiting
-        time.sleep(REQUEST_DELAY)
-
-        if data:
-            output[indicator_name] = data
-        else:
-            print(f"Failed to fetch {indicator_name} data.")
+    print(f"Fetching {', '.join(INDICATORS)} data...")
+    output = fetch_indicators_concurrently()
 
     if not output:
         # Fallback to mock data if no data is fetched
@@ -126,7 +269,40 @@ def fetch_economic_data():
     return output
 
 if __name__ == "__main__":
-    print("Fetching economic data...")
-    result = fetch_economic_data()
-    print("Final JSON output:")
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    if "--live" in sys.argv:
+        print("Fetching economic data...")
+        result = fetch_economic_data()
+        print("Final JSON output:")
+        print(json.dumps(result, indent=2))
+        sys.exit()
+
+    from world_bank_stub import WorldBankStubServer, stub_indicator_value
+    print("--- Offline Tests Against the World Bank Stub ---")
+    with WorldBankStubServer(latency=0.05, throttle_first=2) as stub:
+        result = fetch_indicators_concurrently(base_url=stub.base_url)
+        print(json.dumps(result, indent=2))
+        print(f"Latest GDP value matches stub: {result['gdp_growth']['value'] == stub_indicator_value(INDICATORS['gdp_growth'], 2024)}; "
+              f"requests incl. 429 retries: {stub.total_requests} (Expected 6)")
+
+    with WorldBankStubServer(latency=0.05, throttle_first=100) as stub:
+        start_time = time.perf_counter()
+        result = fetch_indicators_concurrently({"gdp_growth": INDICATORS["gdp_growth"]}, base_url=stub.base_url)
+        print(f"Permanent 429s give up after {stub.total_requests} requests in {time.perf_counter() - start_time:.2f}s: {result} (Expected {{}})")
+
+    with WorldBankStubServer(latency=2.0) as stub:
+        start_time = time.perf_counter()
+        result = fetch_world_bank_data(INDICATORS["gdp_growth"], COUNTRY, DATE_RANGE, stub.base_url, timeout=(1, 0.5), max_retries=1)
+        print(f"Read timeouts give up in {time.perf_counter() - start_time:.2f}s: {result}")
+
+    print("\n--- Throughput: Sequential vs Concurrent ---")
+    many_indicators = {f"indicator_{i}": f"STUB.IND.{i:03d}" for i in range(40)}
+    with WorldBankStubServer(latency=0.1) as stub:
+        start_time = time.perf_counter()
+        sequential = fetch_indicators_sequentially(many_indicators, base_url=stub.base_url, request_delay=0.2)
+        sequential_seconds = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        concurrent = fetch_indicators_concurrently(many_indicators, base_url=stub.base_url, rate_limiter=TokenBucket(rate=20, capacity=5), max_workers=8)
+        concurrent_seconds = time.perf_counter() - start_time
+    print(f"{len(many_indicators)} indicators at 100ms latency: sequential (0.2s delay) {sequential_seconds:.2f}s "
+          f"({len(many_indicators) / sequential_seconds:.1f}/s) vs concurrent (20 req/s bucket, 8 workers) {concurrent_seconds:.2f}s "
+          f"({len(many_indicators) / concurrent_seconds:.1f}/s); same results: {sequential == concurrent}")
@@ -1,8 +1,10 @@
 # economic_data_logic.py
 
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import random
+
+from forecasting_logic import forecast_history, FORECAST_HORIZONS
+from early_warning_logic import EarlyWarningEngine
 
 # As per Framework Part 2, Sec 19.2: GDP Growth Rate, IIP, CPI Inflation, Core Sector Growth,
 # Bank Credit Growth, Unemployment Rate, Foreign Exchange Reserves, INR Depreciation,
@@ -20,45 +22,104 @@ INDICATOR_NAMES = [
     "stock_market_index_points", "rural_demand_indicator_value", "global_economic_indicator_value"
 ]
 
-def generate_mock_economic_data(start_date_str="2023-01-01", num_months=24) -> pd.DataFrame:
+# --- Seeded Mock Data Generator ---
+# Each indicator follows its level plus a stationary AR(1) deviation and a shift for the current regime.
+# "rate" indicators (%, index points around a level) move additively; "level" indicators move in logs
+# with an annual drift. (level, monthly volatility, kind, annual drift, decimals)
+MOCK_INDICATORS = {
+    "gdp_growth_rate": (7.0, 0.6, "rate", 0.0, 1),
+    "iip_growth": (5.0, 1.5, "rate", 0.0, 1),
+    "cpi_inflation": (5.5, 0.4, "rate", 0.0, 1),
+    "core_sector_growth": (6.0, 1.2, "rate", 0.0, 1),
+    "bank_credit_growth": (15.0, 0.8, "rate", 0.0, 1),
+    "unemployment_rate": (7.5, 0.3, "rate", 0.0, 1),
+    "forex_reserves_usd_billion": (600.0, 0.01, "level", 0.04, 2),
+    "inr_usd_exchange_rate": (82.0, 0.006, "level", 0.03, 2),
+    "gst_collections_inr_lakh_crore": (1.5, 0.03, "level", 0.10, 2),
+    "automobile_sales_units": (300000, 0.05, "level", 0.06, 2),
+    "stock_market_index_points": (65000, 0.04, "level", 0.10, 2),
+    "rural_demand_indicator_value": (100, 0.03, "level", 0.03, 2),
+    "global_economic_indicator_value": (50, 1.5, "rate", 0.0, 2)
+}
+MOCK_AR_COEFFICIENT = 0.85  # month-to-month persistence of deviations from the regime level
+DEFAULT_MOCK_SEED = 2025
+
+# Regimes (Framework Part 2, Sec 19.4 slowdown signals) and their shift from the normal level: percentage
+# points for "rate" indicators, log change for "level" indicators.
+MOCK_REGIMES = ("normal", "expansion", "slowdown")
+MOCK_REGIME_SHIFTS = {
+    "expansion": {"gdp_growth_rate": 1.0, "iip_growth": 2.0, "cpi_inflation": 0.5, "core_sector_growth": 1.5, "bank_credit_growth": 2.0,
+                  "unemployment_rate": -0.5, "forex_reserves_usd_billion": 0.03, "inr_usd_exchange_rate": -0.01, "gst_collections_inr_lakh_crore": 0.05,
+                  "automobile_sales_units": 0.08, "stock_market_index_points": 0.10, "rural_demand_indicator_value": 0.04, "global_economic_indicator_value": 2.0},
+    "slowdown": {"gdp_growth_rate": -3.0, "iip_growth": -5.0, "cpi_inflation": 0.5, "core_sector_growth": -4.0, "bank_credit_growth": -5.0,
+                 "unemployment_rate": 2.0, "forex_reserves_usd_billion": -0.08, "inr_usd_exchange_rate": 0.05, "gst_collections_inr_lakh_crore": -0.10,
+                 "automobile_sales_units": -0.20, "stock_market_index_points": -0.25, "rural_demand_indicator_value": -0.10, "global_economic_indicator_value": -4.0}
+}
+# Monthly regime transition probabilities (rows: from, columns: to, in MOCK_REGIMES order).
+MOCK_REGIME_TRANSITIONS = (
+    (0.96, 0.02, 0.02),
+    (0.06, 0.94, 0.00),
+    (0.08, 0.00, 0.92)
+)
+
+def _build_mock_parameters(indicators: dict, regime_shifts: dict):
+    """Compiles MOCK_INDICATORS and MOCK_REGIME_SHIFTS into arrays aligned with INDICATOR_NAMES."""
+    levels, volatility, kinds, drifts, decimals = (np.array(column) for column in zip(*(indicators[name] for name in INDICATOR_NAMES)))
+    shifts = np.array([[regime_shifts.get(regime, {}).get(name, 0.0) for name in INDICATOR_NAMES] for regime in MOCK_REGIMES])
+    return levels.astype(float), volatility.astype(float), kinds == "level", drifts.astype(float), decimals.astype(int), shifts
+
+MOCK_PARAMETERS = _build_mock_parameters(MOCK_INDICATORS, MOCK_REGIME_SHIFTS)
+
+def simulate_economic_scenarios(num_scenarios: int, num_months: int, seed: int = DEFAULT_MOCK_SEED):
+    """
+    Vectorized simulation across scenarios: returns (values [scenario, month, indicator] in INDICATOR_NAMES
+    order, regime codes [scenario, month] indexing MOCK_REGIMES). The same seed always gives the same paths.
+    Every scenario starts in the normal regime.
+    """
+    rng = np.random.default_rng(seed)
+    levels, volatility, is_level, drifts, decimals, shifts = MOCK_PARAMETERS
+    cumulative_transitions = np.cumsum(MOCK_REGIME_TRANSITIONS, axis=1)
+    regime_draws = rng.random((num_months, num_scenarios))
+    shocks = rng.standard_normal((num_months, num_scenarios, len(INDICATOR_NAMES))) * volatility * np.sqrt(1 - MOCK_AR_COEFFICIENT ** 2)
+
+    regimes = np.zeros((num_months, num_scenarios), dtype=np.int8)
+    deviations = np.empty_like(shocks)
+    deviations[0] = rng.standard_normal((num_scenarios, len(INDICATOR_NAMES))) * volatility  # stationary start
+    for month in range(1, num_months):
+        regimes[month] = (regime_draws[month][:, None] > cumulative_transitions[regimes[month - 1]]).sum(axis=1)
+        deviations[month] = MOCK_AR_COEFFICIENT * deviations[month - 1] + shocks[month]
+
+    months_elapsed = np.arange(num_months)[:, None, None]
+    paths = shifts[regimes] + deviations + np.where(is_level, drifts / 12 * months_elapsed, 0.0)
+    values = np.where(is_level, levels * np.exp(paths), levels + paths)
+    return values.transpose(1, 0, 2), regimes.T
+
+def generate_mock_economic_scenarios(start_date_str="2023-01-01", num_months=24, num_scenarios=1, seed: int = DEFAULT_MOCK_SEED) -> pd.DataFrame:
+    """
+    Columnar mock monthly economic data for `num_scenarios` scenarios on calendar months (first of each
+    month from `start_date_str`): scenario, data_month, regime and one column per indicator, ordered by
+    scenario then month. Reproducible for a given seed; suited to load and stress tests.
     """
-    Generates a DataFrame of mock monthly economic data.
+    values, regimes = simulate_economic_scenarios(num_scenarios, num_months, seed)
+    decimals = MOCK_PARAMETERS[4]
+    months = pd.date_range(pd.Timestamp(start_date_str).to_period("M").to_timestamp(), periods=num_months, freq="MS")
+    frame = pd.DataFrame({
+        "scenario": np.repeat(np.arange(num_scenarios), num_months),
+        "data_month": np.tile(months.to_numpy(), num_scenarios),
+        "regime": pd.Categorical.from_codes(regimes.ravel(), MOCK_REGIMES)
+    })
+    flat_values = values.reshape(-1, len(INDICATOR_NAMES))
+    for column, name in enumerate(INDICATOR_NAMES):
+        frame[name] = np.round(flat_values[:, column], decimals[column])
+    return frame
+
+def generate_mock_economic_data(start_date_str="2023-01-01", num_months=24, seed: int = DEFAULT_MOCK_SEED) -> pd.DataFrame:
+    """
+    Generates a DataFrame of mock monthly economic data (one seeded scenario, newest month first).
     Aligns with the 'monthly_economic_summary' table structure.
     """
-    start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-    dates = [start_date + timedelta(days=30 * i) for i in range(num_months)]
-    data_list = []
-
-    base_values = {
-        "gdp_growth_rate": 7.0, "iip_growth": 5.0, "cpi_inflation": 5.5,
-        "core_sector_growth": 6.0, "bank_credit_growth": 15.0, "unemployment_rate": 7.5,
-        "forex_reserves_usd_billion": 600.0, "inr_usd_exchange_rate": 82.0,
-        "gst_collections_inr_lakh_crore": 1.5, "automobile_sales_units": 300000,
-        "stock_market_index_points": 65000, "rural_demand_indicator_value": 100,
-        "global_economic_indicator_value": 50
-    }
-
-    for dt in dates:
-        month_data = {"data_month": dt.strftime("%Y-%m-%d")}
-        for indicator in INDICATOR_NAMES:
-            base = base_values.get(indicator, 0)
-            # Add some random variation and slight trend
-            variation_factor = 1 + (random.uniform(-0.1, 0.1)) # +/- 10% variation
-            trend_factor = 1 + ( (dt - start_date).days / (30 * num_months) ) * random.uniform(-0.05, 0.05) # slight trend over time
-            value = base * variation_factor * trend_factor
-            
-            if indicator in ["forex_reserves_usd_billion", "automobile_sales_units", "stock_market_index_points", "rural_demand_indicator_value", "global_economic_indicator_value", "gst_collections_inr_lakh_crore"]:
-                month_data[indicator] = round(value, 2)
-            elif indicator == "inr_usd_exchange_rate":
-                 month_data[indicator] = round(value, 2)
-            else: # Percentage based indicators
-                month_data[indicator] = round(value, 1)
-        data_list.append(month_data)
-    
-    df = pd.DataFrame(data_list)
-    df["data_month"] = pd.to_datetime(df["data_month"])
-    df = df.sort_values(by="data_month", ascending=False).reset_index(drop=True)
-    return df
+    df = generate_mock_economic_scenarios(start_date_str, num_months, 1, seed).drop(columns=["scenario", "regime"])
+    return df.sort_values(by="data_month", ascending=False).reset_index(drop=True)
 
 # Placeholder for database interaction (to be implemented in main app or DB layer)
 # For now, this module will just generate and return data.
@@ -70,7 +131,7 @@ def get_economic_data(refresh_cache=False) -> pd.DataFrame:
     global ECONOMIC_DATA_CACHE
     if ECONOMIC_DATA_CACHE is None or refresh_cache:
         # In a real app, this would fetch from DB, which is populated by a scheduled job
-        # that calls data source APIs or scrapers.
+        # that calls data source APIs or scrapers. The mock is seeded, so every run and refresh sees the same data.
         ECONOMIC_DATA_CACHE = generate_mock_economic_data(num_months=36) # Generate 3 years of data
     return ECONOMIC_DATA_CACHE
 
@@ -94,36 +155,50 @@ def get_historical_trend(indicator_name: str, months: int = 12) -> pd.DataFrame:
     trend_df = df_sorted[["data_month", indicator_name]].head(months)
     return trend_df.sort_values(by="data_month") # Sort back to ascending for plotting
 
-# --- AI Placeholder Functions (to be developed further) ---
+# --- Forecasts (see forecasting_logic) ---
+def forecast_economic_indicators(df: pd.DataFrame = None, horizon: int = FORECAST_HORIZONS["monthly"]) -> pd.DataFrame:
+    """
+    Batch damped-trend forecasts with 80%/95% intervals for every indicator of a monthly frame (default:
+    get_economic_data()), one row per (indicator, step). See forecasting_logic.forecast_history().
+    """
+    df = get_economic_data() if df is None else df
+    if df.empty:
+        return forecast_history(pd.DataFrame(), horizon)
+    history = df.sort_values(by="data_month")
+    history = history.set_index(pd.to_datetime(history["data_month"]).dt.strftime("%Y-%m"))
+    return forecast_history(history[[name for name in INDICATOR_NAMES if name in history.columns]].astype(float), horizon)
+
 def generate_ai_forecast(indicator_name: str, historical_data: pd.DataFrame) -> str:
-    """Placeholder for AI-driven forecast."""
-    if historical_data.empty:
+    """Next-month forecast of one indicator as a display line (see forecast_economic_indicators() for structured output)."""
+    if historical_data.empty or indicator_name not in historical_data.columns:
+        return "Not enough data for forecast."
+    forecasts = forecast_economic_indicators(historical_data[["data_month", indicator_name]], horizon=1)
+    if forecasts.empty:
         return "Not enough data for forecast."
-    # Simple trend extrapolation placeholder
-    try:
-        latest_value = historical_data[indicator_name].iloc[-1]
-        previous_value = historical_data[indicator_name].iloc[-2] if len(historical_data) > 1 else latest_value
-        trend = latest_value - previous_value
-        forecast_value = latest_value + trend
-        return f"Simple forecast: {forecast_value:.2f} (based on recent trend)"
-    except Exception:
-        return "Forecast unavailable."
+    next_month = forecasts.iloc[0]
+    return (f"Forecast for {next_month['period']}: {next_month['forecast']:.2f} "
+            f"(80% range {next_month['lower_80']:.2f} to {next_month['upper_80']:.2f}; damped-trend exponential smoothing)")
 
 def check_early_warning_triggers(latest_data: pd.Series) -> list:
-    """Placeholder for checking early warning triggers."""
-    warnings = []
+    """
+    Warnings from EARLY_WARNING_RULES for a single row of economic data. Only threshold rules (and
+    composites of them) can fire on one row; see evaluate_early_warnings() for the full history.
+    """
     if latest_data is None:
-        return warnings
-
-    # Example triggers (Framework Part 2, Sec 19.4)
-    if latest_data.get("gdp_growth_rate", 100) < 4.0:
-        warnings.append(f"Warning: GDP Growth Rate is low ({latest_data['gdp_growth_rate']}%). Possible economic slowdown.")
-    if latest_data.get("iip_growth", 100) < 2.0:
-        warnings.append(f"Warning: IIP Growth is low ({latest_data['iip_growth']}%). Consider impact on industrial sector.")
-    if latest_data.get("cpi_inflation", 0) > 6.0:
-        warnings.append(f"Warning: CPI Inflation is high ({latest_data['cpi_inflation']}%). May impact purchasing power.")
-    # Add more triggers as per framework
-    return warnings
+        return []
+    engine = EarlyWarningEngine()
+    values = {indicator: latest_data[indicator] for indicator in INDICATOR_NAMES if pd.notna(latest_data.get(indicator))}
+    return [f"Warning: {event['message']}" for event in engine.update_period("latest", values) if event["state"] == "triggered"]
+
+def evaluate_early_warnings(df: pd.DataFrame = None) -> list:
+    """Streams a monthly frame (default: get_economic_data()) through the early warning engine, oldest month first; returns every event."""
+    df = get_economic_data() if df is None else df
+    engine = EarlyWarningEngine()
+    events = []
+    for row in df.sort_values(by="data_month").itertuples(index=False):
+        period = f"{row.data_month:%Y-%m}"
+        events.extend(engine.update_period(period, {indicator: getattr(row, indicator) for indicator in INDICATOR_NAMES}))
+    return events
 
 if __name__ == "__main__":
     print("--- Test Economic Data Logic ---")
@@ -140,6 +215,8 @@ if __name__ == "__main__":
         print("\nAI Forecast for GDP Growth:")
         forecast = generate_ai_forecast("gdp_growth_rate", gdp_trend)
         print(forecast)
+    print("\nNext-quarter forecasts for all indicators:")
+    print(forecast_economic_indicators(horizon=3)[["indicator", "period", "forecast", "lower_80", "upper_80"]].round(2).to_string(index=False))
 
     if latest_data is not None:
         print("\nEarly Warning Triggers:")
@@ -149,9 +226,31 @@ if __name__ == "__main__":
                 print(warning)
         else:
             print("No early warnings triggered.")
+        history_events = evaluate_early_warnings()
+        print(f"Rule events over the {len(get_economic_data())}-month history: "
+              f"{sum(event['state'] == 'triggered' for event in history_events)} triggered, {sum(event['state'] == 'cleared' for event in history_events)} cleared")
+
+    print("\n--- Seeded Scenario Generator ---")
+    import time
+    same_seed = generate_mock_economic_data(num_months=36).equals(generate_mock_economic_data(num_months=36))
+    other_seed = generate_mock_economic_data(num_months=36).equals(generate_mock_economic_data(num_months=36, seed=7))
+    print(f"Same seed reproduces: {same_seed}; another seed differs: {not other_seed}")
+    month_starts = generate_mock_economic_data("2024-01-31", 14)["data_month"].sort_values()
+    print(f"Calendar months from 2024-01-31: {month_starts.iloc[0]:%Y-%m-%d}, {month_starts.iloc[1]:%Y-%m-%d} ... {month_starts.iloc[-1]:%Y-%m-%d} (no 30-day drift)")
+
+    num_scenarios, num_years = 1000, 50
+    start_time = time.perf_counter()
+    scenarios = generate_mock_economic_scenarios("2025-01-01", num_years * 12, num_scenarios)
+    print(f"{num_scenarios:,} scenarios x {num_years} years = {len(scenarios):,} rows x {len(INDICATOR_NAMES)} indicators "
+          f"in {time.perf_counter() - start_time:.2f}s")
+    print(f"Share of months by regime: {scenarios['regime'].value_counts(normalize=True).round(3).to_dict()}")
+    print(scenarios.groupby("regime", observed=True)[["gdp_growth_rate", "iip_growth", "unemployment_rate"]].mean().round(2))
+    lag_one = scenarios.groupby("scenario")["cpi_inflation"].apply(lambda series: series.autocorr()).mean()
+    print(f"Mean month-to-month CPI autocorrelation: {lag_one:.2f}")
 
-    # Test fetching all data
-    # all_data = get_economic_data()
-    # print(f"\nTotal {len(all_data)} months of data generated.")
-    # print(all_data.head())
+    # Stress test for goal projection: cumulative inflation on ₹10,00,000 over 20 years across scenarios
+    annual_cpi = scenarios.assign(year=scenarios["data_month"].dt.year).groupby(["scenario", "year"])["cpi_inflation"].mean().unstack()
+    growth = np.prod(1 + annual_cpi.iloc[:, :20].to_numpy() / 100, axis=1)
+    print(f"₹10,00,000 in 20 years across scenarios: P5 ₹{np.percentile(growth, 5) * 1e6:,.0f}, "
+          f"median ₹{np.median(growth) * 1e6:,.0f}, P95 ₹{np.percentile(growth, 95) * 1e6:,.0f}")
 
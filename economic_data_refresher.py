@@ -0,0 +1,256 @@
+# economic_data_refresher.py
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from economic_data_fetcher import (
+    fetch_indicators_concurrently, load_cache_snapshot, save_to_cache, write_json_atomic, CACHE_FILE, CACHE_TTL_SECONDS
+)
+
+# --- Stale-While-Revalidate Refresh ---
+REFRESH_LOCK_FILE = "economic_data_refresh.lock"
+REFRESH_STATUS_FILE = "economic_data_refresh_status.json"
+REFRESH_LOCK_TIMEOUT_SECONDS = 120  # a lock not touched for this long belongs to a refresh that died; it is broken
+REFRESH_LOCK_HEARTBEAT_SECONDS = 30  # a running refresh touches its lock this often, however long it takes
+
+class EconomicDataRefresher:
+    """
+    Serves the last good economic data snapshot at once and revalidates it in a background thread when
+    it is older than `ttl_seconds`. A lock file created with O_EXCL lets only one refresh run at a time
+    across Streamlit sessions, threads and worker processes. The refresh status is kept in a JSON file
+    so every process can show it. `fetch()` returns {indicator_name: data} ({} on failure); `on_refreshed(data)`
+    runs in the refresh thread after a successful fetch (e.g. to store the data in the database) and may return
+    a list of notes, kept in the status file. A failed fetch never replaces the last good snapshot.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE, lock_file=REFRESH_LOCK_FILE, status_file=REFRESH_STATUS_FILE,
+                 ttl_seconds=CACHE_TTL_SECONDS, lock_timeout_seconds=REFRESH_LOCK_TIMEOUT_SECONDS,
+                 fetch=fetch_indicators_concurrently, on_refreshed=None, heartbeat_seconds=REFRESH_LOCK_HEARTBEAT_SECONDS):
+        self.cache_file = cache_file
+        self.lock_file = lock_file
+        self.status_file = status_file
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.heartbeat_seconds = min(heartbeat_seconds, lock_timeout_seconds / 2)
+        self.fetch = fetch
+        self.on_refreshed = on_refreshed
+
+    # --- Cross-process lock ---
+    def _lock_age_seconds(self):
+        try:
+            return time.time() - os.path.getmtime(self.lock_file)
+        except OSError:
+            return None
+
+    def _acquire_lock(self) -> bool:
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                lock_age = self._lock_age_seconds()
+                if lock_age is None or lock_age <= self.lock_timeout_seconds:
+                    return False
+                if not self._break_stale_lock():
+                    return False
+                print(f"Broke stale economic data refresh lock ({lock_age:.0f}s old).")
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{os.getpid()} {datetime.now().isoformat(timespec='seconds')}")
+            return True
+        return False
+
+    def _break_stale_lock(self) -> bool:
+        """
+        Moves the stale lock aside with an atomic rename, so only one of the processes racing to break it
+        succeeds and none can delete a lock another has just created. A lock that turns out to be fresh once
+        moved is put back with os.link, which fails rather than overwrite a lock created in the meantime.
+        """
+        broken_lock_file = f"{self.lock_file}.{os.getpid()}.{threading.get_ident()}.broken"
+        try:
+            os.rename(self.lock_file, broken_lock_file)
+        except FileNotFoundError:
+            return False
+        try:
+            if time.time() - os.path.getmtime(broken_lock_file) <= self.lock_timeout_seconds:
+                try:
+                    os.link(broken_lock_file, self.lock_file)
+                except OSError:
+                    pass
+                return False
+            return True
+        finally:
+            os.remove(broken_lock_file)
+
+    def _heartbeat(self, done: threading.Event):
+        """Keeps the held lock's mtime fresh until `done` is set, so a long refresh is never taken for a dead one."""
+        while not done.wait(self.heartbeat_seconds):
+            try:
+                os.utime(self.lock_file)
+            except OSError:
+                return
+
+    def _release_lock(self):
+        try:
+            os.remove(self.lock_file)
+        except FileNotFoundError:
+            pass
+
+    def is_refreshing(self) -> bool:
+        lock_age = self._lock_age_seconds()
+        return lock_age is not None and lock_age <= self.lock_timeout_seconds
+
+    # --- Status ---
+    def read_status(self) -> dict:
+        try:
+            with open(self.status_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_status(self, **fields):
+        write_json_atomic(self.status_file, {**self.read_status(), **fields})
+
+    # --- Refresh ---
+    def _run_refresh(self) -> bool:
+        """Fetches and stores a new snapshot; the caller holds the lock, which is kept alive and released here."""
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(done,), name="economic-data-refresh-heartbeat", daemon=True).start()
+        self._update_status(state="refreshing", started_at=datetime.now().isoformat(timespec="seconds"))
+        try:
+            data = self.fetch()
+            if not data:
+                raise RuntimeError("No indicators fetched")
+            save_to_cache(data, self.cache_file)
+            notes = self.on_refreshed(data) if self.on_refreshed is not None else None
+            self._update_status(state="ok", finished_at=datetime.now().isoformat(timespec="seconds"), last_error=None, notes=notes or [])
+            return True
+        except Exception as e:
+            print(f"Economic data refresh failed: {e}")
+            self._update_status(state="failed", finished_at=datetime.now().isoformat(timespec="seconds"), last_error=str(e))
+            return False
+        finally:
+            done.set()
+            self._release_lock()
+
+    def refresh(self) -> bool:
+        """Refreshes in the calling thread. Returns False without fetching if another refresh is running."""
+        if not self._acquire_lock():
+            return False
+        return self._run_refresh()
+
+    def refresh_in_background(self) -> bool:
+        """Starts a refresh in a daemon thread. Returns False if another refresh is already running."""
+        if not self._acquire_lock():
+            return False
+        threading.Thread(target=self._run_refresh, name="economic-data-refresh", daemon=True).start()
+        return True
+
+    def snapshot(self, revalidate: bool = True) -> dict:
+        """
+        The last good snapshot, immediately: data (None if nothing was ever fetched), fetched_at, age_seconds,
+        is_stale, refreshing, state, last_error and notes of the latest refresh. Starts a background refresh
+        if the snapshot is stale or missing and `revalidate` is set.
+        """
+        data, fetched_at = load_cache_snapshot(self.cache_file)
+        age_seconds = (datetime.now() - fetched_at).total_seconds() if fetched_at else None
+        is_stale = age_seconds is None or age_seconds >= self.ttl_seconds
+        refresh_started = revalidate and is_stale and self.refresh_in_background()
+        status = self.read_status()
+        return {
+            "data": data,
+            "fetched_at": fetched_at,
+            "age_seconds": age_seconds,
+            "is_stale": is_stale,
+            "refreshing": refresh_started or self.is_refreshing(),
+            "state": status.get("state", "never refreshed"),
+            "last_error": status.get("last_error"),
+            "notes": status.get("notes", [])
+        }
+
+def format_snapshot_age(age_seconds) -> str:
+    """'2d 3h', '3h 5m', '4m' or 'never fetched'."""
+    if age_seconds is None:
+        return "never fetched"
+    minutes = int(age_seconds // 60)
+    days, hours, minutes = minutes // 1440, minutes // 60 % 24, minutes % 60
+    if days:
+        return f"{days}d {hours}h"
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+def _demo_process_refresh(paths) -> bool:
+    """One worker process's attempt to refresh (for the cross-process demo below)."""
+    cache_file, lock_file, status_file = paths
+    slow_fetch = lambda: time.sleep(1) or {"gdp_growth": {"year": "2024", "value": 6.5, "indicator": "GDP growth (annual %)"}}
+    return EconomicDataRefresher(cache_file, lock_file, status_file, fetch=slow_fetch).refresh()
+
+if __name__ == "__main__":
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from multiprocessing import Pool
+    from world_bank_stub import WorldBankStubServer
+
+    print("--- Test Cases for Stale-While-Revalidate Refresh ---")
+    with tempfile.TemporaryDirectory() as directory, WorldBankStubServer(latency=0.3) as stub:
+        stored = []
+        refresher = EconomicDataRefresher(
+            cache_file=os.path.join(directory, "cache.json"), lock_file=os.path.join(directory, "refresh.lock"),
+            status_file=os.path.join(directory, "status.json"), ttl_seconds=2,
+            fetch=lambda: fetch_indicators_concurrently(base_url=stub.base_url), on_refreshed=stored.append
+        )
+        start_time = time.perf_counter()
+        first = refresher.snapshot()
+        print(f"Cold start returns in {time.perf_counter() - start_time:.3f}s: data={first['data']}, refreshing={first['refreshing']}")
+
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            started = list(executor.map(lambda _: refresher.refresh_in_background(), range(50)))
+        print(f"50 concurrent sessions started {sum(started)} extra refreshes (Expected 0)")
+        while refresher.is_refreshing():
+            time.sleep(0.05)
+        fresh = refresher.snapshot()
+        print(f"After refresh: state={fresh['state']}, age={format_snapshot_age(fresh['age_seconds'])}, stale={fresh['is_stale']}, "
+              f"stored {len(stored)} time(s), stub requests {stub.total_requests} (Expected 2)")
+
+        time.sleep(2.1)
+        start_time = time.perf_counter()
+        stale = refresher.snapshot()
+        print(f"Stale snapshot served in {time.perf_counter() - start_time:.3f}s with data while revalidating: "
+              f"{stale['data'] is not None and stale['refreshing']}")
+        while refresher.is_refreshing():
+            time.sleep(0.05)
+
+        with Pool(8) as pool:
+            refreshed = pool.map(_demo_process_refresh, [(refresher.cache_file, refresher.lock_file, refresher.status_file)] * 8)
+        print(f"8 worker processes refreshing at once: {sum(refreshed)} refresh ran (Expected 1)")
+        failing = EconomicDataRefresher(cache_file=refresher.cache_file, lock_file=refresher.lock_file, status_file=refresher.status_file,
+                                        ttl_seconds=0, fetch=lambda: {})
+        last_good = failing.snapshot(revalidate=False)["data"]
+        failing.refresh()
+        after_failure = failing.snapshot(revalidate=False)
+        print(f"Failed refresh keeps the last good snapshot: {after_failure['data'] == last_good}; "
+              f"state={after_failure['state']}, last_error={after_failure['last_error']}")
+
+        with open(refresher.lock_file, "w") as f:
+            f.write("crashed")
+        os.utime(refresher.lock_file, (time.time() - 600, time.time() - 600))
+        print(f"Stale lock from a crashed refresh is broken: {refresher.refresh()}")
+
+        with open(refresher.lock_file, "w") as f:
+            f.write("crashed")
+        os.utime(refresher.lock_file, (time.time() - 600, time.time() - 600))
+        with Pool(8) as pool:
+            refreshed = pool.map(_demo_process_refresh, [(refresher.cache_file, refresher.lock_file, refresher.status_file)] * 8)
+        print(f"8 worker processes racing to break a stale lock: {sum(refreshed)} refresh ran (Expected 1)")
+
+        slow = EconomicDataRefresher(cache_file=refresher.cache_file, lock_file=refresher.lock_file, status_file=refresher.status_file,
+                                     lock_timeout_seconds=0.5, heartbeat_seconds=0.1,
+                                     fetch=lambda: time.sleep(1.5) or {"gdp_growth": {"year": "2024", "value": 6.5}},
+                                     on_refreshed=lambda data: [f"Stored {len(data)} indicator(s)"])
+        slow.refresh_in_background()
+        time.sleep(1.0)
+        print(f"Refresh running past the lock timeout keeps its lock: {not slow.refresh()} (Expected True)")
+        while slow.is_refreshing():
+            time.sleep(0.05)
+        print(f"Notes from on_refreshed in the status file: {slow.snapshot(revalidate=False)['notes']}")
@@ -0,0 +1,202 @@
+# economic_regime_logic.py
+
+import json
+import math
+import sqlite3
+from datetime import datetime
+
+from early_warning_logic import get_active_warnings
+from indicator_store_logic import SOURCE_PRIORITY, load_indicator_series
+
+# --- Economic Regime Classifier (Framework Part 2, Sec 19.4) ---
+# One classification of the economy, computed once per data update and stored as a versioned snapshot that
+# the risk score, the savings step-up rate and the income validation all read:
+#   stagflation  slowdown signal (GDP growth below SLOWDOWN_GDP_GROWTH or an active early warning slowdown
+#                rule) with CPI inflation above HIGH_CPI_INFLATION
+#   slowdown     slowdown signal with CPI inflation at or below HIGH_CPI_INFLATION
+#   inflationary no slowdown signal, CPI inflation above HIGH_CPI_INFLATION
+#   expansion    GDP growth at or above EXPANSION_GDP_GROWTH with CPI inflation at or below EXPANSION_MAX_CPI_INFLATION
+#   normal       everything else
+REGIME_MODEL = "regime_thresholds_v2"
+REGIMES = ("expansion", "normal", "inflationary", "slowdown", "stagflation")
+SLOWDOWN_GDP_GROWTH = 4.0
+HIGH_CPI_INFLATION = 6.0
+EXPANSION_GDP_GROWTH = 7.0
+EXPANSION_MAX_CPI_INFLATION = 5.0
+# Confidence is 0.5 on a regime boundary and approaches 1 as the inputs move CONFIDENCE_SCALE_PP percentage
+# points and more inside the regime. A slowdown signalled only by early warning rules (GDP above the threshold)
+# starts at the boundary and gains WARNING_CONFIDENCE_STEP per active slowdown rule.
+CONFIDENCE_SCALE_PP = 1.0
+WARNING_CONFIDENCE_STEP = 0.1
+FALLBACK_CONFIDENCE_FACTOR = 0.5  # fallback inputs (nothing observed yet) halve the confidence
+DEFAULT_REGIME_INPUTS = {"gdp_growth": 6.5, "cpi_inflation": 5.0}  # same fallback as app.DEFAULT_ECONOMIC_DATA
+
+# Consumers of the regime
+# Points out of 100, scaled by confidence. High inflation keeps the penalty of the former risk score ladder
+# (-1 above 6% CPI, -2 above 7%): at full confidence it is -2, about -1.5 half a point above the threshold.
+REGIME_RISK_ADJUSTMENTS = {"expansion": 2, "normal": 0, "inflationary": -2, "slowdown": -2, "stagflation": -2}
+REGIME_ECONOMIC_CONDITIONS = {"expansion": "Normal", "normal": "Normal", "inflationary": "Normal", "slowdown": "Slowdown", "stagflation": "Slowdown"}
+SLOWDOWN_REGIMES = ("slowdown", "stagflation")
+
+def _confidence(margin: float) -> float:
+    return 0.5 + 0.5 * math.tanh(max(margin, 0.0) / CONFIDENCE_SCALE_PP)
+
+def classify_economic_regime(gdp_growth: float, cpi_inflation: float, slowdown_warnings: int = 0) -> dict:
+    """
+    {regime, confidence} for GDP growth and CPI inflation (%) and the number of active early warning
+    slowdown rules.
+    """
+    gdp_slowdown = gdp_growth < SLOWDOWN_GDP_GROWTH
+    if gdp_slowdown or slowdown_warnings:
+        regime = "stagflation" if cpi_inflation > HIGH_CPI_INFLATION else "slowdown"
+        if gdp_slowdown:
+            confidence = _confidence(min(SLOWDOWN_GDP_GROWTH - gdp_growth, abs(cpi_inflation - HIGH_CPI_INFLATION)))
+        else:
+            confidence = min(0.5 + WARNING_CONFIDENCE_STEP * slowdown_warnings, _confidence(abs(cpi_inflation - HIGH_CPI_INFLATION)))
+    elif cpi_inflation > HIGH_CPI_INFLATION:
+        regime = "inflationary"
+        confidence = _confidence(min(cpi_inflation - HIGH_CPI_INFLATION, gdp_growth - SLOWDOWN_GDP_GROWTH))
+    elif gdp_growth >= EXPANSION_GDP_GROWTH and cpi_inflation <= EXPANSION_MAX_CPI_INFLATION:
+        regime = "expansion"
+        confidence = _confidence(min(gdp_growth - EXPANSION_GDP_GROWTH, EXPANSION_MAX_CPI_INFLATION - cpi_inflation))
+    else:
+        regime = "normal"
+        distance_to_expansion = max(EXPANSION_GDP_GROWTH - gdp_growth, cpi_inflation - EXPANSION_MAX_CPI_INFLATION)
+        confidence = _confidence(min(gdp_growth - SLOWDOWN_GDP_GROWTH, HIGH_CPI_INFLATION - cpi_inflation, distance_to_expansion))
+    return {"regime": regime, "confidence": round(confidence, 3)}
+
+# --- Versioned Snapshot ---
+def ensure_economic_regime_schema(conn: sqlite3.Connection):
+    """Creates the regime snapshot table (idempotent). Each new classification is a new version."""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS economic_regime_snapshots (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        regime TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        inputs TEXT NOT NULL,
+        data_signature TEXT NOT NULL,
+        is_fallback INTEGER DEFAULT 0,
+        computed_at TEXT
+    )''')
+    conn.commit()
+
+def _row_to_snapshot(row) -> dict:
+    version, regime, confidence, inputs, data_signature, is_fallback, computed_at = row
+    return {"version": version, "regime": regime, "confidence": confidence, "inputs": json.loads(inputs),
+            "data_signature": data_signature, "is_fallback": bool(is_fallback), "computed_at": computed_at}
+
+def load_regime_snapshot(conn: sqlite3.Connection, version: int = None) -> dict | None:
+    """The given (default latest) regime snapshot, or None if none was computed yet."""
+    c = conn.cursor()
+    if version is None:
+        c.execute("SELECT * FROM economic_regime_snapshots ORDER BY version DESC LIMIT 1")
+    else:
+        c.execute("SELECT * FROM economic_regime_snapshots WHERE version = ?", (version,))
+    row = c.fetchone()
+    return _row_to_snapshot(row) if row else None
+
+def gather_regime_inputs(conn: sqlite3.Connection, source_priority: dict = SOURCE_PRIORITY) -> dict:
+    """
+    Latest observed GDP growth and CPI inflation from the indicator store (the most recent period of any
+    frequency) and the active early warning slowdown rules. Missing indicators use DEFAULT_REGIME_INPUTS.
+    """
+    inputs = {"is_fallback": False}
+    for indicator, default in DEFAULT_REGIME_INPUTS.items():
+        series = load_indicator_series(conn, indicator, source_priority=source_priority)
+        if series.empty:
+            inputs[indicator], inputs[f"{indicator}_period"], inputs["is_fallback"] = default, None, True
+        else:
+            inputs[indicator], inputs[f"{indicator}_period"] = round(float(series.iloc[-1]), 4), str(series.index[-1])
+    inputs["slowdown_rules"] = sorted({warning["rule"] for warning in get_active_warnings(conn) if warning["slowdown"]})
+    return inputs
+
+def refresh_economic_regime(conn: sqlite3.Connection, source_priority: dict = SOURCE_PRIORITY) -> dict:
+    """
+    Classifies the current inputs and stores a new snapshot version only if they changed since the latest
+    one; call it once after every data update (after the early warning rules ran). Returns the current snapshot.
+    """
+    inputs = gather_regime_inputs(conn, source_priority)
+    data_signature = f"{REGIME_MODEL}|{json.dumps(inputs, sort_keys=True)}"
+    latest = load_regime_snapshot(conn)
+    if latest is not None and latest["data_signature"] == data_signature:
+        return latest
+
+    classification = classify_economic_regime(inputs["gdp_growth"], inputs["cpi_inflation"], len(inputs["slowdown_rules"]))
+    confidence = classification["confidence"] * (FALLBACK_CONFIDENCE_FACTOR if inputs["is_fallback"] else 1.0)
+    c = conn.cursor()
+    c.execute("""INSERT INTO economic_regime_snapshots (regime, confidence, inputs, data_signature, is_fallback, computed_at)
+                 VALUES (?, ?, ?, ?, ?, ?)""",
+              (classification["regime"], round(confidence, 3), json.dumps(inputs), data_signature, inputs["is_fallback"],
+               datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+    return load_regime_snapshot(conn, c.lastrowid)
+
+def get_current_regime(conn: sqlite3.Connection) -> dict:
+    """The latest regime snapshot; the first call on an empty table computes it. Read this, don't reclassify."""
+    return load_regime_snapshot(conn) or refresh_economic_regime(conn)
+
+def regime_risk_adjustment(snapshot: dict) -> float:
+    """Economic adjustment of the risk score (points out of 100) for a regime snapshot."""
+    return round(REGIME_RISK_ADJUSTMENTS[snapshot["regime"]] * snapshot["confidence"], 2)
+
+def regime_economic_condition(snapshot: dict) -> str:
+    """"Slowdown" or "Normal" for savings_logic.get_annual_savings_adjustment_rate()."""
+    return REGIME_ECONOMIC_CONDITIONS[snapshot["regime"]]
+
+def describe_regime(snapshot: dict) -> str:
+    """One-line summary for logs and the UI."""
+    inputs = snapshot["inputs"]
+    summary = (f"Regime: {snapshot['regime'].title()} (confidence {snapshot['confidence']:.0%}, v{snapshot['version']}); "
+               f"GDP Growth: {inputs['gdp_growth']}%, CPI Inflation: {inputs['cpi_inflation']}%")
+    if inputs["slowdown_rules"]:
+        summary += f"; slowdown warnings: {', '.join(inputs['slowdown_rules'])}"
+    return summary
+
+if __name__ == "__main__":
+    import time
+    from early_warning_logic import ensure_early_warning_schema, process_new_observations
+    from indicator_store_logic import ensure_indicator_store_schema, upsert_observations, FILE_DROP_SOURCE
+    from savings_logic import get_annual_savings_adjustment_rate
+    from ai_validation_logic import validate_income_with_economic_context
+
+    print("--- Test Cases for Economic Regime Classifier ---")
+    for gdp, cpi, warnings in [(8.0, 3.5, 0), (7.1, 4.9, 0), (6.5, 5.0, 0), (4.2, 6.5, 0), (3.5, 5.0, 0), (3.0, 7.5, 0), (5.5, 5.0, 2)]:
+        print(f"GDP {gdp}%, CPI {cpi}%, {warnings} slowdown warnings: {classify_economic_regime(gdp, cpi, warnings)}")
+    for gdp, cpi in [(6.5, 9.0), (4.5, 6.8), (6.5, 6.5)]:
+        classification = classify_economic_regime(gdp, cpi)
+        print(f"High inflation, GDP {gdp}%, CPI {cpi}%: {classification}, risk adjustment "
+              f"{regime_risk_adjustment(classification)} (Expected inflationary, negative)")
+
+    conn = sqlite3.connect(":memory:")
+    ensure_indicator_store_schema(conn)
+    ensure_early_warning_schema(conn)
+    ensure_economic_regime_schema(conn)
+    print(f"\nEmpty store: {describe_regime(get_current_regime(conn))}, fallback {get_current_regime(conn)['is_fallback']}")
+
+    fetched_at = "2025-01-15T00:00:00"
+    upsert_observations(conn, [("gdp_growth", "2024", 6.8, FILE_DROP_SOURCE, fetched_at), ("cpi_inflation", "2024", 4.6, FILE_DROP_SOURCE, fetched_at)])
+    process_new_observations(conn, "annual")
+    snapshot = refresh_economic_regime(conn)
+    print(f"After a data update: {describe_regime(snapshot)}")
+    print(f"Unchanged data keeps version {refresh_economic_regime(conn)['version']} (Expected {snapshot['version']})")
+
+    upsert_observations(conn, [("gdp_growth", "2025", 3.2, FILE_DROP_SOURCE, "2026-01-15T00:00:00"),
+                               ("cpi_inflation", "2025", 6.9, FILE_DROP_SOURCE, "2026-01-15T00:00:00")])
+    process_new_observations(conn, "annual")
+    snapshot = refresh_economic_regime(conn)
+    print(f"After a slowdown update: {describe_regime(snapshot)}")
+
+    start_time = time.perf_counter()
+    for _ in range(10000):
+        current = get_current_regime(conn)
+        regime_risk_adjustment(current)
+        get_annual_savings_adjustment_rate("B8", regime_economic_condition(current))
+        validate_income_with_economic_context(60000, "Blue-Collar", regime_snapshot=current)
+    print(f"10,000 investors read snapshot v{current['version']} in {time.perf_counter() - start_time:.3f}s: "
+          f"risk adjustment {regime_risk_adjustment(current)}, B8 savings rate {get_annual_savings_adjustment_rate('B8', regime_economic_condition(current))}")
+    start_time = time.perf_counter()
+    for _ in range(100):
+        classify_economic_regime(**{k: v for k, v in gather_regime_inputs(conn).items() if k in DEFAULT_REGIME_INPUTS})
+    print(f"Re-deriving the regime per investor instead: {(time.perf_counter() - start_time) * 100:.3f}s per 10,000")
+    print(f"Income validation: {validate_income_with_economic_context(60000, 'Blue-Collar', regime_snapshot=current)}")
+    conn.close()
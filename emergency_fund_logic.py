@@ -0,0 +1,140 @@
+# emergency_fund_logic.py
+
+import numpy as np
+import pandas as pd
+
+# --- Base Emergency Fund (Master Emergency Fund Requirement Document, Sections 3 & 4) ---
+# (min, max) months of essential living expenses per investor profile.
+EMERGENCY_FUND_BASE_MONTHS = {
+    "W1": (2.5, 3), "W2": (3, 3.5), "W3": (3.5, 4), "W4": (3, 3.5), "W5": (3.5, 4), "W6": (4, 4),
+    "W7": (3.5, 4), "W8": (4, 4), "W9": (4, 4), "W10": (4, 4), "W11": (4, 4), "W12": (4, 4),
+    "W13": (4, 4), "W14": (4, 4), "W15": (4, 4),
+    "B1": (2.5, 3), "B2": (3, 3.5), "B3": (3.5, 4), "B4": (3, 3.5), "B5": (3.5, 4), "B6": (4, 4),
+    "B7": (3.5, 4), "B8": (4, 4), "B9": (4, 4), "B10": (4, 4), "B11": (4, 4), "B12": (4, 4),
+    "B13": (4, 4), "B14": (4, 4), "B15": (4, 4)
+}
+DEFAULT_BASE_MONTHS = (2, 4)  # Framework Section 2 base range, for unassigned profiles
+
+# --- Modifiers (Framework for Arriving at an Emergency Fund, Section 4) ---
+EMI_MULTIPLIER = 1.5
+RENT_AND_EMI_MULTIPLIER = 2.0
+MANY_DEPENDENTS_THRESHOLD = 2  # more than 2 dependents
+MANY_DEPENDENTS_MULTIPLIER = 1.5
+LOW_GOALS_HIGH_SAVINGS_MULTIPLIER = 0.75  # only when the selected base is the top of its range
+MAX_EMERGENCY_FUND_MONTHS = 8
+
+# Where in the profile's range the base is selected (Section 5, Step 2 is an advisor's judgement).
+BASE_SELECTION_POSITIONS = {"low": 0.0, "mid": 0.5, "high": 1.0}
+DEFAULT_BASE_SELECTION = "high"
+
+def _build_base_months_lookup(base_months: dict):
+    """Compiles EMERGENCY_FUND_BASE_MONTHS into (profile index, min months, max months); the last row is the default."""
+    profile_ids = list(base_months)
+    ranges = np.array([base_months[profile_id] for profile_id in profile_ids] + [DEFAULT_BASE_MONTHS], dtype=float)
+    return {profile_id: index for index, profile_id in enumerate(profile_ids)}, ranges[:, 0], ranges[:, 1]
+
+EMERGENCY_FUND_LOOKUP = _build_base_months_lookup(EMERGENCY_FUND_BASE_MONTHS)
+
+def derive_essential_monthly_expenses(savings_details):
+    """
+    Essential monthly living expenses = household income - calculated monthly savings (Master, Section 2.1).
+    Accepts a calculate_savings_details() result or a calculate_savings_details_batch() result.
+    """
+    return np.maximum(np.asarray(savings_details["household_monthly_income"], dtype=float)
+                      - np.asarray(savings_details["final_monthly_savings_amount"], dtype=float), 0.0)
+
+def calculate_emergency_fund_batch(
+    profile_ids,
+    essential_monthly_expenses,
+    monthly_emi=0.0,
+    monthly_rent=0.0,
+    num_dependents=0,
+    low_goals_high_savings=False,
+    base_selection: str = DEFAULT_BASE_SELECTION
+) -> dict:
+    """
+    Recommended emergency fund for arrays of investors (inputs broadcast).
+    Base months are selected from the profile's range, then multiplied by 1.5 for an EMI (2.0 with rent
+    as well), 1.5 for more than 2 dependents and, if the base is the top of its range, 0.75 for investors
+    with easily achievable goals and a high savings rate; capped at 8 months.
+    Returns a dict of arrays: base_months_min, base_months_max, base_months, multiplier, recommended_months,
+    essential_monthly_expenses, required_emergency_fund.
+    """
+    if base_selection not in BASE_SELECTION_POSITIONS:
+        raise ValueError(f"Invalid base selection: {base_selection}. Valid selections are: {tuple(BASE_SELECTION_POSITIONS)}")
+    profile_ids, essential_monthly_expenses, monthly_emi, monthly_rent, num_dependents, low_goals_high_savings = np.broadcast_arrays(
+        np.asarray(profile_ids, dtype=object), np.asarray(essential_monthly_expenses, dtype=float), np.asarray(monthly_emi, dtype=float),
+        np.asarray(monthly_rent, dtype=float), np.asarray(num_dependents, dtype=float), np.asarray(low_goals_high_savings, dtype=bool)
+    )
+    profile_index, min_months, max_months = EMERGENCY_FUND_LOOKUP
+    profile_codes, unique_profiles = pd.factorize(profile_ids.ravel(), use_na_sentinel=False)
+    rows = np.array([profile_index.get(profile_id, len(profile_index)) for profile_id in unique_profiles], dtype=np.int64)[profile_codes].reshape(profile_ids.shape)
+    base_min, base_max = min_months[rows], max_months[rows]
+    base_months = base_min + (base_max - base_min) * BASE_SELECTION_POSITIONS[base_selection]
+
+    pays_emi = monthly_emi > 0
+    multiplier = np.where(pays_emi & (monthly_rent > 0), RENT_AND_EMI_MULTIPLIER, np.where(pays_emi, EMI_MULTIPLIER, 1.0))
+    multiplier = multiplier * np.where(num_dependents > MANY_DEPENDENTS_THRESHOLD, MANY_DEPENDENTS_MULTIPLIER, 1.0)
+    multiplier = multiplier * np.where(low_goals_high_savings & (base_months >= base_max), LOW_GOALS_HIGH_SAVINGS_MULTIPLIER, 1.0)
+    recommended_months = np.minimum(base_months * multiplier, MAX_EMERGENCY_FUND_MONTHS)
+    essential_monthly_expenses = np.maximum(essential_monthly_expenses, 0.0)
+    return {
+        "base_months_min": base_min,
+        "base_months_max": base_max,
+        "base_months": base_months,
+        "multiplier": multiplier,
+        "recommended_months": recommended_months,
+        "essential_monthly_expenses": essential_monthly_expenses,
+        "required_emergency_fund": recommended_months * essential_monthly_expenses
+    }
+
+def calculate_emergency_fund_requirement(
+    profile_id: str,
+    essential_monthly_expenses: float,
+    monthly_emi: float = 0.0,
+    monthly_rent: float = 0.0,
+    num_dependents: int = 0,
+    low_goals_high_savings: bool = False,
+    base_selection: str = DEFAULT_BASE_SELECTION
+) -> dict:
+    """Single-investor emergency fund recommendation (see calculate_emergency_fund_batch())."""
+    return {key: values.item() for key, values in calculate_emergency_fund_batch(
+        profile_id, essential_monthly_expenses, monthly_emi, monthly_rent, num_dependents, low_goals_high_savings, base_selection
+    ).items()}
+
+if __name__ == "__main__":
+    print("--- Test Cases for Emergency Fund Logic ---")
+    # Framework Section 6 example (White Collar, Mid-Stage, Sufficient = W5, base 4 months, ₹40,000 expenses)
+    print(f"Scenario A (EMI): {calculate_emergency_fund_requirement('W5', 40000, monthly_emi=10000)['required_emergency_fund']:,.0f} (Expected 240,000)")
+    print(f"Scenario B (Rent + EMI): {calculate_emergency_fund_requirement('W5', 40000, monthly_emi=10000, monthly_rent=15000)['required_emergency_fund']:,.0f} (Expected 320,000)")
+    print(f"Scenario C (Low goals, high savings): {calculate_emergency_fund_requirement('W5', 40000, low_goals_high_savings=True)['required_emergency_fund']:,.0f} (Expected 120,000)")
+    print(f"  ...not applied when base is mid-range: {calculate_emergency_fund_requirement('W5', 40000, low_goals_high_savings=True, base_selection='mid')['recommended_months']} (Expected 3.75)")
+    print(f"EMI + 3 dependents, capped: {calculate_emergency_fund_requirement('W8', 30000, monthly_emi=5000, num_dependents=3)['recommended_months']} (Expected 8)")
+    print(f"Unassigned profile: {calculate_emergency_fund_requirement('UnknownProfile', 20000)['recommended_months']} (Expected 4)")
+
+    from savings_logic import calculate_savings_details, calculate_savings_details_batch
+    savings = calculate_savings_details({"individual_monthly_income": 50000, "spouse_monthly_income": 0, "occupation": "White-Collar", "monthly_emi": 8000})
+    print(f"Essential expenses derived from savings: {derive_essential_monthly_expenses(savings):,.2f}")
+
+    import time
+    rng = np.random.default_rng(40)
+    num_investors = 1000000
+    book = {
+        "individual_monthly_income": rng.integers(10, 250, num_investors) * 1000.0,
+        "monthly_emi": rng.choice([0.0, 5000.0, 12000.0], num_investors),
+        "monthly_rent": rng.choice([0.0, 8000.0], num_investors),
+        "occupation": rng.choice(["White-Collar", "Blue-Collar"], num_investors).astype(object)
+    }
+    book_profiles = rng.choice(list(EMERGENCY_FUND_BASE_MONTHS) + ["UnknownProfile"], num_investors).astype(object)
+    book_dependents = rng.integers(0, 5, num_investors)
+    start_time = time.perf_counter()
+    book_savings = calculate_savings_details_batch(book)
+    batch = calculate_emergency_fund_batch(book_profiles, derive_essential_monthly_expenses(book_savings), book["monthly_emi"], book["monthly_rent"], book_dependents)
+    print(f"\n{num_investors:,} investors (savings + emergency fund) in {time.perf_counter() - start_time:.2f}s; "
+          f"mean {batch['recommended_months'].mean():.2f} months, {np.mean(batch['recommended_months'] == MAX_EMERGENCY_FUND_MONTHS):.1%} at the cap")
+    sample = rng.integers(0, num_investors, 1000)
+    mismatches = sum(
+        calculate_emergency_fund_requirement(book_profiles[i], batch["essential_monthly_expenses"][i], book["monthly_emi"][i], book["monthly_rent"][i], book_dependents[i])["required_emergency_fund"]
+        != batch["required_emergency_fund"][i] for i in sample
+    )
+    print(f"Scalar vs batch mismatches on 1,000 samples: {mismatches} (Expected 0)")
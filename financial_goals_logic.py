@@ -1,32 +1,38 @@
 # financial_goals_logic.py
 
 import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from savings_logic import round_2dp, get_annual_savings_adjustment_rate
+from fund_returns_logic import FRAMEWORK_FUND_RETURNS, get_fund_returns
 
 # --- Goal Definitions (from Framework Part 1, Section 7) ---
-FUND_TYPE_RETURNS = {
-    "Ultra Short/Low Duration": [0.05, 0.065],
-    "Liquid Fund": [0.04, 0.06],
-    "Balanced Advantage": [0.06, 0.12],
-    "Value Fund": [0.07, 0.12],
-    "Dividend Yield Fund": [0.07, 0.12],
-    "Contra Fund": [0.09, 0.16],
-    "Multi Cap Fund": [0.09, 0.16],
-    "Aggressive Hybrid": [0.08, 0.14]
-}
+# Return assumptions live in the versioned master (fund_returns_logic); this is its version-1 table.
+FUND_TYPE_RETURNS = FRAMEWORK_FUND_RETURNS
 
-def get_return_rates_for_fund_type(fund_type: str) -> tuple[float, float, float]:
-    """Returns (worst, base, best) annual return rates for a fund type."""
-    if fund_type not in FUND_TYPE_RETURNS:
-        print(f"Warning: Fund type {fund_type} not found in FUND_TYPE_RETURNS. Using default conservative rates.")
-        default_rates = [0.04, 0.07]
-        worst_annual = default_rates[0]
-        best_annual = default_rates[1]
-    else:
-        worst_annual = FUND_TYPE_RETURNS[fund_type][0]
-        best_annual = FUND_TYPE_RETURNS[fund_type][1]
-    
-    base_annual = (worst_annual + best_annual) / 2
-    return worst_annual, base_annual, best_annual
+def get_return_rates_for_fund_type(fund_type: str, version: int = None) -> tuple[float, float, float]:
+    """Returns (worst, base, best) annual return rates for a fund type from the return master (latest version if None)."""
+    return get_fund_returns(fund_type, version)
+
+def get_goal_return_master_version(goal: dict) -> int | None:
+    """The goal's pinned `return_master_version` (financial_goals.return_master_version), None if unpinned (NaN via pandas)."""
+    version = goal.get("return_master_version")
+    return None if version is None or pd.isna(version) else int(version)
+
+def get_goal_base_return_rates(goals: pd.DataFrame) -> np.ndarray:
+    """
+    Base-case annual return per goal from its fund_type, using the goal's pinned `return_master_version`
+    where present (latest otherwise). Each distinct (fund type, version) is looked up once.
+    """
+    versions = goals["return_master_version"] if "return_master_version" in goals else pd.Series(np.nan, index=goals.index)
+    keys = pd.MultiIndex.from_arrays([goals["fund_type"], versions.astype(float)])
+    codes, unique_keys = pd.factorize(keys)
+    base_rates = np.array([get_return_rates_for_fund_type(fund_type, None if np.isnan(version) else int(version))[1]
+                           for fund_type, version in unique_keys], dtype=float)
+    return base_rates[codes]
 
 def calculate_sip(
     target_amount: float,
@@ -65,13 +71,39 @@ def calculate_sip(
     monthly_sip = required_fv_from_sip / denominator_full
     return round(max(0, monthly_sip), 2)
 
-def get_sip_scenarios(target_amount: float, timeline_years: int, fund_type: str, current_corpus: float = 0.0) -> dict:
-    """Calculates SIP for worst, base, and best-case return scenarios."""
-    worst_r, base_r, best_r = get_return_rates_for_fund_type(fund_type)
+def calculate_sip_grid(target_amounts, timeline_years, annual_return_rates, current_corpus=0.0) -> np.ndarray:
+    """
+    Vectorized calculate_sip(): inputs are scalars or arrays that broadcast against each other
+    (e.g. targets[:, None] with rates[None, :] gives a target x rate table). Returns the SIP matrix
+    with the same values and edge cases as calculate_sip(): 0 for non-positive targets or timelines
+    and for already-funded goals; straight division (unrounded) at zero or negative rates.
+    """
+    target_amounts, timeline_years, annual_return_rates, current_corpus = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (target_amounts, timeline_years, annual_return_rates, current_corpus))
+    )
+    num_months = timeline_years * 12
+    is_zero = (target_amounts <= 0) | (num_months <= 0)
+    num_months = np.where(is_zero, 1, num_months)  # masked-out cells get a harmless timeline
+    has_return = annual_return_rates > 0
+    monthly_return_rate = annual_return_rates / 12 * has_return  # 0 where the zero-rate formula applies
+
+    growth = (1 + monthly_return_rate) ** num_months
+    required_fv = target_amounts - current_corpus * growth
+    # Annuity-due factor ((1+r)^n - 1) / r * (1+r); plain months at zero rate.
+    safe_rate = monthly_return_rate + ~has_return
+    annuity_factor = np.where(has_return, (growth - 1) / safe_rate * (1 + monthly_return_rate), num_months)
+    with np.errstate(divide="ignore"):  # rates too small to move (1+r)^n give inf, as in calculate_sip()
+        sip = required_fv / annuity_factor
+    sip = np.where(has_return, round_2dp(np.maximum(0, sip)), sip)
+
+    return np.where(is_zero | (required_fv <= 0), 0.0, sip)
+
+def get_sip_scenarios(target_amount: float, timeline_years: int, fund_type: str, current_corpus: float = 0.0,
+                      return_master_version: int = None) -> dict:
+    """Calculates SIP for worst, base, and best-case return scenarios (returns from the goal's pinned master version, latest if None)."""
+    worst_r, base_r, best_r = get_return_rates_for_fund_type(fund_type, return_master_version)
     
-    sip_worst = calculate_sip(target_amount, timeline_years, worst_r, current_corpus)
-    sip_base = calculate_sip(target_amount, timeline_years, base_r, current_corpus)
-    sip_best = calculate_sip(target_amount, timeline_years, best_r, current_corpus)
+    sip_worst, sip_base, sip_best = calculate_sip_grid(target_amount, timeline_years, [worst_r, base_r, best_r], current_corpus).tolist()
     
     return {
         "worst_case_annual_return": round(worst_r * 100, 2),
@@ -82,6 +114,14 @@ def get_sip_scenarios(target_amount: float, timeline_years: int, fund_type: str,
         "sip_best_case": sip_best
     }
 
+def get_sip_scenario_table(target_amount: float, timelines_years, fund_type: str, current_corpus: float = 0.0,
+                           return_master_version: int = None) -> pd.DataFrame:
+    """Timeline x scenario SIP table for one goal (rows: timelines, columns: worst/base/best case), returns as in get_sip_scenarios()."""
+    worst_r, base_r, best_r = get_return_rates_for_fund_type(fund_type, return_master_version)
+    timelines_years = np.asarray(timelines_years)
+    sip_matrix = calculate_sip_grid(target_amount, timelines_years[:, None], np.array([worst_r, base_r, best_r])[None, :], current_corpus)
+    return pd.DataFrame(sip_matrix, index=pd.Index(timelines_years, name="timeline_years"), columns=["sip_worst_case", "sip_base_case", "sip_best_case"])
+
 GOAL_PRIORITIES = {
     "Debt Reduction": 1,
     "Emergency Fund": 2,
@@ -93,47 +133,386 @@ GOAL_PRIORITIES = {
     "Other": 8
 }
 
+# Self-Education goals rank by the MFD's High/Medium/Low choice instead (Self-Education Goal Mechanism, Section 4),
+# on the GOAL_PRIORITIES scale: High with the Emergency Fund, Medium with Child Education (medium-term), Low with
+# Retirement (long-term). Ties are broken by GOAL_PRIORITIES, which puts Self-Education after each of them.
+# self_education_logic re-exports these.
+SELF_EDUCATION_PRIORITY_RANKS = {"High": 2, "Medium": 3, "Low": 5}
+DEFAULT_SELF_EDUCATION_PRIORITY = "Medium"
+
+def get_goal_type_priority(goal_type: str, priority_level: str = None) -> int:
+    """Default priority for a goal type; Self-Education uses SELF_EDUCATION_PRIORITY_RANKS for its priority_level."""
+    if goal_type == "Self-Education":
+        return SELF_EDUCATION_PRIORITY_RANKS.get(priority_level, SELF_EDUCATION_PRIORITY_RANKS[DEFAULT_SELF_EDUCATION_PRIORITY])
+    return GOAL_PRIORITIES.get(goal_type, 99)
+
 def prioritize_goals(goals: list) -> list:
-    """Sorts goals based on predefined priorities. goals is a list of dicts, each with a 'goal_type'."""
-    return sorted(goals, key=lambda g: GOAL_PRIORITIES.get(g.get("goal_type"), 99))
+    """Sorts goals based on predefined priorities. goals is a list of dicts, each with a 'goal_type' (and 'priority_level' for Self-Education)."""
+    return sorted(goals, key=lambda g: (get_goal_type_priority(g.get("goal_type"), g.get("priority_level")), GOAL_PRIORITIES.get(g.get("goal_type"), 99)))
+
+# --- Fund Suggestion Lookup ---
+# Decision table keyed by goal class x risk band x timeline bucket. Buckets are timelines of
+# <= 1, <= 3, <= 7 and > 7 years; risk profiles collapse to three bands.
+FUND_SUGGESTION_TIMELINE_BOUNDS = (1, 3, 7)
+FUND_SUGGESTION_RISK_BANDS = {"Very Low": "Low", "Low": "Low", "Moderate": "Moderate"}  # anything else is "High"
+RISK_BAND_INDEX = {"Low": 0, "Moderate": 1, "High": 2}
+FUND_SUGGESTION_MATRIX = {
+    "Debt Reduction": {band: ["Ultra Short/Low Duration"] * 4 for band in ("Low", "Moderate", "High")},
+    "Emergency Fund": {band: ["Liquid Fund"] + ["Ultra Short/Low Duration"] * 3 for band in ("Low", "Moderate", "High")},
+    "default": {
+        "Low": ["Ultra Short/Low Duration", "Value Fund", "Value Fund", "Balanced Advantage"],
+        "Moderate": ["Value Fund", "Balanced Advantage", "Balanced Advantage", "Multi Cap Fund"],
+        "High": ["Value Fund", "Value Fund", "Multi Cap Fund", "Contra Fund"]
+    }
+}
+
+# Scheme mix by time horizon (Master Document: Mutual Fund Investment Options Based on Goals).
+# Upper bounds in years: < 1 month, <= 1, <= 3, <= 5, <= 7, <= 10, > 10.
+GOAL_HORIZON_BOUNDS = (1 / 12, 1, 3, 5, 7, 10)
+GOAL_HORIZON_SCHEMES = [
+    {"Overnight Fund": 0.5, "Ultra Short Duration Fund": 0.5},
+    {"Ultra Short Duration Fund": 0.5, "Low Duration Fund": 0.5},
+    {"Low Duration Fund": 0.5, "Floater Fund": 0.5},
+    {"Hybrid Balanced Fund": 0.5, "Hybrid Equity Fund": 0.5},
+    {"Flexi Cap Fund": 0.5, "Multi Cap Fund": 0.5},
+    {"Multi Cap Fund": 0.5, "Mid Cap Fund": 0.5},
+    {"Multi Cap Fund": 0.4, "Mid Cap Fund": 0.4, "Small Cap Fund": 0.2}
+]
+
+def _build_fund_suggestion_lookup(matrix: dict):
+    """
+    Compiles FUND_SUGGESTION_MATRIX into (goal class index, fund code table, fund names):
+    fund codes are indexed by [goal class, risk band, timeline bucket].
+    """
+    goal_classes = list(matrix)
+    fund_names = sorted({fund for bands in matrix.values() for funds in bands.values() for fund in funds})
+    fund_codes = np.array([[[fund_names.index(fund) for fund in matrix[goal_class][band]] for band in RISK_BAND_INDEX] for goal_class in goal_classes])
+    return {goal_class: index for index, goal_class in enumerate(goal_classes)}, fund_codes, np.array(fund_names, dtype=object)
+
+FUND_SUGGESTION_LOOKUP = _build_fund_suggestion_lookup(FUND_SUGGESTION_MATRIX)
+GOAL_HORIZON_SCHEME_LOOKUP = np.empty(len(GOAL_HORIZON_SCHEMES), dtype=object)
+GOAL_HORIZON_SCHEME_LOOKUP[:] = GOAL_HORIZON_SCHEMES
+
+def suggest_fund_types_batch(goal_types, timeline_years, risk_profiles, return_master_version: int = None) -> pd.DataFrame:
+    """
+    Fund type and (worst, base, best) return assumptions (from `return_master_version`, latest if None) for arrays of goals in one lookup.
+    Inputs broadcast; returns a DataFrame with fund_type, return_worst, return_base, return_best
+    and scheme_allocation (the horizon's scheme mix from the goals master, e.g. {"Flexi Cap Fund": 0.5, ...}).
+    """
+    goal_types, timeline_years, risk_profiles = np.broadcast_arrays(
+        np.asarray(goal_types, dtype=object), np.asarray(timeline_years, dtype=float), np.asarray(risk_profiles, dtype=object)
+    )
+    goal_types, timeline_years, risk_profiles = goal_types.ravel(), timeline_years.ravel(), risk_profiles.ravel()
+    goal_class_index, fund_codes, fund_names = FUND_SUGGESTION_LOOKUP
+    return_table = np.array([get_return_rates_for_fund_type(fund_type, return_master_version) for fund_type in fund_names])
+    # Look up each distinct label once, then broadcast back through the factorized codes.
+    type_codes, unique_types = pd.factorize(goal_types, use_na_sentinel=False)
+    goal_classes = np.array([goal_class_index.get(goal_type, goal_class_index["default"]) for goal_type in unique_types], dtype=np.int64)[type_codes]
+    risk_codes, unique_risks = pd.factorize(risk_profiles, use_na_sentinel=False)
+    risk_bands = np.array([RISK_BAND_INDEX.get(FUND_SUGGESTION_RISK_BANDS.get(risk), RISK_BAND_INDEX["High"]) for risk in unique_risks], dtype=np.int64)[risk_codes]
+    buckets = np.searchsorted(FUND_SUGGESTION_TIMELINE_BOUNDS, timeline_years, side="left")
+    codes = fund_codes[goal_classes, risk_bands, buckets]
+    returns = return_table[codes]
+    horizons = np.searchsorted(GOAL_HORIZON_BOUNDS, timeline_years, side="left")
+    return pd.DataFrame({
+        "fund_type": fund_names[codes],
+        "return_worst": returns[:, 0],
+        "return_base": returns[:, 1],
+        "return_best": returns[:, 2],
+        "scheme_allocation": GOAL_HORIZON_SCHEME_LOOKUP[horizons]
+    })
 
 def suggest_fund_type_for_goal(goal_type: str, timeline_years: int, risk_profile: str) -> str:
     """
-    Suggests a fund type based on goal, timeline, and investor's risk profile.
-    """
-    if goal_type == "Debt Reduction":
-        return "Ultra Short/Low Duration"
-    if goal_type == "Emergency Fund":
-        if timeline_years <= 1: return "Liquid Fund"
-        return "Ultra Short/Low Duration"
-
-    if timeline_years <= 1:
-        if risk_profile in ["Very Low", "Low"]:
-            return "Ultra Short/Low Duration"
-        return "Value Fund"
-    elif timeline_years <= 3:
-        if risk_profile in ["Very Low", "Low"]:
-            return "Value Fund"
-        elif risk_profile == "Moderate":
-            return "Balanced Advantage"
-        else:
-            return "Value Fund"
-    elif timeline_years <= 7:
-        if risk_profile in ["Very Low", "Low"]:
-            return "Value Fund"
-        elif risk_profile == "Moderate":
-            return "Balanced Advantage"
-        else:
-            return "Multi Cap Fund"
-    else:
-        if risk_profile in ["Very Low", "Low"]:
-            return "Balanced Advantage"
-        elif risk_profile == "Moderate":
-            return "Multi Cap Fund"
-        else:
-            return "Contra Fund"
-
-    return "Balanced Advantage" 
+    Suggests a fund type based on goal, timeline, and investor's risk profile (see FUND_SUGGESTION_MATRIX).
+    """
+    goal_class_index, fund_codes, fund_names = FUND_SUGGESTION_LOOKUP
+    goal_class = goal_class_index.get(goal_type, goal_class_index["default"])
+    risk_band = RISK_BAND_INDEX.get(FUND_SUGGESTION_RISK_BANDS.get(risk_profile), RISK_BAND_INDEX["High"])
+    bucket = sum(timeline_years > bound for bound in FUND_SUGGESTION_TIMELINE_BOUNDS)
+    return fund_names[fund_codes[goal_class, risk_band, bucket]]
+
+# --- Savings-to-Goals Allocation ---
+DEFAULT_ALLOCATION_RISK_PROFILE = "Moderate"
+MAX_GOAL_EXTENSION_YEARS = 30
+
+def get_goal_priority(goal: dict) -> int:
+    """Priority of a goal: its own `priority` (financial_goals.priority) if set, else get_goal_type_priority().
+    A NULL priority read through pandas arrives as NaN and counts as unset."""
+    if goal.get("priority") is not None and pd.notna(goal["priority"]):
+        return int(goal["priority"])
+    return get_goal_type_priority(goal.get("goal_type"), goal.get("priority_level"))
+
+def get_goal_sort_key(goal: dict) -> tuple:
+    """Allocation order: priority, then GOAL_PRIORITIES by type among goals of equal priority."""
+    return (get_goal_priority(goal), GOAL_PRIORITIES.get(goal.get("goal_type"), 99))
+
+def calculate_years_to_reach_target(
+    target_amount: float,
+    monthly_sip: float,
+    annual_return_rate: float,
+    current_corpus: float = 0.0
+) -> float:
+    """
+    Inverts calculate_sip(): the (fractional) number of years a monthly SIP plus the current corpus
+    needs to reach the target. Returns 0.0 if already funded, inf if the SIP is zero.
+    """
+    if target_amount <= current_corpus:
+        return 0.0
+    if monthly_sip <= 0:
+        return float("inf")
+    if annual_return_rate <= 0:
+        return (target_amount - current_corpus) / monthly_sip / 12
+    monthly_return_rate = annual_return_rate / 12
+    sip_annuity_factor = monthly_sip * (1 + monthly_return_rate) / monthly_return_rate
+    num_months = math.log((target_amount + sip_annuity_factor) / (current_corpus + sip_annuity_factor)) / math.log(1 + monthly_return_rate)
+    return num_months / 12
+
+def allocate_savings_to_goals(
+    monthly_savings: float,
+    goals: list,
+    current_year: int = None,
+    risk_profile: str = DEFAULT_ALLOCATION_RISK_PROFILE
+) -> dict:
+    """
+    Splits the investor's monthly savings (final_monthly_savings_amount) across goals in priority order.
+    Each goal gets the largest SIP it can up to its base-case requirement; unfunded remainder is reported
+    as a shortfall along with the target year the allocated SIP can actually reach.
+    Goals are dicts with goal_type, target_amount, target_year and optionally goal_name, priority,
+    current_savings_for_goal, fund_type (suggested from goal type/timeline/risk profile if missing),
+    return_master_version (the pinned return master, latest if unset) and minimum_sip, a floor reserved before the priority pass (scaled down pro rata if savings cannot cover all floors).
+    Goals due this year or earlier are planned over one year.
+    """
+    current_year = current_year or date.today().year
+    plans = []
+    for goal in sorted(goals, key=get_goal_sort_key):
+        timeline_years = max(int(goal["target_year"]) - current_year, 1)
+        fund_type = goal.get("fund_type") or suggest_fund_type_for_goal(goal.get("goal_type"), timeline_years, risk_profile)
+        _, base_rate, _ = get_return_rates_for_fund_type(fund_type, get_goal_return_master_version(goal))
+        current_corpus = goal.get("current_savings_for_goal") or 0.0
+        required_sip = calculate_sip(goal["target_amount"], timeline_years, base_rate, current_corpus)
+        minimum_sip = goal.get("minimum_sip")
+        floor_sip = 0.0 if minimum_sip is None or pd.isna(minimum_sip) else min(minimum_sip, required_sip)
+        plans.append((goal, timeline_years, fund_type, base_rate, current_corpus, required_sip, floor_sip))
+
+    total_floor = sum(plan[-1] for plan in plans)
+    floor_scale = min(1.0, max(0.0, monthly_savings) / total_floor) if total_floor > 0 else 1.0
+    remaining_savings = max(0.0, max(0.0, monthly_savings) - total_floor * floor_scale)
+    allocations = []
+    for goal, timeline_years, fund_type, base_rate, current_corpus, required_sip, floor_sip in plans:
+        floor_sip *= floor_scale
+        allocated_sip = round(floor_sip + min(required_sip - floor_sip, remaining_savings), 2)
+        remaining_savings = max(0.0, remaining_savings - (allocated_sip - floor_sip))
+        shortfall_sip = round(required_sip - allocated_sip, 2)
+
+        projected_target_year = int(goal["target_year"])
+        if shortfall_sip > 0:
+            years_needed = calculate_years_to_reach_target(goal["target_amount"], allocated_sip, base_rate, current_corpus)
+            if years_needed > MAX_GOAL_EXTENSION_YEARS + timeline_years:
+                projected_target_year = None
+            else:
+                projected_target_year = current_year + math.ceil(years_needed)
+
+        allocations.append({
+            "goal_name": goal.get("goal_name", goal.get("goal_type")),
+            "goal_type": goal.get("goal_type"),
+            "priority": get_goal_priority(goal),
+            "fund_type": fund_type,
+            "required_sip": required_sip,
+            "allocated_sip": allocated_sip,
+            "shortfall_sip": shortfall_sip,
+            "funded_ratio": round(allocated_sip / required_sip, 4) if required_sip > 0 else 1.0,
+            "target_year": int(goal["target_year"]),
+            "projected_target_year": projected_target_year
+        })
+
+    return {
+        "monthly_savings": monthly_savings,
+        "total_required_sip": round(sum(a["required_sip"] for a in allocations), 2),
+        "total_allocated_sip": round(sum(a["allocated_sip"] for a in allocations), 2),
+        "unallocated_savings": round(remaining_savings, 2),
+        "allocations": allocations
+    }
+
+def allocate_savings_to_goals_batch(
+    goals: pd.DataFrame,
+    monthly_savings_by_investor,
+    current_year: int = None,
+    risk_profile: str = DEFAULT_ALLOCATION_RISK_PROFILE
+) -> pd.DataFrame:
+    """
+    Book-wide version of allocate_savings_to_goals() for nightly runs.
+    `goals` has the financial_goals columns (investor_id, goal_type, target_amount, target_year, and
+    optionally priority, current_savings_for_goal, fund_type, return_master_version, minimum_sip); `monthly_savings_by_investor` maps
+    investor_id to final_monthly_savings_amount (dict or Series).
+    Returns the goals sorted by investor and priority with required_sip, allocated_sip, shortfall_sip,
+    funded_ratio and projected_target_year (NaN when out of reach) columns added.
+    """
+    current_year = current_year or date.today().year
+    goals = goals.copy()
+    if "priority" not in goals:
+        goals["priority"] = np.nan
+    goals["_type_rank"] = goals["goal_type"].map(GOAL_PRIORITIES).fillna(99)
+    type_priority = goals["_type_rank"].copy()
+    is_self_education = goals["goal_type"] == "Self-Education"
+    if is_self_education.any():
+        priority_levels = goals.loc[is_self_education, "priority_level"] if "priority_level" in goals else pd.Series(np.nan, index=goals.index[is_self_education])
+        type_priority[is_self_education] = priority_levels.map(SELF_EDUCATION_PRIORITY_RANKS).fillna(SELF_EDUCATION_PRIORITY_RANKS[DEFAULT_SELF_EDUCATION_PRIORITY])
+    goals["priority"] = goals["priority"].fillna(type_priority)
+    goals = goals.sort_values(["investor_id", "priority", "_type_rank"], kind="stable").drop(columns="_type_rank").reset_index(drop=True)
+
+    timeline_years = np.maximum(goals["target_year"].to_numpy(dtype=float) - current_year, 1)
+    if "fund_type" not in goals:
+        goals["fund_type"] = suggest_fund_types_batch(goals["goal_type"].to_numpy(), timeline_years, risk_profile)["fund_type"].to_numpy()
+    annual_rate = get_goal_base_return_rates(goals)
+    target_amount = goals["target_amount"].to_numpy(dtype=float)
+    current_corpus = goals["current_savings_for_goal"].fillna(0).to_numpy(dtype=float) if "current_savings_for_goal" in goals else np.zeros(len(goals))
+
+    required_sip = calculate_sip_grid(target_amount, timeline_years, annual_rate, current_corpus)
+    capacity = np.maximum(goals["investor_id"].map(monthly_savings_by_investor).fillna(0).to_numpy(dtype=float), 0)
+    investor_keys = goals["investor_id"].to_numpy()
+    # Minimum SIPs are reserved first, scaled down pro rata where an investor's savings cannot cover them all.
+    floor_sip = np.minimum(goals["minimum_sip"].fillna(0).to_numpy(dtype=float), required_sip) if "minimum_sip" in goals else np.zeros(len(goals))
+    total_floor = pd.Series(floor_sip).groupby(investor_keys).transform("sum").to_numpy()
+    floor_sip = floor_sip * np.divide(capacity, total_floor, out=np.ones_like(total_floor), where=total_floor > capacity)
+    capacity = np.maximum(capacity - np.minimum(total_floor, capacity), 0)
+    # Strict priority within an investor: each goal gets what is left after all higher-priority requirements.
+    residual_sip = required_sip - floor_sip
+    required_before = pd.Series(residual_sip).groupby(investor_keys).cumsum().to_numpy() - residual_sip
+    allocated_sip = np.round(floor_sip + np.clip(capacity - required_before, 0, residual_sip), 2)
+    shortfall_sip = np.round(required_sip - allocated_sip, 2)
+
+    # Closed-form time to target with the allocated SIP (inverse of the SIP formula).
+    monthly_rate = annual_rate / 12
+    has_return = monthly_rate > 0
+    has_sip = allocated_sip > 0
+    safe_rate = np.where(has_return, monthly_rate, 1.0)
+    safe_sip = np.where(has_sip, allocated_sip, 1.0)
+    annuity = safe_sip * (1 + safe_rate) / safe_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months_with_return = np.log((target_amount + annuity) / (current_corpus + annuity)) / np.log1p(safe_rate)
+        months_without_return = (target_amount - current_corpus) / safe_sip
+    years_needed = np.where(has_return, months_with_return, months_without_return) / 12
+    years_needed = np.where(has_sip, years_needed, np.inf)
+    projected_target_year = np.where(shortfall_sip > 0, current_year + np.ceil(years_needed), goals["target_year"].to_numpy(dtype=float))
+    projected_target_year[(shortfall_sip > 0) & (years_needed > MAX_GOAL_EXTENSION_YEARS + timeline_years)] = np.nan
+
+    goals["required_sip"] = required_sip
+    goals["allocated_sip"] = allocated_sip
+    goals["shortfall_sip"] = shortfall_sip
+    goals["funded_ratio"] = np.round(np.divide(allocated_sip, required_sip, out=np.ones_like(required_sip), where=required_sip > 0), 4)
+    goals["projected_target_year"] = projected_target_year
+    return goals
+
+# --- Step-up SIP (annual escalation, Master for Annual Savings Adjustment Rates) ---
+MAX_STEP_UP_RATE = 1.0
+STEP_UP_SOLVER_ITERATIONS = 60
+
+def _step_up_accumulation_factor(timeline_years, annual_return_rates, step_up_rates):
+    """
+    Future value per rupee of starting monthly SIP when the SIP is raised by `step_up_rates` every 12 months.
+    A year of start-of-month SIPs grows to a * SIP by year end; year k's SIP is SIP * (1+g)^k and compounds
+    for N-1-k more years at R = (1+i)^12, giving the growing annuity a * (R^N - (1+g)^N) / (R - (1+g)).
+    """
+    monthly_return_rate = np.maximum(annual_return_rates, 0) / 12
+    has_return = monthly_return_rate > 0
+    safe_rate = monthly_return_rate + ~has_return
+    yearly_growth = (1 + monthly_return_rate) ** 12
+    year_factor = np.where(has_return, (yearly_growth - 1) / safe_rate * (1 + monthly_return_rate), 12.0)
+    step_up_growth = 1 + step_up_rates
+    growth_gap = yearly_growth - step_up_growth
+    is_level = np.abs(growth_gap) < 1e-12  # R == 1+g: every year's SIP ends up worth the same
+    safe_gap = np.where(is_level, 1.0, growth_gap)
+    growing_annuity = np.where(
+        is_level,
+        timeline_years * yearly_growth ** (timeline_years - 1),
+        (yearly_growth ** timeline_years - step_up_growth ** timeline_years) / safe_gap
+    )
+    return year_factor * growing_annuity
+
+def calculate_step_up_sip_grid(target_amounts, timeline_years, annual_return_rates, step_up_rates, current_corpus=0.0) -> np.ndarray:
+    """
+    Starting monthly SIP that reaches the target when raised by `step_up_rates` each year (closed form).
+    Broadcasts like calculate_sip_grid(); a 0% step-up returns exactly calculate_sip_grid().
+    """
+    target_amounts, timeline_years, annual_return_rates, step_up_rates, current_corpus = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (target_amounts, timeline_years, annual_return_rates, step_up_rates, current_corpus))
+    )
+    flat_sip = calculate_sip_grid(target_amounts, timeline_years, annual_return_rates, current_corpus)
+    yearly_growth = (1 + np.maximum(annual_return_rates, 0) / 12) ** 12
+    required_fv = target_amounts - current_corpus * yearly_growth ** timeline_years
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step_up_sip = round_2dp(np.maximum(0, required_fv / _step_up_accumulation_factor(timeline_years, annual_return_rates, step_up_rates)))
+    return np.where((step_up_rates == 0) | (flat_sip == 0), flat_sip, step_up_sip)
+
+def calculate_step_up_sip(target_amount: float, timeline_years: int, annual_return_rate: float, step_up_rate: float, current_corpus: float = 0.0) -> float:
+    """Starting monthly SIP for a goal with an annual SIP step-up (see calculate_step_up_sip_grid())."""
+    return calculate_step_up_sip_grid(target_amount, timeline_years, annual_return_rate, step_up_rate, current_corpus).item()
+
+def solve_step_up_rate_grid(target_amounts, timeline_years, annual_return_rates, starting_sips, current_corpus=0.0) -> np.ndarray:
+    """
+    Annual step-up needed for a given starting SIP to reach the target. No closed form exists, so all
+    cells are solved together by bisection on the (monotonic) growing-annuity factor.
+    Returns 0 where the flat SIP already suffices and NaN where even a MAX_STEP_UP_RATE step-up falls short.
+    """
+    target_amounts, timeline_years, annual_return_rates, starting_sips, current_corpus = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (target_amounts, timeline_years, annual_return_rates, starting_sips, current_corpus))
+    )
+    yearly_growth = (1 + np.maximum(annual_return_rates, 0) / 12) ** 12
+    required_fv = target_amounts - current_corpus * yearly_growth ** timeline_years
+
+    def shortfall(step_up_rates):
+        return required_fv - starting_sips * _step_up_accumulation_factor(timeline_years, annual_return_rates, step_up_rates)
+
+    low = np.zeros(required_fv.shape)
+    high = np.full(required_fv.shape, MAX_STEP_UP_RATE)
+    already_funded = shortfall(low) <= 0
+    infeasible = (shortfall(high) > 0) | (timeline_years <= 0)
+    for _ in range(STEP_UP_SOLVER_ITERATIONS):
+        middle = (low + high) / 2
+        still_short = shortfall(middle) > 0
+        low = np.where(still_short, middle, low)
+        high = np.where(still_short, high, middle)
+    step_up_rates = np.round(high, 6)
+    step_up_rates = np.where(infeasible, np.nan, step_up_rates)
+    return np.where(already_funded, 0.0, step_up_rates)
+
+def solve_step_up_rate(target_amount: float, timeline_years: int, annual_return_rate: float, starting_sip: float, current_corpus: float = 0.0) -> float | None:
+    """Annual step-up a starting SIP needs to reach the target; None if above MAX_STEP_UP_RATE."""
+    step_up_rate = solve_step_up_rate_grid(target_amount, timeline_years, annual_return_rate, starting_sip, current_corpus).item()
+    return None if np.isnan(step_up_rate) else step_up_rate
+
+def calculate_step_up_sips_batch(goals: pd.DataFrame, current_year: int = None, risk_profile: str = DEFAULT_ALLOCATION_RISK_PROFILE,
+                                 economic_condition: str = "Normal") -> pd.DataFrame:
+    """
+    Step-up SIPs for every goal of every investor.
+    The step-up comes from a `step_up_rate` column, else from the investor's `investor_profile_id` via
+    get_annual_savings_adjustment_rate() for `economic_condition` (the current regime snapshot's, see
+    economic_regime_logic.regime_economic_condition()). Fund types come from `fund_type` or are suggested; returns follow
+    each goal's pinned `return_master_version` if present.
+    If a `starting_sip` column is present, the step-up it needs is solved as `required_step_up_rate`.
+    Returns a copy of `goals` with flat_sip, step_up_rate and step_up_sip (plus required_step_up_rate).
+    """
+    current_year = current_year or date.today().year
+    goals = goals.copy()
+    timeline_years = np.maximum(goals["target_year"].to_numpy(dtype=float) - current_year, 1)
+    if "fund_type" not in goals:
+        goals["fund_type"] = suggest_fund_types_batch(goals["goal_type"].to_numpy(), timeline_years, risk_profile)["fund_type"].to_numpy()
+    if "step_up_rate" not in goals:
+        profile_rates = {profile_id: get_annual_savings_adjustment_rate(profile_id, economic_condition) for profile_id in goals["investor_profile_id"].unique()}
+        goals["step_up_rate"] = goals["investor_profile_id"].map(profile_rates)
+    annual_rate = get_goal_base_return_rates(goals)
+    target_amount = goals["target_amount"].to_numpy(dtype=float)
+    current_corpus = goals["current_savings_for_goal"].fillna(0).to_numpy(dtype=float) if "current_savings_for_goal" in goals else np.zeros(len(goals))
+    step_up_rate = goals["step_up_rate"].to_numpy(dtype=float)
+
+    goals["flat_sip"] = calculate_sip_grid(target_amount, timeline_years, annual_rate, current_corpus)
+    goals["step_up_sip"] = calculate_step_up_sip_grid(target_amount, timeline_years, annual_rate, step_up_rate, current_corpus)
+    if "starting_sip" in goals:
+        goals["required_step_up_rate"] = solve_step_up_rate_grid(
+            target_amount, timeline_years, annual_rate, goals["starting_sip"].to_numpy(dtype=float), current_corpus
+        )
+    return goals
 
 if __name__ == "__main__":
     print("--- Test Cases for Financial Goals Logic ---")
@@ -174,3 +553,93 @@ if __name__ == "__main__":
     print(f"Goal: Retirement, 20yrs, Low risk: {suggest_fund_type_for_goal('Retirement', 20, 'Low')}")
     print(f"Goal: Self-Education, 2yrs, Very High risk: {suggest_fund_type_for_goal('Self-Education', 2, 'Very High')}")
 
+    print("\n-- Savings-to-Goals Allocation Test --")
+    allocation_goals = [
+        {"goal_name": "Retirement Corpus", "goal_type": "Retirement", "target_amount": 10000000, "target_year": 2050},
+        {"goal_name": "Emergency Fund", "goal_type": "Emergency Fund", "target_amount": 150000, "target_year": 2026},
+        {"goal_name": "Child Education", "goal_type": "Child Education", "target_amount": 1500000, "target_year": 2038, "current_savings_for_goal": 100000},
+        {"goal_name": "Home Down Payment", "goal_type": "Home Purchase", "target_amount": 1200000, "target_year": 2031, "priority": float("nan")}
+    ]
+    allocation = allocate_savings_to_goals(20000, allocation_goals, current_year=2025)
+    print(f"Savings 20000, Required {allocation['total_required_sip']}, Allocated {allocation['total_allocated_sip']}, Unallocated {allocation['unallocated_savings']}")
+    for item in allocation["allocations"]:
+        print(f"  P{item['priority']} {item['goal_name']}: required {item['required_sip']}, allocated {item['allocated_sip']}, "
+              f"shortfall {item['shortfall_sip']}, target {item['target_year']} -> {item['projected_target_year']}")
+
+    rng = np.random.default_rng(7)
+    num_book_goals = 200000
+    book_goals = pd.DataFrame({
+        "investor_id": rng.integers(0, 50000, num_book_goals),
+        "goal_type": rng.choice(list(GOAL_PRIORITIES), num_book_goals),
+        "target_amount": rng.integers(50, 5000, num_book_goals) * 1000.0,
+        "target_year": rng.integers(2026, 2060, num_book_goals),
+        "current_savings_for_goal": rng.choice([0.0, 25000.0, 100000.0], num_book_goals)
+    })
+    book_savings = pd.Series(rng.integers(10, 200, 50000) * 500.0)
+    import time
+    start_time = time.perf_counter()
+    book_allocation = allocate_savings_to_goals_batch(book_goals, book_savings, current_year=2025)
+    print(f"Batch allocation of {num_book_goals} goals for 50000 investors in {time.perf_counter() - start_time:.3f}s; "
+          f"goals with shortfall: {(book_allocation['shortfall_sip'] > 0).sum()}")
+    single_investor = book_allocation[book_allocation["investor_id"] == book_allocation["investor_id"].iloc[0]]
+    scalar_check = allocate_savings_to_goals(book_savings[single_investor["investor_id"].iloc[0]], single_investor.drop(columns=["fund_type"]).to_dict("records"), current_year=2025)
+    print(f"Batch matches scalar for one investor: {[a['allocated_sip'] for a in scalar_check['allocations']] == single_investor['allocated_sip'].tolist()}")
+    funded_goals = pd.DataFrame([
+        {"investor_id": 1, "goal_type": "Home Purchase", "target_amount": 500000, "target_year": 2027, "current_savings_for_goal": 600000},
+        {"investor_id": 1, "goal_type": "Retirement", "target_amount": 10000000, "target_year": 2050, "current_savings_for_goal": 0.0},
+        {"investor_id": 1, "goal_type": "Child Education", "target_amount": 3000000, "target_year": 2030, "current_savings_for_goal": 0.0}
+    ])
+    funded_batch = allocate_savings_to_goals_batch(funded_goals, {1: 5000}, current_year=2025)
+    funded_scalar = allocate_savings_to_goals(5000, funded_goals.to_dict("records"), current_year=2025)
+    scalar_years = {a["goal_type"]: a["projected_target_year"] for a in funded_scalar["allocations"]}
+    batch_years = {row.goal_type: None if pd.isna(row.projected_target_year) else int(row.projected_target_year) for row in funded_batch.itertuples()}
+    pinned_goals = pd.DataFrame([{"investor_id": 1, "goal_type": "Home Purchase", "target_amount": 1200000, "target_year": 2031,
+                                  "fund_type": "Flexi Cap Fund", "return_master_version": version} for version in (1, 2)])
+    pinned_batch = allocate_savings_to_goals_batch(pinned_goals, {1: 50000}, current_year=2025)["required_sip"].tolist()
+    pinned_scalar = [allocate_savings_to_goals(50000, [goal], current_year=2025)["allocations"][0]["required_sip"] for goal in pinned_goals.to_dict("records")]
+    print(f"Scalar allocation honours pinned versions (v1, v2): {pinned_scalar} matches batch: {pinned_scalar == pinned_batch}")
+    print(f"Funded goal keeps its year, batch {batch_years} matches scalar: {batch_years == scalar_years}")
+
+    print("\n-- SIP Grid Tests --")
+    grid_targets = np.array([-1000, 0, 50000, 120000, 500000, 2500000, 10000000])
+    grid_years = np.array([0, 1, 3, 7, 15, 30])
+    grid_rates = np.array([-0.01, 0.0, 0.04, 0.0675, 0.09, 0.16])
+    grid_corpus = np.array([0, 60000, 1000000])
+    sip_grid = calculate_sip_grid(grid_targets[:, None, None, None], grid_years[None, :, None, None], grid_rates[None, None, :, None], grid_corpus[None, None, None, :])
+    grid_mismatches = sum(
+        1 for index in np.ndindex(sip_grid.shape)
+        if sip_grid[index] != calculate_sip(grid_targets[index[0]], grid_years[index[1]], grid_rates[index[2]], grid_corpus[index[3]])
+    )
+    print(f"Grid shape {sip_grid.shape}, mismatches vs calculate_sip: {grid_mismatches} (Expected 0)")
+    print(get_sip_scenario_table(500000, [3, 5, 7, 10], "Value Fund", 50000))
+
+    print("\n-- Step-up SIP Tests --")
+    print(f"Flat SIP 15L in 13 yrs at 12.5%: {calculate_sip(1500000, 13, 0.125)}")
+    print(f"Step-up 0% (Expected same): {calculate_step_up_sip(1500000, 13, 0.125, 0.0)}")
+    step_up_sip = calculate_step_up_sip(1500000, 13, 0.125, 0.07)
+    print(f"Step-up 7% starting SIP: {step_up_sip}")
+    print(f"Step-up needed for that starting SIP (Expected ~0.07): {solve_step_up_rate(1500000, 13, 0.125, step_up_sip)}")
+    print(f"Step-up needed starting at 10 (Expected None): {solve_step_up_rate(1500000, 13, 0.125, 10)}")
+    print(f"Step-up 5% at 0% return, 120k in 2 yrs (Expected 4878.05): {calculate_step_up_sip(120000, 2, 0.0, 0.05)}")
+
+    book_goals["investor_profile_id"] = rng.choice(["W1", "W5", "B8", "B12"], num_book_goals)
+    book_goals["starting_sip"] = rng.integers(1, 40, num_book_goals) * 500.0
+    start_time = time.perf_counter()
+    step_up_results = calculate_step_up_sips_batch(book_goals, current_year=2025)
+    print(f"Step-up SIPs and solved step-ups for {num_book_goals} goals in {time.perf_counter() - start_time:.3f}s; "
+          f"infeasible step-ups: {step_up_results['required_step_up_rate'].isna().sum()}")
+
+    print("\n-- Fund Suggestion Lookup Tests --")
+    print(f"Child Education, 5 yrs, Moderate: {suggest_fund_types_batch('Child Education', 5, 'Moderate').iloc[0].to_dict()}")
+    num_lookup_goals = 1000000
+    lookup_goal_types = rng.choice(list(GOAL_PRIORITIES), num_lookup_goals).astype(object)
+    lookup_years = rng.integers(0, 30, num_lookup_goals)
+    lookup_risk = rng.choice(["Very Low", "Low", "Moderate", "High", "Very High"], num_lookup_goals).astype(object)
+    start_time = time.perf_counter()
+    batch_funds = suggest_fund_types_batch(lookup_goal_types, lookup_years, lookup_risk)
+    batch_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    scalar_funds = [suggest_fund_type_for_goal(g, y, r) for g, y, r in zip(lookup_goal_types[:100000], lookup_years[:100000].tolist(), lookup_risk[:100000])]
+    scalar_seconds = (time.perf_counter() - start_time) * num_lookup_goals / 100000
+    print(f"{num_lookup_goals:,} goals: batch {batch_seconds:.2f}s vs scalar ~{scalar_seconds:.2f}s; "
+          f"mismatches: {(batch_funds['fund_type'].to_numpy()[:100000] != np.array(scalar_funds, dtype=object)).sum()} (Expected 0)")
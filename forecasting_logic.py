@@ -0,0 +1,253 @@
+# forecasting_logic.py
+
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from indicator_store_logic import load_indicator_frame
+
+# --- Damped-Trend Exponential Smoothing (ETS(A,Ad,N)) ---
+# Every series is fitted over the whole parameter grid at once and keeps the combination with the lowest
+# one-step-ahead squared error. beta = 0 is simple exponential smoothing (no trend).
+FORECAST_MODEL = "ets_damped_v1"  # stored with each fit; a new model version refits everything
+ALPHA_GRID = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+BETA_GRID = (0.0, 0.05, 0.1, 0.2, 0.3)
+PHI_GRID = (0.8, 0.9, 0.98)
+MIN_FORECAST_OBSERVATIONS = 4
+FORECAST_HORIZONS = {"annual": 5, "monthly": 12}  # periods ahead
+INTERVAL_Z = {80: 1.2816, 95: 1.96}
+
+def _build_parameter_grid():
+    alpha, beta, phi = np.meshgrid(ALPHA_GRID, BETA_GRID, PHI_GRID, indexing="ij")
+    return alpha.ravel(), beta.ravel(), phi.ravel()
+
+PARAMETER_GRID = _build_parameter_grid()
+
+def period_frequency(period: str) -> str:
+    """"annual" for "YYYY" periods, "monthly" for "YYYY-MM"."""
+    return "annual" if len(str(period)) == 4 else "monthly"
+
+def future_periods(last_period: str, horizon: int) -> list:
+    """The `horizon` period labels after `last_period`, in the same frequency."""
+    if period_frequency(last_period) == "annual":
+        return [str(int(last_period) + step) for step in range(1, horizon + 1)]
+    return list(pd.period_range(pd.Period(last_period, "M") + 1, periods=horizon, freq="M").strftime("%Y-%m"))
+
+def fit_damped_trend_batch(values) -> dict:
+    """
+    Fits ETS(A,Ad,N) to every row of `values` [series, time] (leading/trailing NaN allowed, e.g. shorter
+    series padded) for every grid combination in one vectorized pass over time. Returns arrays per series:
+    alpha, beta, phi, level, trend (final states), sigma (one-step error s.d.) and num_observations.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    alpha, beta, phi = (grid[None, :] for grid in PARAMETER_GRID)
+    num_series, num_grid = values.shape[0], alpha.shape[1]
+    level = np.zeros((num_series, num_grid))
+    trend = np.zeros((num_series, num_grid))
+    sse = np.zeros((num_series, num_grid))
+    started = np.zeros(num_series, dtype=bool)
+    num_errors = np.zeros(num_series, dtype=np.int64)
+
+    for observation in values.T:
+        observed = ~np.isnan(observation)
+        update = observed & started
+        first = observed & ~started
+        level[first] = observation[first, None]
+        started |= first
+        if update.any():
+            y = observation[update, None]
+            prediction = level[update] + phi * trend[update]
+            error = y - prediction
+            sse[update] += error ** 2
+            level[update] = prediction + alpha * error
+            trend[update] = phi * trend[update] + alpha * beta * error
+            num_errors[update] += 1
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(num_series)
+    return {
+        "alpha": alpha[0, best],
+        "beta": beta[0, best],
+        "phi": phi[0, best],
+        "level": level[rows, best],
+        "trend": trend[rows, best],
+        "sigma": np.sqrt(sse[rows, best] / np.maximum(num_errors - 1, 1)),
+        "num_observations": num_errors + started
+    }
+
+def forecast_from_fit(fit: dict, horizon: int) -> dict:
+    """
+    Point forecasts and prediction intervals [series, step] for steps 1..horizon:
+    y(h) = level + (phi + ... + phi^h) * trend; var(h) = sigma^2 * (1 + sum_{j<h} (alpha + alpha*beta*(phi + ... + phi^j))^2).
+    """
+    steps = np.arange(1, horizon + 1)
+    phi = fit["phi"][:, None]
+    damped_sums = np.cumsum(phi ** steps, axis=1)  # phi + ... + phi^h
+    forecast = fit["level"][:, None] + damped_sums * fit["trend"][:, None]
+    error_weights = (fit["alpha"][:, None] * (1 + fit["beta"][:, None] * damped_sums)) ** 2
+    variance_multiplier = 1 + np.concatenate([np.zeros((len(phi), 1)), np.cumsum(error_weights, axis=1)[:, :-1]], axis=1)
+    standard_error = fit["sigma"][:, None] * np.sqrt(variance_multiplier)
+    intervals = {level_pct: (forecast - z * standard_error, forecast + z * standard_error) for level_pct, z in INTERVAL_Z.items()}
+    return {"forecast": forecast, "standard_error": standard_error, "intervals": intervals}
+
+def forecast_history(history: pd.DataFrame, horizon: int) -> pd.DataFrame:
+    """
+    Batch forecast of every column of a wide history (index: period labels of one frequency, oldest first).
+    Columns with fewer than MIN_FORECAST_OBSERVATIONS observations are skipped. Returns one row per
+    (indicator, step): indicator, step, period, forecast, lower/upper_80, lower/upper_95 and the fit's
+    alpha, beta, phi, sigma, num_observations and last_period.
+    """
+    history = history.loc[:, history.notna().sum() >= MIN_FORECAST_OBSERVATIONS]
+    if history.empty:
+        return pd.DataFrame(columns=["indicator", "step", "period", "forecast", "lower_80", "upper_80", "lower_95", "upper_95",
+                                     "alpha", "beta", "phi", "sigma", "num_observations", "last_period"])
+    fit = fit_damped_trend_batch(history.to_numpy().T)
+    result = forecast_from_fit(fit, horizon)
+    last_periods = [str(history[column].last_valid_index()) for column in history.columns]
+    num_series = len(history.columns)
+    frame = pd.DataFrame({
+        "indicator": np.repeat(history.columns.to_numpy(), horizon),
+        "step": np.tile(np.arange(1, horizon + 1), num_series),
+        "period": [period for last_period in last_periods for period in future_periods(last_period, horizon)],
+        "forecast": result["forecast"].ravel()
+    })
+    for level_pct, (lower, upper) in result["intervals"].items():
+        frame[f"lower_{level_pct}"] = lower.ravel()
+        frame[f"upper_{level_pct}"] = upper.ravel()
+    for key in ("alpha", "beta", "phi", "sigma", "num_observations"):
+        frame[key] = np.repeat(fit[key], horizon)
+    frame["last_period"] = np.repeat(last_periods, horizon)
+    return frame
+
+# --- Cached Forecasts (Database Integration) ---
+def ensure_forecast_schema(conn: sqlite3.Connection):
+    """Creates the fitted-model and forecast tables (idempotent)."""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS forecast_models (
+        indicator TEXT NOT NULL,
+        frequency TEXT NOT NULL,
+        data_signature TEXT NOT NULL,
+        alpha REAL, beta REAL, phi REAL, sigma REAL,
+        num_observations INTEGER,
+        last_period TEXT,
+        fitted_at TEXT,
+        PRIMARY KEY (indicator, frequency)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS indicator_forecasts (
+        indicator TEXT NOT NULL,
+        frequency TEXT NOT NULL,
+        step INTEGER NOT NULL,
+        period TEXT NOT NULL,
+        forecast REAL, lower_80 REAL, upper_80 REAL, lower_95 REAL, upper_95 REAL,
+        PRIMARY KEY (indicator, frequency, step)
+    )''')
+    conn.commit()
+
+def get_data_signatures(conn: sqlite3.Connection) -> dict:
+    """
+    {(indicator, frequency): signature} of the stored observations: count, last period and latest fetch.
+    Any new or revised observation changes it, which is what triggers a refit.
+    """
+    c = conn.cursor()
+    c.execute("""SELECT indicator, CASE WHEN LENGTH(period) = 4 THEN 'annual' ELSE 'monthly' END AS frequency,
+                        COUNT(*), MAX(period), MAX(fetched_at)
+                 FROM indicator_observations GROUP BY indicator, frequency""")
+    return {(indicator, frequency): f"{FORECAST_MODEL}|{count}|{last_period}|{last_fetch}"
+            for indicator, frequency, count, last_period, last_fetch in c.fetchall()}
+
+def refresh_forecasts(conn: sqlite3.Connection, horizons: dict = FORECAST_HORIZONS) -> list:
+    """
+    Refits, in one batch per frequency, only the indicator series whose observations changed since their
+    last fit, and replaces their stored forecasts. Returns the refitted (indicator, frequency) keys.
+    """
+    c = conn.cursor()
+    c.execute("SELECT indicator, frequency, data_signature FROM forecast_models")
+    fitted = {(indicator, frequency): signature for indicator, frequency, signature in c.fetchall()}
+    stale = {key: signature for key, signature in get_data_signatures(conn).items() if fitted.get(key) != signature}
+    if not stale:
+        return []
+
+    history = load_indicator_frame(conn, sorted({indicator for indicator, _ in stale}))
+    is_annual = history.index.str.len() == 4
+    fitted_at = datetime.now().isoformat(timespec="seconds")
+    model_rows, forecast_rows = [], []
+    for frequency, frequency_history in (("annual", history[is_annual]), ("monthly", history[~is_annual])):
+        columns = [indicator for indicator in frequency_history.columns if (indicator, frequency) in stale]
+        forecasts = forecast_history(frequency_history[columns], horizons[frequency])
+        for indicator in columns:
+            fit = forecasts[forecasts["indicator"] == indicator]
+            first = fit.iloc[0] if not fit.empty else None
+            model_rows.append((indicator, frequency, stale[(indicator, frequency)],
+                               *(None if first is None else float(first[key]) for key in ("alpha", "beta", "phi", "sigma")),
+                               None if first is None else int(first["num_observations"]),
+                               None if first is None else first["last_period"], fitted_at))
+        forecast_rows.extend((row.indicator, frequency, int(row.step), row.period, row.forecast, row.lower_80, row.upper_80, row.lower_95, row.upper_95)
+                             for row in forecasts.itertuples(index=False))
+
+    c.executemany("DELETE FROM indicator_forecasts WHERE indicator = ? AND frequency = ?", list(stale))
+    c.executemany("INSERT OR REPLACE INTO forecast_models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", model_rows)
+    c.executemany("INSERT INTO indicator_forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", forecast_rows)
+    conn.commit()
+    return sorted(stale)
+
+def load_forecasts(conn: sqlite3.Connection, indicators=None, frequency: str = None, refresh: bool = True) -> pd.DataFrame:
+    """
+    Stored forecasts (indicator, frequency, step, period, forecast and 80%/95% bounds). With `refresh`, series
+    with new data are refitted first; otherwise this is a plain indexed read.
+    """
+    if refresh:
+        refresh_forecasts(conn)
+    query = "SELECT * FROM indicator_forecasts WHERE 1 = 1"
+    params = []
+    if indicators is not None:
+        indicators = list(indicators)
+        query += f" AND indicator IN ({', '.join('?' * len(indicators))})"
+        params.extend(indicators)
+    if frequency is not None:
+        query += " AND frequency = ?"
+        params.append(frequency)
+    return pd.read_sql_query(query + " ORDER BY indicator, frequency, step", conn, params=params)
+
+if __name__ == "__main__":
+    import time
+    from indicator_store_logic import ensure_indicator_store_schema, upsert_observations
+    from economic_data_logic import generate_mock_economic_scenarios, INDICATOR_NAMES
+
+    print("--- Test Cases for Batch Forecasting ---")
+    steps = np.arange(40, dtype=float)
+    toy = pd.DataFrame({"flat": 5.0 + 0 * steps, "trend": 2.0 + 0.5 * steps}, index=[str(1990 + i) for i in range(40)])
+    toy_forecast = forecast_history(toy, 3)
+    print(toy_forecast[["indicator", "period", "forecast", "lower_95", "upper_95", "alpha", "beta", "phi"]].round(3).to_string(index=False))
+
+    conn = sqlite3.connect(":memory:")
+    ensure_indicator_store_schema(conn)
+    ensure_forecast_schema(conn)
+    mock = generate_mock_economic_scenarios("2000-01-01", 25 * 12, 1)
+    periods = mock["data_month"].dt.strftime("%Y-%m")
+    upsert_observations(conn, [(name, period, float(value), "mospi", "2025-01-01T00:00:00")
+                               for name in INDICATOR_NAMES for period, value in zip(periods, mock[name])])
+    annual_cpi = mock.groupby(mock["data_month"].dt.year)["cpi_inflation"].mean()
+    upsert_observations(conn, [("cpi_inflation", str(year), float(value), "world_bank", "2025-01-01T00:00:00") for year, value in annual_cpi.items()])
+
+    start_time = time.perf_counter()
+    refitted = refresh_forecasts(conn)
+    print(f"\nFirst refresh: {len(refitted)} series fitted in {time.perf_counter() - start_time:.3f}s")
+    start_time = time.perf_counter()
+    print(f"Page load with unchanged data: {len(load_forecasts(conn))} forecast rows in {(time.perf_counter() - start_time) * 1000:.1f}ms, "
+          f"refitted {refresh_forecasts(conn)} (Expected [])")
+    upsert_observations(conn, [("cpi_inflation", "2025-01", 6.1, "mospi", "2025-02-01T00:00:00")])
+    print(f"After a new CPI print: refitted {refresh_forecasts(conn)}")
+    print(load_forecasts(conn, ["cpi_inflation"], "annual", refresh=False).round(2).to_string(index=False))
+
+    print("\n--- Interval Coverage on Simulated Scenarios ---")
+    scenarios = generate_mock_economic_scenarios("2000-01-01", 10 * 12 + 12, 500, seed=11)
+    paths = scenarios.pivot(index="scenario", columns="data_month", values="cpi_inflation").to_numpy()
+    start_time = time.perf_counter()
+    fit = fit_damped_trend_batch(paths[:, :-12])
+    result = forecast_from_fit(fit, 12)
+    lower, upper = result["intervals"][80]
+    coverage = np.mean((paths[:, -12:] >= lower) & (paths[:, -12:] <= upper))
+    print(f"500 series x 120 months fitted over {len(PARAMETER_GRID[0])} grid points in {time.perf_counter() - start_time:.2f}s; "
+          f"80% interval coverage over 12 months ahead: {coverage:.1%}")
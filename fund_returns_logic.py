@@ -0,0 +1,189 @@
+# fund_returns_logic.py
+
+import sqlite3
+from datetime import date
+from functools import lru_cache
+from types import MappingProxyType
+
+# --- Return Master Versions ---
+# Version 1: (worst, best) annual return ranges from Framework Part 1, Section 7; base is the midpoint.
+FRAMEWORK_FUND_RETURNS = {
+    "Ultra Short/Low Duration": [0.05, 0.065],
+    "Liquid Fund": [0.04, 0.06],
+    "Balanced Advantage": [0.06, 0.12],
+    "Value Fund": [0.07, 0.12],
+    "Dividend Yield Fund": [0.07, 0.12],
+    "Contra Fund": [0.09, 0.16],
+    "Multi Cap Fund": [0.09, 0.16],
+    "Aggressive Hybrid": [0.08, 0.14]
+}
+# Version 2 adds the fixed indicative returns (worst = base = best) from
+# "Master Document: Indicative Returns of Mutual Fund Schemes" (as of May 06, 2025).
+# "Multi Cap Fund" keeps its Section 7 range so existing plans project the same.
+INDICATIVE_SCHEME_RETURNS = {
+    "Overnight Fund": 0.045,
+    "Ultra Short Duration Fund": 0.055,
+    "Low Duration Fund": 0.06,
+    "Floater Fund": 0.065,
+    "Hybrid Balanced Fund": 0.08,
+    "Hybrid Equity Fund": 0.09,
+    "Flexi Cap Fund": 0.10,
+    "Multi Cap Fund": 0.12,
+    "Mid Cap Fund": 0.13,
+    "Small Cap Fund": 0.14
+}
+DEFAULT_RETURN_RANGE = (0.04, 0.07)  # conservative (worst, best) for unknown fund types
+PRE_VERSIONING_RETURN_MASTER_VERSION = 1  # the Section 7 table every goal projected with before goals were pinned
+
+def _range_returns(worst: float, best: float) -> tuple:
+    return (worst, (worst + best) / 2, best)
+
+def _seed_versions() -> dict:
+    framework = {fund_type: _range_returns(*returns) for fund_type, returns in FRAMEWORK_FUND_RETURNS.items()}
+    indicative = {fund_type: (rate, rate, rate) for fund_type, rate in INDICATIVE_SCHEME_RETURNS.items() if fund_type not in framework}
+    return {
+        1: ("Framework Part 1, Section 7", "2025-01-01", framework),
+        2: ("Indicative Returns of Mutual Fund Schemes", "2025-05-06", {**framework, **indicative})
+    }
+
+SEED_RETURN_MASTER_VERSIONS = _seed_versions()
+
+def _freeze(versions: dict) -> MappingProxyType:
+    """Read-only {version: {fund_type: (worst, base, best)}}."""
+    return MappingProxyType({version: MappingProxyType(dict(returns)) for version, returns in versions.items()})
+
+# Loaded once; replaced wholesale (never mutated) by load_fund_return_master().
+_return_master = _freeze({version: returns for version, (_, _, returns) in SEED_RETURN_MASTER_VERSIONS.items()})
+
+def get_latest_return_master_version() -> int:
+    return max(_return_master)
+
+def get_return_master() -> MappingProxyType:
+    """The loaded return master: read-only {version: {fund_type: (worst, base, best)}}."""
+    return _return_master
+
+@lru_cache(maxsize=None)
+def get_fund_returns(fund_type: str, version: int = None) -> tuple[float, float, float]:
+    """
+    (worst, base, best) annual returns for a fund type in a master version (latest if None), memoized.
+    Unknown fund types get DEFAULT_RETURN_RANGE, with one warning per (fund type, version).
+    """
+    version = get_latest_return_master_version() if version is None else int(version)
+    if version not in _return_master:
+        print(f"Warning: Return master version {version} not found. Using version {get_latest_return_master_version()}.")
+        version = get_latest_return_master_version()
+    returns = _return_master[version].get(fund_type)
+    if returns is None:
+        print(f"Warning: Fund type {fund_type} not found in return master version {version}. Using default conservative rates.")
+        return _range_returns(*DEFAULT_RETURN_RANGE)
+    return returns
+
+def diff_return_versions(old_version: int, new_version: int) -> set:
+    """Fund types whose assumptions differ between two versions; goals in other fund types need no recomputation."""
+    old_returns, new_returns = _return_master[old_version], _return_master[new_version]
+    return {fund_type for fund_type in set(old_returns) | set(new_returns) if old_returns.get(fund_type) != new_returns.get(fund_type)}
+
+# --- Database Integration ---
+def ensure_fund_return_schema(conn: sqlite3.Connection):
+    """
+    Creates the versioned fund_return_master table (seeded with SEED_RETURN_MASTER_VERSIONS when empty)
+    and financial_goals.return_master_version, which pins a goal's projections to one version (idempotent).
+    Goals left unpinned are pinned to PRE_VERSIONING_RETURN_MASTER_VERSION, the version they were planned
+    with, so publishing a new version never moves them.
+    """
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS fund_return_master (
+        version INTEGER NOT NULL,
+        fund_type TEXT NOT NULL,
+        worst_return REAL NOT NULL,
+        base_return REAL NOT NULL,
+        best_return REAL NOT NULL,
+        source TEXT,
+        effective_date TEXT,
+        PRIMARY KEY (version, fund_type)
+    )''')
+    c.execute("SELECT COUNT(*) FROM fund_return_master")
+    if c.fetchone()[0] == 0:
+        c.executemany("INSERT INTO fund_return_master VALUES (?, ?, ?, ?, ?, ?, ?)", [
+            (version, fund_type, *returns, source, effective_date)
+            for version, (source, effective_date, fund_returns) in SEED_RETURN_MASTER_VERSIONS.items()
+            for fund_type, returns in fund_returns.items()
+        ])
+    c.execute("PRAGMA table_info(financial_goals)")
+    if "return_master_version" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE financial_goals ADD COLUMN return_master_version INTEGER")
+    c.execute("UPDATE financial_goals SET return_master_version = ? WHERE return_master_version IS NULL", (PRE_VERSIONING_RETURN_MASTER_VERSION,))
+    if c.rowcount:
+        print(f"Pinned {c.rowcount} existing goals to return master version {PRE_VERSIONING_RETURN_MASTER_VERSION}.")
+    conn.commit()
+
+def load_fund_return_master(conn: sqlite3.Connection) -> int:
+    """Loads every version from fund_return_master into the read-only in-memory map and clears the memo. Returns the latest version."""
+    global _return_master
+    versions = {}
+    for version, fund_type, worst, base, best in conn.execute(
+            "SELECT version, fund_type, worst_return, base_return, best_return FROM fund_return_master"):
+        versions.setdefault(version, {})[fund_type] = (worst, base, best)
+    if versions:
+        _return_master = _freeze(versions)
+        get_fund_returns.cache_clear()
+    return get_latest_return_master_version()
+
+def publish_return_master_version(conn: sqlite3.Connection, fund_returns: dict, source: str, effective_date: str = None) -> int:
+    """
+    Adds a new master version ({fund_type: (worst, base, best)}) and reloads the in-memory map.
+    Existing versions are never modified, so goals pinned to them project exactly as before.
+    """
+    c = conn.cursor()
+    c.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM fund_return_master")
+    version = c.fetchone()[0]
+    c.executemany("INSERT INTO fund_return_master VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (version, fund_type, *returns, source, effective_date or date.today().isoformat()) for fund_type, returns in fund_returns.items()
+    ])
+    conn.commit()
+    load_fund_return_master(conn)
+    return version
+
+def pin_goal_return_versions(conn: sqlite3.Connection, investor_ids: list = None, version: int = None) -> int:
+    """Pins unpinned goals (of the given investors, or all) to a master version (latest if None). Returns the number pinned."""
+    version = version or get_latest_return_master_version()
+    c = conn.cursor()
+    if investor_ids is None:
+        c.execute("UPDATE financial_goals SET return_master_version = ? WHERE return_master_version IS NULL", (version,))
+    else:
+        c.executemany("UPDATE financial_goals SET return_master_version = ? WHERE return_master_version IS NULL AND investor_id = ?",
+                      [(version, investor_id) for investor_id in investor_ids])
+    conn.commit()
+    return c.rowcount
+
+if __name__ == "__main__":
+    print("--- Test Cases for Versioned Fund Return Master ---")
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE financial_goals (goal_id INTEGER PRIMARY KEY AUTOINCREMENT, investor_id TEXT, goal_type TEXT,
+                    target_amount REAL, target_year INTEGER)""")
+    conn.execute("INSERT INTO financial_goals (investor_id, goal_type, target_amount, target_year) VALUES ('INV-0', 'Home Purchase', 1200000, 2031)")
+    ensure_fund_return_schema(conn)
+    ensure_fund_return_schema(conn)
+    print(f"Loaded versions up to {load_fund_return_master(conn)}: {[(v, len(r)) for v, r in get_return_master().items()]}")
+    print(f"Value Fund (latest): {get_fund_returns('Value Fund')} (Expected (0.07, 0.095, 0.12))")
+    print(f"Flexi Cap Fund v2: {get_fund_returns('Flexi Cap Fund', 2)}; v1 falls back: {get_fund_returns('Flexi Cap Fund', 1)}")
+    print(f"Repeated miss warns once: {get_fund_returns('Flexi Cap Fund', 1)}")
+    try:
+        get_return_master()[2]["Value Fund"] = (0, 0, 0)
+    except TypeError as e:
+        print(f"In-memory master is read-only: {e}")
+
+    conn.executemany("INSERT INTO financial_goals (investor_id, goal_type, target_amount, target_year) VALUES (?, ?, ?, ?)",
+                     [("INV-1", "Retirement", 5000000, 2050), ("INV-2", "Child Education", 1500000, 2035)])
+    print(f"Goals pinned to v{get_latest_return_master_version()}: {pin_goal_return_versions(conn)}")
+    revised = {**get_return_master()[2], "Multi Cap Fund": (0.08, 0.115, 0.15)}
+    new_version = publish_return_master_version(conn, revised, "Annual review")
+    print(f"Published v{new_version}; changed fund types vs v2: {diff_return_versions(2, new_version)}")
+    print(f"Pinned goals keep v1 (existing) and v2: {conn.execute('SELECT DISTINCT return_master_version FROM financial_goals ORDER BY 1').fetchall()}")
+    print(f"Multi Cap v2 vs v{new_version}: {get_fund_returns('Multi Cap Fund', 2)} vs {get_fund_returns('Multi Cap Fund', new_version)}")
+
+    import time
+    start_time = time.perf_counter()
+    for _ in range(1000000):
+        get_fund_returns("Value Fund", 2)
+    print(f"1,000,000 memoized lookups in {time.perf_counter() - start_time:.2f}s")
@@ -0,0 +1,298 @@
+# goal_generation_logic.py
+
+import math
+import sqlite3
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from goal_inflation_logic import load_cpi_series, build_cpi_path, calculate_inflation_factors, TARGET_ROUNDING
+from home_loan_logic import calculate_home_loan_plan_grid, format_home_loan_message
+from retirement_logic import calculate_retirement_corpus_present_value, DEFAULT_RETIREMENT_AGE
+from fund_returns_logic import get_latest_return_master_version
+from emergency_fund_logic import calculate_emergency_fund_batch, derive_essential_monthly_expenses
+from savings_logic import calculate_savings_details_batch
+from dependents_logic import build_dependent_goal_rows, stage_investor_ids, AUTO_GOAL_COLUMNS, INSERT_AUTO_GOAL_SQL
+
+# --- Goal Templates by Life-Cycle Stage ---
+DEFAULT_GOALS_BY_PROFILE_TYPE = {
+    "Young Adult": [
+        {"name": "Emergency Fund Creation", "type": "Emergency Fund", "priority": 1},
+        {"name": "Debt Reduction (if any)", "type": "Debt Reduction", "priority": 2},
+        {"name": "Short-term Savings (e.g., Skill Upgradation)", "type": "Short-Term Savings", "priority": 3, "target_years": 2},
+        {"name": "Retirement Planning (Start Early)", "type": "Retirement", "priority": 4}
+    ],
+    "Young Family": [
+        {"name": "Emergency Fund (Maintain/Increase)", "type": "Emergency Fund", "priority": 1},
+        {"name": "Children's Education Fund", "type": "Education", "priority": 2, "child_ref": "oldest"},
+        {"name": "Home Purchase (Down Payment)", "type": "Home Purchase", "priority": 3, "target_years": 5},
+        {"name": "Retirement Planning", "type": "Retirement", "priority": 4}
+    ],
+    "Mid-Career Family": [
+        {"name": "Emergency Fund (Maintain)", "type": "Emergency Fund", "priority": 1},
+        {"name": "Children's Higher Education", "type": "Education", "priority": 2, "child_ref": "all"},
+        {"name": "Children's Marriage (Optional)", "type": "Marriage", "priority": 3},
+        {"name": "Retirement Corpus Building", "type": "Retirement", "priority": 4, "target_age": 60},
+        {"name": "Wealth Creation", "type": "Wealth Creation", "priority": 5}
+    ],
+}
+DEPENDENT_TEMPLATE_TYPES = ("Education", "Marriage")  # created per dependent by dependents_logic instead
+DEFAULT_TARGET_YEARS = 10
+DEFAULT_MONTHLY_EXPENSES = 20000
+RETIREMENT_FALLBACK_YEARS = 20  # when the retirement age has already passed
+CPI_PATH_HORIZON_YEARS = 60
+AUTO_GOAL_NOTE = "Automatically generated based on investor profile."
+
+# Columns build_template_goals() needs for each investor.
+GOAL_GENERATION_INPUT_COLUMNS = (
+    "investor_id", "age", "birth_year", "life_cycle_stage", "income_level", "occupation", "investor_profile_id",
+    "num_dependents", "individual_income", "loan_emis", "owns_home", "rent_amount", "monthly_household_expenses"
+)
+# Optional columns, used for the savings behind the emergency fund's essential expenses when present.
+GOAL_GENERATION_OPTIONAL_COLUMNS = ("spouse_income", "urban_rural_status", "dependent_ages")
+
+# --- Database Integration ---
+def ensure_goal_generation_schema(conn: sqlite3.Connection):
+    """Adds financial_goals.is_mfd_edited (idempotent). Auto-generated goals an MFD has edited are never regenerated."""
+    c = conn.cursor()
+    c.execute("PRAGMA table_info(financial_goals)")
+    if "is_mfd_edited" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE financial_goals ADD COLUMN is_mfd_edited BOOLEAN DEFAULT FALSE")
+    conn.commit()
+
+def mark_goals_mfd_edited(conn: sqlite3.Connection, goal_ids: list):
+    """Flags goals as edited by the MFD so regenerate_auto_generated_goals() keeps them."""
+    c = conn.cursor()
+    c.executemany("UPDATE financial_goals SET is_mfd_edited = 1 WHERE goal_id = ?", [(goal_id,) for goal_id in goal_ids])
+    conn.commit()
+
+# --- Template Goals ---
+def estimate_essential_monthly_expenses(investors: pd.DataFrame, monthly_emis: np.ndarray, monthly_rents: np.ndarray) -> np.ndarray:
+    """
+    Essential monthly expenses per investor row: household income less the framework's calculated savings
+    (emergency_fund_logic.derive_essential_monthly_expenses()), with GOAL_GENERATION_OPTIONAL_COLUMNS where present.
+    """
+    occupations = investors["occupation"].fillna("Other").astype(str)
+    savings_inputs = {
+        "individual_monthly_income": investors["individual_income"].fillna(0.0).to_numpy(dtype=float),
+        "occupation": np.where(occupations.str.contains("White-Collar", regex=False), "White-Collar", "Blue-Collar"),
+        "monthly_emi": monthly_emis,
+        "monthly_rent": monthly_rents,
+        "home_ownership": investors["owns_home"].fillna(False).to_numpy(dtype=bool)
+    }
+    if "spouse_income" in investors:
+        savings_inputs["spouse_monthly_income"] = investors["spouse_income"].fillna(0.0).to_numpy(dtype=float)
+    if "urban_rural_status" in investors:
+        savings_inputs["urban_rural_status"] = investors["urban_rural_status"].to_numpy(dtype=object)
+    dependent_index, dependent_ages = None, None
+    if "dependent_ages" in investors:
+        ages_per_investor = [ages if isinstance(ages, (list, tuple, np.ndarray)) else [] for ages in investors["dependent_ages"]]
+        dependent_index = np.repeat(np.arange(len(ages_per_investor)), [len(ages) for ages in ages_per_investor])
+        dependent_ages = np.array([age for ages in ages_per_investor for age in ages], dtype=float)
+    return derive_essential_monthly_expenses(calculate_savings_details_batch(savings_inputs, dependent_index, dependent_ages))
+
+def build_template_goals(
+    investors: pd.DataFrame,
+    cpi_path: pd.Series,
+    current_year: int = None,
+    templates: dict = DEFAULT_GOALS_BY_PROFILE_TYPE
+) -> pd.DataFrame:
+    """
+    Goals from the life-cycle templates for every investor at once (columns: GOAL_GENERATION_INPUT_COLUMNS).
+    Emergency Fund: the profile's requirement from emergency_fund_logic on estimate_essential_monthly_expenses(), due next year. Retirement: corpus in today's rupees for the target age
+    (default 60). Home Purchase (non-homeowners): down payment at the borrowing year, if feasible.
+    Education/Marriage templates are skipped (see build_dependent_goal_rows()); goals without an amount rule are dropped.
+    Amounts in today's rupees are CPI-indexed to the target year. Returns rows in AUTO_GOAL_COLUMNS order.
+    """
+    current_year = current_year or date.today().year
+    template_rows = pd.DataFrame([
+        {**template, "life_cycle_stage": stage}
+        for stage, stage_templates in templates.items() for template in stage_templates
+        if template["type"] not in DEPENDENT_TEMPLATE_TYPES
+    ])
+    if template_rows.empty or investors.empty:
+        return pd.DataFrame(columns=AUTO_GOAL_COLUMNS)
+    for optional_column in ("target_years", "target_age"):
+        if optional_column not in template_rows:
+            template_rows[optional_column] = np.nan
+    goals = investors.merge(template_rows, on="life_cycle_stage").reset_index(drop=True)
+
+    goal_types = goals["type"].to_numpy(dtype=object)
+    ages = goals["age"].to_numpy(dtype=float)
+    expenses = goals["monthly_household_expenses"].fillna(DEFAULT_MONTHLY_EXPENSES).to_numpy(dtype=float)
+    target_years = current_year + goals["target_years"].fillna(DEFAULT_TARGET_YEARS).to_numpy(dtype=np.int64)
+    target_amounts = np.zeros(len(goals))
+    index_to_cpi = np.ones(len(goals), dtype=bool)
+    notes = np.full(len(goals), AUTO_GOAL_NOTE, dtype=object)
+
+    is_emergency = goal_types == "Emergency Fund"
+    if is_emergency.any():
+        emergency_goals = goals[is_emergency]
+        monthly_emis = emergency_goals["loan_emis"].fillna(0.0).to_numpy(dtype=float)
+        monthly_rents = np.where(emergency_goals["owns_home"].fillna(False).to_numpy(dtype=bool), 0.0,
+                                 emergency_goals["rent_amount"].fillna(0.0).to_numpy(dtype=float))
+        target_amounts[is_emergency] = calculate_emergency_fund_batch(
+            emergency_goals["investor_profile_id"].to_numpy(dtype=object), estimate_essential_monthly_expenses(emergency_goals, monthly_emis, monthly_rents),
+            monthly_emis, monthly_rents, emergency_goals["num_dependents"].fillna(0).to_numpy(dtype=float)
+        )["required_emergency_fund"]
+    target_years[is_emergency] = current_year + 1
+
+    is_retirement = goal_types == "Retirement"
+    retirement_ages = goals["target_age"].fillna(DEFAULT_RETIREMENT_AGE).to_numpy(dtype=float)
+    target_amounts[is_retirement] = np.round(calculate_retirement_corpus_present_value(expenses[is_retirement], retirement_ages[is_retirement]), -3)
+    retirement_years = goals["birth_year"].to_numpy(dtype=np.int64) + retirement_ages.astype(np.int64)
+    target_years[is_retirement] = np.where(retirement_years <= current_year, current_year + RETIREMENT_FALLBACK_YEARS, retirement_years)[is_retirement]
+
+    is_home = (goal_types == "Home Purchase") & ~goals["owns_home"].fillna(False).to_numpy(dtype=bool)
+    if is_home.any():
+        home_goals = goals[is_home]
+        incomes = home_goals["individual_income"].fillna(0.0).to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loan_to_income = np.where(incomes > 0, home_goals["loan_emis"].fillna(0.0).to_numpy(dtype=float) / incomes, 0.0)
+        occupation_types = np.where(home_goals["occupation"].fillna("").str.contains("White-Collar"), "White-Collar", "Blue-Collar")
+        plan = calculate_home_loan_plan_grid(incomes, ages[is_home], occupation_types, home_goals["income_level"].to_numpy(dtype=object),
+                                             home_goals["life_cycle_stage"].to_numpy(dtype=object), loan_to_income)
+        feasible = plan["is_feasible"]
+        home_index = np.flatnonzero(is_home)
+        target_amounts[home_index[feasible]] = np.round(plan["down_payment"][feasible], -3)
+        target_years[home_index[feasible]] = current_year + np.maximum(1, np.ceil(plan["timeline_years"][feasible])).astype(np.int64)
+        index_to_cpi[home_index] = False  # the down payment is already projected to the borrowing year
+        for row, plan_index in zip(home_index[feasible], np.flatnonzero(feasible)):
+            notes[row] = f"{AUTO_GOAL_NOTE} {format_home_loan_message({key: values[plan_index] for key, values in plan.items()})}"
+
+    keep = target_amounts > 0
+    goals, target_amounts, target_years, index_to_cpi, notes = goals[keep], target_amounts[keep], target_years[keep], index_to_cpi[keep], notes[keep]
+    factors = calculate_inflation_factors(np.full(len(goals), current_year), target_years, cpi_path)
+    indexed_amounts = np.round(target_amounts * factors / TARGET_ROUNDING) * TARGET_ROUNDING
+    return pd.DataFrame({
+        "investor_id": goals["investor_id"].to_numpy(),
+        "goal_name": goals["name"].to_numpy(),
+        "goal_type": goals["type"].to_numpy(),
+        "target_amount": np.where(index_to_cpi, indexed_amounts, target_amounts),
+        "target_year": target_years,
+        "priority": goals["priority"].to_numpy(),
+        "notes": notes,
+        "creation_date": date.today().isoformat(),
+        "is_auto_generated": True,
+        "present_value_amount": np.where(index_to_cpi, target_amounts, np.nan),
+        "present_value_year": np.where(index_to_cpi, current_year, np.nan),
+        "dependent_id": np.nan
+    }, columns=AUTO_GOAL_COLUMNS)
+
+def regenerate_auto_generated_goals(
+    conn: sqlite3.Connection,
+    investors: pd.DataFrame,
+    current_year: int = None,
+    templates: dict = DEFAULT_GOALS_BY_PROFILE_TYPE
+) -> dict:
+    """
+    Replaces the auto-generated goals of every investor in `investors` in one transaction: deletes them,
+    then inserts the template goals (build_template_goals()) and per-dependent goals (build_dependent_goal_rows())
+    with a single executemany, pinned to the latest return master version. Goals flagged is_mfd_edited are kept, and no generated goal of the same type
+    (or, for dependent goals, the same dependent and type) is added next to them.
+    Returns {"investors", "goals_deleted", "goals_created", "goals_kept", "seconds", "goals_per_second"}.
+    """
+    start_time = time.perf_counter()
+    current_year = current_year or date.today().year
+    investor_ids = investors["investor_id"].tolist()
+    cpi_path = build_cpi_path(load_cpi_series(conn), current_year + CPI_PATH_HORIZON_YEARS)
+    template_goals = build_template_goals(investors, cpi_path, current_year, templates)
+
+    c = conn.cursor()
+    try:
+        selected_investors = stage_investor_ids(conn, investor_ids)
+        c.execute(f"""SELECT investor_id, goal_type, dependent_id FROM financial_goals
+                      WHERE is_mfd_edited = 1 AND investor_id IN ({selected_investors})""")
+        kept_goals = c.fetchall()
+        kept_template_types = {(investor_id, goal_type) for investor_id, goal_type, dependent_id in kept_goals if dependent_id is None}
+        is_kept = np.array([key in kept_template_types for key in zip(template_goals["investor_id"], template_goals["goal_type"])], dtype=bool)
+        template_goals = template_goals[~is_kept]
+
+        c.execute(f"""DELETE FROM financial_goals
+                      WHERE is_auto_generated = 1 AND COALESCE(is_mfd_edited, 0) = 0 AND investor_id IN ({selected_investors})""")
+        goals_deleted = c.rowcount
+        template_goals = template_goals.astype(object).where(template_goals.notna(), None)
+        rows = list(template_goals.itertuples(index=False, name=None)) + build_dependent_goal_rows(conn, investor_ids, current_year)
+        c.executemany(INSERT_AUTO_GOAL_SQL, rows)
+        # New goals project with the current return master until their plan is re-locked.
+        c.execute(f"""UPDATE financial_goals SET return_master_version = ?
+                      WHERE return_master_version IS NULL AND investor_id IN ({selected_investors})""", (get_latest_return_master_version(),))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "investors": len(investor_ids),
+        "goals_deleted": goals_deleted,
+        "goals_created": len(rows),
+        "goals_kept": len(kept_goals),
+        "seconds": elapsed,
+        "goals_per_second": len(rows) / elapsed if elapsed > 0 else math.inf
+    }
+
+if __name__ == "__main__":
+    print("--- Test Cases for Batch Goal Generation ---")
+    from goal_inflation_logic import ensure_goal_inflation_schema
+    from dependents_logic import ensure_dependents_schema, save_investor_dependents
+    from fund_returns_logic import ensure_fund_return_schema
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE investors (investor_id TEXT PRIMARY KEY, occupation TEXT, urban_rural_status TEXT, dependents TEXT)")
+    conn.execute("""CREATE TABLE financial_goals (goal_id INTEGER PRIMARY KEY AUTOINCREMENT, investor_id TEXT, goal_name TEXT, goal_type TEXT,
+                    target_amount REAL, target_year INTEGER, current_savings_for_goal REAL DEFAULT 0, priority INTEGER, notes TEXT,
+                    creation_date TEXT, is_auto_generated BOOLEAN DEFAULT FALSE)""")
+    conn.execute("CREATE TABLE economic_indicators (date TEXT PRIMARY KEY, data TEXT, is_fallback BOOLEAN DEFAULT FALSE)")
+    ensure_goal_inflation_schema(conn)
+    ensure_dependents_schema(conn)
+    ensure_goal_generation_schema(conn)
+    ensure_fund_return_schema(conn)
+
+    rng = np.random.default_rng(37)
+    num_investors = 20000
+    current_year = date.today().year
+    ages = rng.integers(22, 60, num_investors)
+    occupations = rng.choice(["Salaried (White-Collar - Private Sector)", "Salaried (Blue-Collar - Skilled)"], num_investors)
+    investors = pd.DataFrame({
+        "investor_id": [f"INV-{i:05d}" for i in range(num_investors)],
+        "age": ages,
+        "birth_year": current_year - ages,
+        "life_cycle_stage": np.select([ages <= 27, ages <= 35, ages <= 50], ["Young Adult", "Young Family", "Mid-Career Family"], "Pre-Retirement"),
+        "income_level": rng.choice(["Low", "Sufficient", "Good"], num_investors),
+        "occupation": occupations,
+        "investor_profile_id": np.char.add(np.where(np.char.find(occupations.astype(str), "White-Collar") >= 0, "W", "B"),
+                                           rng.integers(1, 16, num_investors).astype(str)),
+        "num_dependents": rng.integers(0, 4, num_investors),
+        "individual_income": rng.integers(15, 200, num_investors) * 1000.0,
+        "loan_emis": rng.choice([0.0, 5000.0, 15000.0], num_investors),
+        "owns_home": rng.random(num_investors) < 0.4,
+        "rent_amount": rng.choice([0.0, 8000.0], num_investors),
+        "monthly_household_expenses": rng.integers(10, 80, num_investors) * 1000.0,
+        "spouse_income": rng.choice([0.0, 20000.0], num_investors),
+        "urban_rural_status": rng.choice(["Urban", "Rural"], num_investors)
+    })
+    conn.executemany("INSERT INTO investors (investor_id, occupation, urban_rural_status) VALUES (?, ?, ?)",
+                     zip(investors["investor_id"], occupations, investors["urban_rural_status"]))
+    dependents_by_investor = [[{"age": int(rng.integers(0, 20)), "gender": rng.choice(["Male", "Female"])} for _ in range(rng.integers(0, 3))]
+                              for _ in range(num_investors)]
+    investors["dependent_ages"] = [[dependent["age"] for dependent in dependents] for dependents in dependents_by_investor]
+    for investor_id, dependents in zip(investors["investor_id"], dependents_by_investor):
+        save_investor_dependents(conn, investor_id, dependents)
+
+    first_run = regenerate_auto_generated_goals(conn, investors, current_year)
+    print(f"First generation: {first_run['goals_created']} goals for {first_run['investors']} investors in {first_run['seconds']:.2f}s "
+          f"({first_run['goals_per_second']:,.0f} goals/s)")
+    print(conn.execute("SELECT goal_type, COUNT(*), ROUND(AVG(target_amount)) FROM financial_goals GROUP BY goal_type ORDER BY goal_type").fetchall())
+
+    edited_ids = [row[0] for row in conn.execute("SELECT goal_id FROM financial_goals WHERE investor_id = 'INV-00000' OR goal_type = 'Child Marriage' LIMIT 50")]
+    conn.executemany("UPDATE financial_goals SET target_amount = 999999 WHERE goal_id = ?", [(goal_id,) for goal_id in edited_ids])
+    mark_goals_mfd_edited(conn, edited_ids)
+    total_before = conn.execute("SELECT COUNT(*) FROM financial_goals").fetchone()[0]
+    second_run = regenerate_auto_generated_goals(conn, investors, current_year)
+    print(f"\nRegeneration: deleted {second_run['goals_deleted']}, created {second_run['goals_created']}, kept {second_run['goals_kept']} MFD-edited "
+          f"in {second_run['seconds']:.2f}s ({second_run['goals_per_second']:,.0f} goals/s)")
+    print(f"Goal count unchanged: {conn.execute('SELECT COUNT(*) FROM financial_goals').fetchone()[0] == total_before}")
+    print(f"Edited goals untouched: {conn.execute('SELECT COUNT(*) FROM financial_goals WHERE target_amount = 999999').fetchone()[0] == len(edited_ids)}")
@@ -0,0 +1,180 @@
+# goal_inflation_logic.py
+
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from indicator_store_logic import ensure_indicator_store_schema, load_indicator_series, record_snapshot_observations
+from forecasting_logic import ensure_forecast_schema, load_forecasts
+
+# --- Inflation Assumptions ---
+DEFAULT_CPI_INFLATION = 5.0  # % p.a., same as DEFAULT_ECONOMIC_DATA in app.py
+CPI_PATH_METHODS = ("latest", "trailing_average", "forecast", "model_forecast")
+DEFAULT_CPI_PATH_METHOD = "latest"
+DEFAULT_TRAILING_YEARS = 3
+FORECAST_TREND_DAMPING = 0.8  # each forecast year keeps 80% of the previous year's trend
+FORECAST_CPI_BOUNDS = (2.0, 10.0)
+TARGET_ROUNDING = 1000  # targets are stored to the nearest ₹1,000 so small CPI revisions don't churn goals
+
+# --- CPI Series ---
+def load_cpi_series(conn: sqlite3.Connection) -> pd.Series:
+    """
+    Annual CPI inflation (%) by year from the indicator store (see indicator_store_logic).
+    When several sources report the same year, the source with the higher SOURCE_PRIORITY wins (see
+    indicator_store_logic); among equal priorities, the most recently fetched value.
+    """
+    cpi_series = load_indicator_series(conn, "cpi_inflation")
+    cpi_series = cpi_series[cpi_series.index.str.fullmatch(r"\d{4}")]
+    return pd.Series(cpi_series.to_numpy(), index=cpi_series.index.astype(int), dtype=float).sort_index()
+
+def load_cpi_forecast(conn: sqlite3.Connection, refresh: bool = True) -> pd.Series:
+    """Annual CPI forecast (%) by year from the cached forecasting models (refitted only if CPI data changed)."""
+    forecasts = load_forecasts(conn, ["cpi_inflation"], "annual", refresh=refresh)
+    return pd.Series(forecasts["forecast"].to_numpy(), index=forecasts["period"].astype(int).to_numpy(), dtype=float)
+
+def build_cpi_path(
+    cpi_series: pd.Series,
+    end_year: int,
+    method: str = DEFAULT_CPI_PATH_METHOD,
+    trailing_years: int = DEFAULT_TRAILING_YEARS,
+    cpi_forecast: pd.Series = None
+) -> pd.Series:
+    """
+    Annual CPI inflation (%) from the first observed year through `end_year`: observed values as
+    stored, later years projected by `method`:
+      - "latest": the most recent observation held flat.
+      - "trailing_average": mean of the last `trailing_years` observations held flat.
+      - "forecast": the recent linear trend, damped each year and bounded to FORECAST_CPI_BOUNDS.
+      - "model_forecast": `cpi_forecast` (see load_cpi_forecast()) for the years it covers, its last year held
+        flat after that, bounded to FORECAST_CPI_BOUNDS; without a forecast, as "forecast".
+    An empty series falls back to DEFAULT_CPI_INFLATION from the current year.
+    """
+    if method not in CPI_PATH_METHODS:
+        raise ValueError(f"Invalid CPI path method: {method}. Valid methods are: {CPI_PATH_METHODS}")
+    if cpi_series.empty:
+        cpi_series = pd.Series({date.today().year: DEFAULT_CPI_INFLATION})
+
+    last_year = int(cpi_series.index[-1])
+    future_years = np.arange(last_year + 1, max(end_year, last_year) + 1)
+    if method == "latest":
+        future_values = np.full(len(future_years), cpi_series.iloc[-1])
+    elif method == "trailing_average":
+        future_values = np.full(len(future_years), cpi_series.iloc[-trailing_years:].mean())
+    elif method == "model_forecast" and cpi_forecast is not None and not cpi_forecast.empty:
+        future_values = np.clip(cpi_forecast.reindex(future_years).ffill().fillna(cpi_forecast.iloc[-1]).to_numpy(), *FORECAST_CPI_BOUNDS)
+    else:
+        recent = cpi_series.iloc[-trailing_years:]
+        slope = np.polyfit(recent.index.to_numpy(dtype=float), recent.to_numpy(), 1)[0] if len(recent) > 1 else 0.0
+        damped_steps = np.cumsum(FORECAST_TREND_DAMPING ** np.arange(1, len(future_years) + 1))
+        future_values = np.clip(cpi_series.iloc[-1] + slope * damped_steps, *FORECAST_CPI_BOUNDS)
+    return pd.concat([cpi_series, pd.Series(future_values, index=future_years)])
+
+def calculate_inflation_factors(base_years, target_years, cpi_path: pd.Series) -> np.ndarray:
+    """
+    Vectorized cumulative inflation from base year to target year: product of (1 + CPI_y) for
+    y in (base, target]. Years before the path use its first value; target <= base gives 1.0.
+    """
+    base_years = np.asarray(base_years, dtype=np.int64)
+    target_years = np.asarray(target_years, dtype=np.int64)
+    first_year = int(min(cpi_path.index[0], base_years.min(initial=cpi_path.index[0])))
+    last_year = int(max(cpi_path.index[-1], target_years.max(initial=cpi_path.index[-1])))
+    years = np.arange(first_year, last_year + 1)
+    rates = cpi_path.reindex(years).bfill().ffill().to_numpy() / 100
+    cumulative_log_growth = np.concatenate([[0.0], np.cumsum(np.log1p(rates[1:]))])
+    base_index = base_years - first_year
+    target_index = np.maximum(target_years, base_years) - first_year
+    return np.exp(cumulative_log_growth[target_index] - cumulative_log_growth[base_index])
+
+def inflate_target_amount(present_value: float, base_year: int, target_year: int, cpi_path: pd.Series) -> float:
+    """Nominal target in `target_year` for an amount expressed in `base_year` rupees, rounded to TARGET_ROUNDING."""
+    factor = calculate_inflation_factors([base_year], [target_year], cpi_path)[0]
+    return float(round(present_value * factor / TARGET_ROUNDING) * TARGET_ROUNDING)
+
+# --- Database Integration ---
+def ensure_goal_inflation_schema(conn: sqlite3.Connection):
+    """
+    Adds present-value columns (and is_mfd_edited, see goal_generation_logic) to financial_goals and creates the
+    indicator store and forecast tables the CPI path is read from (idempotent). Goals without a present value, or
+    edited by the MFD, are not re-indexed.
+    """
+    ensure_indicator_store_schema(conn)
+    ensure_forecast_schema(conn)
+    c = conn.cursor()
+    c.execute("PRAGMA table_info(financial_goals)")
+    existing_columns = [row[1] for row in c.fetchall()]
+    for col_name, col_type in {"present_value_amount": "REAL", "present_value_year": "INTEGER", "is_mfd_edited": "BOOLEAN DEFAULT FALSE"}.items():
+        if col_name not in existing_columns:
+            c.execute(f"ALTER TABLE financial_goals ADD COLUMN {col_name} {col_type}")
+    conn.commit()
+
+def reindex_goal_targets(
+    conn: sqlite3.Connection,
+    method: str = DEFAULT_CPI_PATH_METHOD,
+    trailing_years: int = DEFAULT_TRAILING_YEARS
+) -> int:
+    """
+    Recomputes target_amount for every inflation-indexed goal from its present value and the current
+    CPI path, and writes back only the goals whose rounded target changed. Returns the number updated.
+    Goals flagged is_mfd_edited keep the target the MFD set. Call after the CPI series is refreshed.
+    """
+    goals = pd.read_sql_query(
+        """SELECT goal_id, target_amount, target_year, present_value_amount, present_value_year
+           FROM financial_goals
+           WHERE present_value_amount IS NOT NULL AND present_value_year IS NOT NULL AND COALESCE(is_mfd_edited, 0) = 0""",
+        conn
+    )
+    if goals.empty:
+        return 0
+
+    cpi_forecast = load_cpi_forecast(conn) if method == "model_forecast" else None
+    cpi_path = build_cpi_path(load_cpi_series(conn), int(goals["target_year"].max()), method, trailing_years, cpi_forecast)
+    factors = calculate_inflation_factors(goals["present_value_year"].to_numpy(), goals["target_year"].to_numpy(), cpi_path)
+    new_targets = np.round(goals["present_value_amount"].to_numpy() * factors / TARGET_ROUNDING) * TARGET_ROUNDING
+    changed = new_targets != goals["target_amount"].to_numpy(dtype=float)
+
+    updates = list(zip(new_targets[changed].tolist(), goals["goal_id"].to_numpy()[changed].tolist()))
+    c = conn.cursor()
+    c.executemany("UPDATE financial_goals SET target_amount = ? WHERE goal_id = ?", updates)
+    conn.commit()
+    return len(updates)
+
+if __name__ == "__main__":
+    print("--- Test Cases for Inflation-Indexed Goal Targets ---")
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE economic_indicators (date TEXT PRIMARY KEY, data TEXT, is_fallback BOOLEAN DEFAULT FALSE)")
+    conn.execute("""CREATE TABLE financial_goals (goal_id INTEGER PRIMARY KEY AUTOINCREMENT, investor_id TEXT, goal_name TEXT,
+                    goal_type TEXT, target_amount REAL, target_year INTEGER, priority INTEGER)""")
+    ensure_goal_inflation_schema(conn)
+    for fetch_date, year, value in [("2023-06-01", 2021, 5.13), ("2024-03-01", 2022, 6.7), ("2024-09-01", 2023, 5.65), ("2025-05-01", 2024, 4.95)]:
+        record_snapshot_observations(conn, {"cpi_inflation": {"year": str(year), "value": value}}, fetch_date)
+
+    cpi_series = load_cpi_series(conn)
+    print(f"Stored CPI series: {cpi_series.to_dict()}")
+    cpi_forecast = load_cpi_forecast(conn)
+    print(f"Cached model forecast: {cpi_forecast.round(2).to_dict()}")
+    for method in CPI_PATH_METHODS:
+        path = build_cpi_path(cpi_series, 2030, method, cpi_forecast=cpi_forecast)
+        print(f"  {method}: 2025-2030 = {[round(v, 2) for v in path.loc[2025:2030]]}; "
+              f"₹5,00,000 (2025) in 2038 -> ₹{inflate_target_amount(500000, 2025, 2038, path):,.0f}")
+
+    rng = np.random.default_rng(5)
+    num_goals = 100000
+    target_years = rng.integers(2026, 2065, num_goals)
+    present_values = rng.integers(50, 5000, num_goals) * 1000.0
+    conn.executemany(
+        "INSERT INTO financial_goals (investor_id, goal_type, target_amount, target_year, present_value_amount, present_value_year) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"INV-{i % 30000}", "Child Education", pv, int(year), pv, 2025) for i, (pv, year) in enumerate(zip(present_values.tolist(), target_years.tolist()))]
+    )
+    conn.execute("INSERT INTO financial_goals (investor_id, goal_type, target_amount, target_year) VALUES ('INV-X', 'Other', 123456, 2030)")
+    conn.execute("""INSERT INTO financial_goals (investor_id, goal_type, target_amount, target_year, present_value_amount, present_value_year, is_mfd_edited)
+                    VALUES ('INV-E', 'Child Education', 2500000, 2040, 1000000, 2025, 1)""")
+    conn.commit()
+
+    print(f"\nFirst re-index of {num_goals} goals: {reindex_goal_targets(conn)} updated")
+    print(f"Re-index with unchanged CPI: {reindex_goal_targets(conn)} updated (Expected 0)")
+    record_snapshot_observations(conn, {"cpi_inflation": {"year": "2025", "value": 4.9}}, "2025-11-01")
+    print(f"After a new 2025 CPI print (4.9%): {reindex_goal_targets(conn)} updated")
+    print(f"Manual nominal goal untouched: {conn.execute('SELECT target_amount FROM financial_goals WHERE investor_id = ?', ('INV-X',)).fetchone()[0]}")
+    print(f"MFD-edited indexed goal untouched: {conn.execute('SELECT target_amount FROM financial_goals WHERE investor_id = ?', ('INV-E',)).fetchone()[0]} (Expected 2500000.0)")
@@ -0,0 +1,256 @@
+# goal_simulation_logic.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from financial_goals_logic import FUND_TYPE_RETURNS, get_return_rates_for_fund_type, get_goal_base_return_rates, calculate_sip_grid
+from fund_returns_logic import SEED_RETURN_MASTER_VERSIONS
+
+# --- Simulation Parameters ---
+# Expected annual returns are the base case of the return master; these are the assumed annual
+# volatilities and correlations with a common equity-market factor for each fund type in every
+# seeded master version (version 1 Section 7 types, then the version 2 indicative scheme types).
+FUND_TYPE_VOLATILITY = {
+    "Ultra Short/Low Duration": 0.015,
+    "Liquid Fund": 0.01,
+    "Balanced Advantage": 0.09,
+    "Value Fund": 0.16,
+    "Dividend Yield Fund": 0.14,
+    "Contra Fund": 0.18,
+    "Multi Cap Fund": 0.18,
+    "Aggressive Hybrid": 0.12,
+    "Overnight Fund": 0.005,
+    "Ultra Short Duration Fund": 0.015,
+    "Low Duration Fund": 0.02,
+    "Floater Fund": 0.02,
+    "Hybrid Balanced Fund": 0.09,
+    "Hybrid Equity Fund": 0.12,
+    "Flexi Cap Fund": 0.18,
+    "Mid Cap Fund": 0.22,
+    "Small Cap Fund": 0.26
+}
+FUND_TYPE_MARKET_CORRELATION = {
+    "Ultra Short/Low Duration": 0.05,
+    "Liquid Fund": 0.0,
+    "Balanced Advantage": 0.8,
+    "Value Fund": 0.9,
+    "Dividend Yield Fund": 0.85,
+    "Contra Fund": 0.9,
+    "Multi Cap Fund": 0.95,
+    "Aggressive Hybrid": 0.9,
+    "Overnight Fund": 0.0,
+    "Ultra Short Duration Fund": 0.05,
+    "Low Duration Fund": 0.05,
+    "Floater Fund": 0.05,
+    "Hybrid Balanced Fund": 0.8,
+    "Hybrid Equity Fund": 0.9,
+    "Flexi Cap Fund": 0.95,
+    "Mid Cap Fund": 0.9,
+    "Small Cap Fund": 0.85
+}
+_SEEDED_FUND_TYPES = {fund_type for _, _, returns in SEED_RETURN_MASTER_VERSIONS.values() for fund_type in returns}
+_missing_risk_parameters = sorted(_SEEDED_FUND_TYPES - (FUND_TYPE_VOLATILITY.keys() & FUND_TYPE_MARKET_CORRELATION.keys()))
+if _missing_risk_parameters:
+    raise ValueError(f"No simulation volatility/correlation for return master fund types: {_missing_risk_parameters}")
+DEFAULT_VOLATILITY = 0.10
+DEFAULT_MARKET_CORRELATION = 0.5  # fund types added to the return master later than the seeded versions
+
+@lru_cache(maxsize=None)
+def get_fund_type_risk_parameters(fund_type: str) -> tuple[float, float]:
+    """(annual volatility, market correlation) of a fund type; unknown types get the defaults, with one warning each."""
+    if fund_type not in FUND_TYPE_VOLATILITY:
+        print(f"Warning: No simulation volatility for fund type {fund_type}. Using default volatility {DEFAULT_VOLATILITY} "
+              f"and market correlation {DEFAULT_MARKET_CORRELATION}.")
+        return DEFAULT_VOLATILITY, DEFAULT_MARKET_CORRELATION
+    return FUND_TYPE_VOLATILITY[fund_type], FUND_TYPE_MARKET_CORRELATION[fund_type]
+
+DEFAULT_NUM_PATHS = 10000
+DEFAULT_SEED = 42
+MAX_SIMULATION_YEARS = 40
+CORPUS_PERCENTILES = (10, 25, 50, 75, 90)
+
+@lru_cache(maxsize=4)
+def _market_shocks(seed: int, num_paths: int) -> np.ndarray:
+    """
+    Standard-normal market shocks (months x paths) shared by every goal simulated with the same seed,
+    so goals in equity-linked funds move together. Drawn month-major, so a goal's first n months are
+    the same whatever the horizon. Cached per process.
+    """
+    rng = np.random.default_rng([seed, 0])
+    return rng.standard_normal((MAX_SIMULATION_YEARS * 12, num_paths))
+
+def simulate_corpus_paths(
+    monthly_sip: float,
+    timeline_years: int,
+    fund_type: str,
+    current_corpus: float = 0.0,
+    num_paths: int = DEFAULT_NUM_PATHS,
+    seed: int = DEFAULT_SEED,
+    goal_key: int = 0,
+    return_master_version: int = None
+) -> np.ndarray:
+    """
+    Final corpus on each of `num_paths` simulated monthly return paths.
+    Monthly log returns are normal with the fund type's volatility, centred so the expected monthly growth
+    is the base-case annual return / 12, the monthly compounding calculate_sip() assumes. SIPs are invested at the start of each month (as in calculate_sip()).
+    `goal_key` seeds the fund-specific part of the shocks, so results do not depend on batch order.
+    The base-case return comes from `return_master_version` (the goal's pinned version; latest if None).
+    """
+    num_months = int(min(max(timeline_years, 0), MAX_SIMULATION_YEARS) * 12)
+    if num_months == 0:
+        return np.full(num_paths, float(current_corpus))
+
+    _, base_rate, _ = get_return_rates_for_fund_type(fund_type, return_master_version)
+    annual_volatility, correlation = get_fund_type_risk_parameters(fund_type)
+    monthly_volatility = annual_volatility / np.sqrt(12)
+    monthly_drift = np.log1p(base_rate / 12) - monthly_volatility ** 2 / 2
+
+    rng = np.random.default_rng([seed, 1, goal_key])
+    shocks = correlation * _market_shocks(seed, num_paths)[:num_months]
+    shocks = shocks + np.sqrt(1 - correlation ** 2) * rng.standard_normal((num_months, num_paths))
+
+    # corpus_T = exp(L_T) * (C0 + SIP * sum_k exp(-L_{k-1})), with L the cumulative log return.
+    cumulative_log_return = np.cumsum(monthly_drift + monthly_volatility * shocks, axis=0)
+    discount_sum = 1 + np.exp(-cumulative_log_return[:-1]).sum(axis=0)
+    return np.exp(cumulative_log_return[-1]) * (current_corpus + monthly_sip * discount_sum)
+
+def simulate_goal_success(
+    target_amount: float,
+    timeline_years: int,
+    monthly_sip: float,
+    fund_type: str,
+    current_corpus: float = 0.0,
+    num_paths: int = DEFAULT_NUM_PATHS,
+    seed: int = DEFAULT_SEED,
+    goal_key: int = 0,
+    return_master_version: int = None
+) -> dict:
+    """
+    Probability that the SIP plus current corpus reaches the target, with percentile corpus bands.
+    Returns {"success_probability", "corpus_percentiles": {10: ..., 50: ..., 90: ...}, "num_paths"}.
+    """
+    if timeline_years > MAX_SIMULATION_YEARS:
+        print(f"Warning: Timeline of {timeline_years} years exceeds the {MAX_SIMULATION_YEARS}-year simulation horizon. Simulating {MAX_SIMULATION_YEARS} years.")
+    final_corpus = simulate_corpus_paths(monthly_sip, timeline_years, fund_type, current_corpus, num_paths, seed, goal_key, return_master_version)
+    percentile_values = np.percentile(final_corpus, CORPUS_PERCENTILES)
+    return {
+        "success_probability": round(float((final_corpus >= target_amount).mean()), 4),
+        "corpus_percentiles": {p: round(float(v), 2) for p, v in zip(CORPUS_PERCENTILES, percentile_values)},
+        "num_paths": num_paths
+    }
+
+def _simulate_goal_rows(rows: list, num_paths: int, seed: int) -> list:
+    """Worker for simulate_goals_batch(): rows are (goal_key, target, years, sip, fund_type, corpus, return master version)."""
+    results = []
+    for goal_key, target_amount, timeline_years, monthly_sip, fund_type, current_corpus, return_master_version in rows:
+        final_corpus = simulate_corpus_paths(monthly_sip, timeline_years, fund_type, current_corpus, num_paths, seed, goal_key, return_master_version)
+        results.append([(final_corpus >= target_amount).mean(), *np.percentile(final_corpus, CORPUS_PERCENTILES)])
+    return results
+
+def simulate_goals_batch(
+    goals: pd.DataFrame,
+    current_year: int,
+    num_paths: int = DEFAULT_NUM_PATHS,
+    seed: int = DEFAULT_SEED,
+    max_workers: int = None,
+    chunk_size: int = 64
+) -> pd.DataFrame:
+    """
+    Runs simulate_goal_success() for every goal in a financial_goals DataFrame.
+    Needs target_amount, target_year and fund_type; the SIP is taken from `monthly_sip` or `allocated_sip`
+    (see allocate_savings_to_goals_batch()) if present, else the base-case required SIP. Returns are read from
+    each goal's pinned `return_master_version` where present (latest otherwise), as in get_goal_base_return_rates().
+    Goals are keyed by goal_id (else row position), so results are identical with or without a process pool.
+    With max_workers > 1 the goals are split into chunks across a ProcessPoolExecutor.
+    Returns a copy of `goals` with success_probability and corpus_p10 ... corpus_p90 columns.
+    """
+    goals = goals.reset_index(drop=True)
+    timeline_years = np.clip(goals["target_year"].to_numpy(dtype=float) - current_year, 0, MAX_SIMULATION_YEARS)
+    current_corpus = goals["current_savings_for_goal"].fillna(0).to_numpy(dtype=float) if "current_savings_for_goal" in goals else np.zeros(len(goals))
+    target_amount = goals["target_amount"].to_numpy(dtype=float)
+    sip_column = next((name for name in ("monthly_sip", "allocated_sip") if name in goals), None)
+    if sip_column:
+        monthly_sip = goals[sip_column].fillna(0).to_numpy(dtype=float)
+    else:
+        monthly_sip = calculate_sip_grid(target_amount, timeline_years, get_goal_base_return_rates(goals), current_corpus)
+    goal_keys = goals["goal_id"].to_numpy() if "goal_id" in goals else np.arange(len(goals))
+    if "return_master_version" in goals:
+        versions = [None if pd.isna(version) else int(version) for version in goals["return_master_version"]]
+    else:
+        versions = [None] * len(goals)
+
+    rows = list(zip(goal_keys.tolist(), target_amount.tolist(), timeline_years.tolist(), monthly_sip.tolist(),
+                    goals["fund_type"].tolist(), current_corpus.tolist(), versions))
+    if max_workers and max_workers > 1 and len(rows) > chunk_size:
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = [result for chunk_results in executor.map(_simulate_goal_rows, chunks, [num_paths] * len(chunks), [seed] * len(chunks))
+                       for result in chunk_results]
+    else:
+        results = _simulate_goal_rows(rows, num_paths, seed)
+
+    results = np.array(results).reshape(len(rows), 1 + len(CORPUS_PERCENTILES))
+    goals = goals.copy()
+    goals["success_probability"] = np.round(results[:, 0], 4)
+    for column_index, percentile in enumerate(CORPUS_PERCENTILES, start=1):
+        goals[f"corpus_p{percentile}"] = np.round(results[:, column_index], 2)
+    return goals
+
+if __name__ == "__main__":
+    print("--- Test Cases for Goal Success Simulation ---")
+
+    required_sip = calculate_sip_grid(1500000, 13, get_return_rates_for_fund_type("Multi Cap Fund")[1], 100000).item()
+    start_time = time.perf_counter()
+    education = simulate_goal_success(1500000, 13, required_sip, "Multi Cap Fund", 100000)
+    print(f"Child Education (Multi Cap, 13 yrs, base-case SIP {required_sip}): "
+          f"{education['success_probability']:.0%} chance in {time.perf_counter() - start_time:.3f}s")
+    print(f"  Corpus bands: {education['corpus_percentiles']}")
+    education_paths = simulate_corpus_paths(required_sip, 13, "Multi Cap Fund", 100000)
+    print(f"  Mean simulated corpus / target (Expected ~1.0): {education_paths.mean() / 1500000:.3f}")
+    print(f"  Same seed reproduces: {simulate_goal_success(1500000, 13, required_sip, 'Multi Cap Fund', 100000) == education}")
+    boosted = simulate_goal_success(1500000, 13, required_sip * 1.25, "Multi Cap Fund", 100000)
+    print(f"  With 25% higher SIP: {boosted['success_probability']:.0%}")
+    overnight_sip = calculate_sip_grid(500000, 5, get_return_rates_for_fund_type("Overnight Fund")[1]).item()
+    overnight = simulate_goal_success(500000, 5, overnight_sip, "Overnight Fund")
+    print(f"Base-case SIP at near-zero volatility (Overnight Fund, 5 yrs): {overnight['success_probability']:.0%} (Expected ~50%)")
+    liquid = simulate_goal_success(150000, 1, 12000, "Liquid Fund")
+    print(f"Emergency Fund (Liquid, 1 yr, SIP 12000 for 150000): {liquid['success_probability']:.0%}")
+    small_cap = simulate_goal_success(1500000, 13, required_sip, "Small Cap Fund", 100000)
+    print(f"Same goal in a Small Cap Fund (version 2 type, volatility {FUND_TYPE_VOLATILITY['Small Cap Fund']}): "
+          f"{small_cap['success_probability']:.0%}, bands {small_cap['corpus_percentiles'][10]} - {small_cap['corpus_percentiles'][90]}")
+
+    rng = np.random.default_rng(3)
+    num_goals = 200
+    book_goals = pd.DataFrame({
+        "goal_id": np.arange(1, num_goals + 1),
+        "target_amount": rng.integers(100, 3000, num_goals) * 1000.0,
+        "target_year": rng.integers(2027, 2050, num_goals),
+        "fund_type": rng.choice(list(FUND_TYPE_RETURNS), num_goals)
+    })
+    start_time = time.perf_counter()
+    inline_results = simulate_goals_batch(book_goals, current_year=2025, num_paths=2000)
+    print(f"\n{num_goals} goals x 2000 paths inline in {time.perf_counter() - start_time:.2f}s; "
+          f"mean success {inline_results['success_probability'].mean():.2%}")
+    start_time = time.perf_counter()
+    pooled_results = simulate_goals_batch(book_goals, current_year=2025, num_paths=2000, max_workers=2, chunk_size=50)
+    print(f"Same goals across a 2-process pool in {time.perf_counter() - start_time:.2f}s; "
+          f"identical to inline: {pooled_results.equals(inline_results)}")
+
+    import sqlite3
+    from fund_returns_logic import ensure_fund_return_schema, publish_return_master_version, get_return_master
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE financial_goals (goal_id INTEGER PRIMARY KEY, investor_id TEXT, target_amount REAL, target_year INTEGER, fund_type TEXT)")
+    ensure_fund_return_schema(conn)
+    pinned_goals = pd.DataFrame({"goal_id": [1, 2], "target_amount": 1500000.0, "target_year": 2038, "fund_type": "Multi Cap Fund",
+                                 "current_savings_for_goal": 100000.0, "monthly_sip": required_sip, "return_master_version": [1, np.nan]})
+    before = simulate_goals_batch(pinned_goals, current_year=2025)
+    new_version = publish_return_master_version(conn, {**get_return_master()[2], "Multi Cap Fund": (0.07, 0.10, 0.13)}, "Demo revision")
+    after = simulate_goals_batch(pinned_goals, current_year=2025)
+    print(f"\nAfter publishing return master v{new_version} (Multi Cap base 10%): goal pinned to v1 "
+          f"{before['success_probability'][0]:.0%} -> {after['success_probability'][0]:.0%} (unchanged), "
+          f"unpinned goal {before['success_probability'][1]:.0%} -> {after['success_probability'][1]:.0%}")
+    conn.close()
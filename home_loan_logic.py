@@ -0,0 +1,232 @@
+# home_loan_logic.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from profiling_logic import WHITE_COLLAR_PROFILES, BLUE_COLLAR_PROFILES
+
+# --- Borrowing Timeline (Home Loan Borrowing Timeline Framework) ---
+MAX_LOAN_REPAYMENT_AGE = 65
+MAX_LOAN_TENURE_YEARS = 20
+MAX_BORROWING_AGE = 55  # guarantees the minimum 10-year tenure
+MIN_LOAN_TENURE_YEARS = 10
+
+# Target borrowing age range per life cycle stage; Retirement is not feasible.
+TARGET_BORROWING_AGE_RANGES = {
+    "Young Adult": (32, 35),
+    "Young Family": (35, 40),
+    "Mid-Career Family": (40, 50),
+    "Pre-Retirement": (50, 55)
+}
+SUFFICIENCY_TIMELINE_MULTIPLIERS = {"Low": 1.2, "Sufficient": 1.0, "Good": 0.9}
+HIGH_DEBT_LOAN_TO_INCOME_RATIO = 0.20
+HIGH_DEBT_TIMELINE_MULTIPLIER = 1.35  # midpoint of the 20-50% delay
+# Years added for competing Debt Reduction / Education / Marriage goals by stage.
+COMPETING_GOAL_YEARS = {"Young Adult": 0, "Young Family": 1, "Mid-Career Family": 2, "Pre-Retirement": 1, "Retirement": 0}
+
+# --- Down Payment (Master Document: Target Home Loan Down Payment Amount Calculation) ---
+INCOME_GROWTH_RATES = {
+    "White-Collar": {"Low": 0.05, "Sufficient": 0.07, "Good": 0.09},
+    "Blue-Collar": {"Low": 0.04, "Sufficient": 0.05, "Good": 0.065}
+}
+MAX_EMI_TO_INCOME_RATIO = 0.50
+HOME_LOAN_INTEREST_RATE = 0.09
+LOAN_TO_VALUE_RATIO = 0.85
+DOWN_PAYMENT_RATE = 0.15
+DOWN_PAYMENT_INVESTMENT_RETURN = 0.1075
+SAVINGS_CAPACITY_RATES = {"White-Collar": 0.30, "Blue-Collar": 0.15}  # upper end of 20-30% / 10-15%
+
+TYPICAL_AGE_BY_STAGE = {"Young Adult": 25, "Young Family": 30, "Mid-Career Family": 40, "Pre-Retirement": 55, "Retirement": 65}
+REPRESENTATIVE_INCOMES = {
+    "W1": 20000, "W2": 45000, "W3": 80000, "W4": 30000, "W5": 67500, "W6": 120000,
+    "W7": 45000, "W8": 100000, "W9": 180000, "W10": 60000, "W11": 150000, "W12": 250000,
+    "W13": 60000, "W14": 150000, "W15": 250000,
+    "B1": 8000, "B2": 16000, "B3": 25000, "B4": 12000, "B5": 24000, "B6": 40000,
+    "B7": 18000, "B8": 36000, "B9": 60000, "B10": 25000, "B11": 50000, "B12": 80000,
+    "B13": 25000, "B14": 50000, "B15": 80000
+}
+# High-debt profiles follow the Home Loan Borrowing Timeline Framework (Blue-Collar Low income: B1, B4, B7, B10, B13).
+# Deviation: the down payment master's note lists B1, B4, B7, B8, B10, but its own B8 row (7 years, the 2-12 year
+# midpoint) carries no high-debt extension, and B8 is a Sufficient-income profile; B10 and B13 are infeasible either way.
+HIGH_DEBT_PROFILES = {"B1", "B4", "B7", "B10", "B13"}
+# Published (timeline years, down payment) for the feasible profiles, for regenerate_down_payment_master().
+PUBLISHED_DOWN_PAYMENT_TARGETS = {
+    "W1": (10.2, 379394), "W2": (8.5, 907242), "W3": (7.65, 1711774), "W4": (9.6, 495652), "W5": (8.5, 1131781),
+    "W6": (8.1, 1957304), "W7": (7.2, 524515), "W8": (7, 1366036), "W9": (6.3, 2651984),
+    "B1": (13.75, 189027), "B2": (8.5, 395723), "B3": (7.65, 742413), "B4": (11.1, 221737), "B5": (8.5, 463519),
+    "B6": (8.1, 878876), "B7": (8.7, 292189), "B8": (7, 584378), "B9": (6.3, 1105735)
+}
+
+def _lookup(values, table: dict, default=np.nan) -> np.ndarray:
+    """Maps an array of keys (e.g. stage names) through a dict, keeping the array's shape."""
+    values = np.asarray(values, dtype=object)
+    return pd.Series(values.ravel()).map(table).fillna(default).to_numpy(dtype=float).reshape(values.shape)
+
+def get_max_loan_tenure(borrowing_ages) -> np.ndarray:
+    """Whole-year tenure: min(20, 65 - borrowing age); 0 where borrowing age exceeds 55."""
+    borrowing_ages = np.asarray(borrowing_ages, dtype=float)
+    tenure = np.floor(np.minimum(MAX_LOAN_TENURE_YEARS, MAX_LOAN_REPAYMENT_AGE - borrowing_ages))
+    return np.where(borrowing_ages > MAX_BORROWING_AGE, 0.0, tenure)
+
+def calculate_emi_per_lakh(tenure_years, annual_interest_rate: float = HOME_LOAN_INTEREST_RATE) -> np.ndarray:
+    """Monthly EMI per ₹1,00,000 borrowed (standard reducing-balance formula); NaN for zero tenure."""
+    num_months = np.asarray(tenure_years, dtype=float) * 12
+    monthly_rate = annual_interest_rate / 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + monthly_rate) ** num_months
+        return np.where(num_months > 0, 100000 * monthly_rate * growth / (growth - 1), np.nan)
+
+def calculate_borrowing_timeline(ages, life_cycle_stages, income_levels, loan_to_income_ratios=0.0) -> dict:
+    """
+    Years until the investor borrows, per the framework's assignment steps:
+    base range max(0, lower - age) .. min(upper - age, 55 - age), times the sufficiency multiplier,
+    times 1.35 if loan repayments exceed 20% of income, plus competing-goal years.
+    Returns arrays "timeline_min", "timeline_max" and "timeline_years" (midpoint); NaN where not feasible.
+    """
+    ages = np.asarray(ages, dtype=float)
+    lower_age = _lookup(life_cycle_stages, {stage: ages_range[0] for stage, ages_range in TARGET_BORROWING_AGE_RANGES.items()})
+    upper_age = _lookup(life_cycle_stages, {stage: ages_range[1] for stage, ages_range in TARGET_BORROWING_AGE_RANGES.items()})
+    multiplier = _lookup(income_levels, SUFFICIENCY_TIMELINE_MULTIPLIERS, 1.0)
+    multiplier = multiplier * np.where(np.asarray(loan_to_income_ratios, dtype=float) > HIGH_DEBT_LOAN_TO_INCOME_RATIO, HIGH_DEBT_TIMELINE_MULTIPLIER, 1.0)
+    goal_years = _lookup(life_cycle_stages, COMPETING_GOAL_YEARS, 0.0)
+
+    timeline_min = np.maximum(0, lower_age - ages) * multiplier + goal_years
+    timeline_max = np.maximum(0, np.minimum(upper_age - ages, MAX_BORROWING_AGE - ages)) * multiplier + goal_years
+    timeline_max = np.maximum(timeline_min, timeline_max)
+    return {"timeline_min": timeline_min, "timeline_max": timeline_max, "timeline_years": (timeline_min + timeline_max) / 2}
+
+def calculate_home_loan_plan_grid(
+    monthly_incomes,
+    ages,
+    occupation_types,
+    income_levels,
+    life_cycle_stages,
+    loan_to_income_ratios=0.0,
+    timeline_years=None
+) -> dict:
+    """
+    Borrowing age, tenure, eligible loan, home value, down payment and required savings, vectorized.
+    All inputs broadcast (e.g. incomes[:, None] against ages[None, :] for an income x age grid).
+    `timeline_years` overrides the framework timeline (e.g. from a slider).
+    Returns a dict of arrays; "is_feasible" is False where borrowing would happen after age 55.
+    """
+    monthly_incomes, ages, occupation_types, income_levels, life_cycle_stages, loan_to_income_ratios = np.broadcast_arrays(
+        np.asarray(monthly_incomes, dtype=float), np.asarray(ages, dtype=float), np.asarray(occupation_types, dtype=object),
+        np.asarray(income_levels, dtype=object), np.asarray(life_cycle_stages, dtype=object), np.asarray(loan_to_income_ratios, dtype=float)
+    )
+    timeline = calculate_borrowing_timeline(ages, life_cycle_stages, income_levels, loan_to_income_ratios)
+    if timeline_years is not None:
+        timeline["timeline_years"] = np.broadcast_to(np.asarray(timeline_years, dtype=float), ages.shape)
+    years = timeline["timeline_years"]
+    borrowing_age = ages + years
+    is_feasible = ~np.isnan(years) & (borrowing_age <= MAX_BORROWING_AGE)
+    tenure = np.where(is_feasible, get_max_loan_tenure(borrowing_age), 0.0)
+
+    growth_rates = np.where(
+        occupation_types == "White-Collar",
+        _lookup(income_levels, INCOME_GROWTH_RATES["White-Collar"], 0.0),
+        _lookup(income_levels, INCOME_GROWTH_RATES["Blue-Collar"], 0.0)
+    )
+    safe_years = np.where(is_feasible, years, 0.0)
+    future_income = monthly_incomes * (1 + growth_rates) ** safe_years
+    max_emi = future_income * MAX_EMI_TO_INCOME_RATIO
+    eligible_loan = np.where(is_feasible, max_emi / calculate_emi_per_lakh(np.where(is_feasible, tenure, 1)) * 100000, 0.0)
+    home_value = eligible_loan / LOAN_TO_VALUE_RATIO
+    down_payment = home_value * DOWN_PAYMENT_RATE
+
+    # Sinking-fund payment at the investment return; a zero timeline needs the full amount now.
+    accumulation = (1 + DOWN_PAYMENT_INVESTMENT_RETURN) ** safe_years - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual_savings = np.where(accumulation > 0, down_payment * DOWN_PAYMENT_INVESTMENT_RETURN / accumulation, down_payment)
+    capacity_rate = _lookup(occupation_types, SAVINGS_CAPACITY_RATES, SAVINGS_CAPACITY_RATES["White-Collar"])
+
+    return {
+        "timeline_years": np.where(is_feasible, years, np.nan),
+        "borrowing_age": np.where(is_feasible, borrowing_age, np.nan),
+        "tenure_years": tenure,
+        "future_monthly_income": np.where(is_feasible, future_income, 0.0),
+        "max_emi": np.where(is_feasible, max_emi, 0.0),
+        "eligible_loan": eligible_loan,
+        "home_value": home_value,
+        "down_payment": down_payment,
+        "annual_savings": np.where(is_feasible, annual_savings, 0.0),
+        "monthly_savings": np.where(is_feasible, annual_savings / 12, 0.0),
+        "exceeds_savings_capacity": is_feasible & (annual_savings / 12 > monthly_incomes * capacity_rate),
+        "is_feasible": is_feasible
+    }
+
+def calculate_home_loan_plan(
+    monthly_income: float,
+    age: float,
+    occupation_type: str,
+    income_level: str,
+    life_cycle_stage: str,
+    loan_to_income_ratio: float = 0.0
+) -> dict:
+    """Single-investor home loan plan (see calculate_home_loan_plan_grid()), with a summary message."""
+    plan = {key: values.item() for key, values in calculate_home_loan_plan_grid(
+        monthly_income, age, occupation_type, income_level, life_cycle_stage, loan_to_income_ratio
+    ).items()}
+    plan["message"] = format_home_loan_message(plan)
+    return plan
+
+def format_home_loan_message(plan: dict) -> str:
+    """Summary message for one investor's plan (scalar values, as in calculate_home_loan_plan())."""
+    if not plan["is_feasible"]:
+        return "Not feasible with current plan: borrowing would happen after age 55. Consider savings or rental options."
+    message = (f"Plan to borrow in {plan['timeline_years']:.1f} years, with {plan['tenure_years']:.0f} years tenure. "
+               f"Target Home Value: ₹{plan['home_value'] / 100000:,.1f} lakh, Down Payment: ₹{plan['down_payment'] / 100000:,.1f} lakh, "
+               f"Save ₹{plan['monthly_savings']:,.0f}/month.")
+    if plan["borrowing_age"] >= MAX_BORROWING_AGE:
+        message += " Borrowing at age 55 allows only 10 years tenure."
+    return message
+
+def regenerate_down_payment_master() -> pd.DataFrame:
+    """
+    Rebuilds the 30-profile down payment table from the framework rules in one vectorized call,
+    alongside the published timeline and down payment for comparison.
+    """
+    profiles = WHITE_COLLAR_PROFILES + BLUE_COLLAR_PROFILES
+    profile_ids = [profile[0] for profile in profiles]
+    stages = np.array([profile[1] for profile in profiles], dtype=object)
+    plan = calculate_home_loan_plan_grid(
+        [REPRESENTATIVE_INCOMES[pid] for pid in profile_ids],
+        [TYPICAL_AGE_BY_STAGE[stage] for stage in stages],
+        ["White-Collar" if pid.startswith("W") else "Blue-Collar" for pid in profile_ids],
+        [profile[4] for profile in profiles],
+        stages,
+        [0.25 if pid in HIGH_DEBT_PROFILES else 0.0 for pid in profile_ids]
+    )
+    master = pd.DataFrame({"profile_id": profile_ids, "life_cycle_stage": stages, **plan})
+    master["published_timeline_years"] = [PUBLISHED_DOWN_PAYMENT_TARGETS.get(pid, (np.nan, np.nan))[0] for pid in profile_ids]
+    master["published_down_payment"] = [PUBLISHED_DOWN_PAYMENT_TARGETS.get(pid, (np.nan, np.nan))[1] for pid in profile_ids]
+    return master
+
+if __name__ == "__main__":
+    print("--- Test Cases for Home Loan Logic ---")
+    print(f"Tenure at borrowing ages 40/46/47.2/55/56: {get_max_loan_tenure([40, 46, 47.2, 55, 56])} (Expected [20 19 17 10 0])")
+    print(f"EMI per lakh at 20/18 years: {np.round(calculate_emi_per_lakh([20, 18]), 0)} (Expected ~[900 956])")
+
+    b8 = calculate_home_loan_plan(36000, 40, "Blue-Collar", "Sufficient", "Mid-Career Family")
+    print(f"\nB8 (40, ₹36,000): {b8['message']}")
+    w11 = calculate_home_loan_plan(150000, 55, "White-Collar", "Sufficient", "Pre-Retirement")
+    print(f"W11 (55, ₹1,50,000): {w11['message']}")
+
+    start_time = time.perf_counter()
+    master = regenerate_down_payment_master()
+    elapsed = time.perf_counter() - start_time
+    print(f"\nRegenerated 30-profile down payment master in {elapsed * 1000:.1f} ms:")
+    print(master[["profile_id", "timeline_years", "published_timeline_years", "tenure_years", "down_payment", "published_down_payment", "is_feasible"]].round(2).to_string(index=False))
+    compared = master.dropna(subset=["published_down_payment"])
+    differs = (compared["down_payment"] - compared["published_down_payment"]).abs() > 0.01 * compared["published_down_payment"]
+    print(f"Profiles differing from the published down payment by >1%: {list(compared.loc[differs, 'profile_id'])}")
+
+    incomes = np.arange(10000, 300001, 1000)
+    ages = np.arange(22, 61)
+    stages = np.select([ages <= 27, ages <= 34, ages <= 49], ["Young Adult", "Young Family", "Mid-Career Family"], "Pre-Retirement")
+    start_time = time.perf_counter()
+    grid = calculate_home_loan_plan_grid(incomes[:, None], ages[None, :], "White-Collar", "Sufficient", stages[None, :])
+    print(f"\nIncome x age grid {grid['down_payment'].shape} in {(time.perf_counter() - start_time) * 1000:.1f} ms; "
+          f"feasible cells: {grid['is_feasible'].sum()}")
@@ -0,0 +1,260 @@
+# indicator_store_logic.py
+
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+
+from economic_data_fetcher import fetch_world_bank_series, TokenBucket, BASE_URL, COUNTRY, INDICATORS, MAX_WORKERS
+
+# --- Long-Format Indicator Store ---
+# One row per (indicator, source, period); periods are "YYYY" for annual series and "YYYY-MM" for monthly
+# ones, so text order is time order and MAX(period) is the latest observation.
+WORLD_BANK_SOURCE = "world_bank"
+FILE_DROP_SOURCE = "file_drop"
+RBI_SOURCE = "rbi"
+MOSPI_SOURCE = "mospi"
+# Points copied from the app's economic_indicators snapshots. They are kept apart from synced World Bank rows,
+# so a snapshot of the latest year does not make the incremental World Bank fetch skip the earlier history.
+SNAPSHOT_SOURCE = "economic_snapshot"
+
+# When several sources report the same indicator-period, the higher priority wins (then the latest fetch).
+# A file the MFD dropped is a deliberate correction; official Indian releases beat the World Bank's
+# annual re-publication. Unknown sources rank lowest.
+SOURCE_PRIORITY = {FILE_DROP_SOURCE: 3, RBI_SOURCE: 2, MOSPI_SOURCE: 2, WORLD_BANK_SOURCE: 1, SNAPSHOT_SOURCE: 1}
+HISTORY_START_YEAR = 2000  # first year requested for an indicator with no stored history
+
+def ensure_indicator_store_schema(conn: sqlite3.Connection):
+    """
+    Creates indicator_observations and its indexes (idempotent). On first creation, back-fills the
+    observations held in the non-fallback economic_indicators snapshots; on existing stores, moves snapshot
+    points recorded under the World Bank source (fetched_at is a bare snapshot date) to SNAPSHOT_SOURCE.
+    """
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'indicator_observations'")
+    is_new = c.fetchone() is None
+    c.execute('''CREATE TABLE IF NOT EXISTS indicator_observations (
+        indicator TEXT NOT NULL,
+        period TEXT NOT NULL,
+        value REAL NOT NULL,
+        source TEXT NOT NULL,
+        fetched_at TEXT NOT NULL,
+        UNIQUE (indicator, source, period)
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_indicator_observations_period ON indicator_observations (indicator, period)")
+    conn.commit()
+    if is_new:
+        backfilled = backfill_from_snapshots(conn)
+        if backfilled:
+            print(f"Back-filled {backfilled} indicator observations from economic_indicators snapshots.")
+    else:
+        c.execute("UPDATE OR IGNORE indicator_observations SET source = ? WHERE source = ? AND fetched_at NOT LIKE '%T%'",
+                  (SNAPSHOT_SOURCE, WORLD_BANK_SOURCE))
+        c.execute("DELETE FROM indicator_observations WHERE source = ? AND fetched_at NOT LIKE '%T%'", (WORLD_BANK_SOURCE,))
+        conn.commit()
+
+def upsert_observations(conn: sqlite3.Connection, rows) -> int:
+    """
+    Writes (indicator, period, value, source, fetched_at) rows in one transaction. An existing observation
+    is only replaced by a fetch at least as recent. Returns the number of rows inserted or updated.
+    """
+    changes_before = conn.total_changes
+    conn.executemany(
+        """INSERT INTO indicator_observations (indicator, period, value, source, fetched_at) VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT (indicator, source, period) DO UPDATE SET value = excluded.value, fetched_at = excluded.fetched_at
+           WHERE excluded.fetched_at >= indicator_observations.fetched_at AND excluded.value IS NOT indicator_observations.value""",
+        rows
+    )
+    conn.commit()
+    return conn.total_changes - changes_before
+
+def snapshot_to_observations(data: dict, fetched_at: str, source: str = SNAPSHOT_SOURCE) -> list:
+    """Rows for a {indicator: {"year", "value", ...}} snapshot, skipping points without a numeric year and value."""
+    rows = []
+    for indicator, point in (data or {}).items():
+        try:
+            rows.append((indicator, str(int(point["year"])), float(point["value"]), source, fetched_at))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return rows
+
+def record_snapshot_observations(conn: sqlite3.Connection, data: dict, fetched_at: str = None, source: str = SNAPSHOT_SOURCE) -> int:
+    """Stores the latest points of a fetched snapshot (see economic_data_fetcher.fetch_indicators_concurrently())."""
+    return upsert_observations(conn, snapshot_to_observations(data, fetched_at or datetime.now().isoformat(timespec="seconds"), source))
+
+def backfill_from_snapshots(conn: sqlite3.Connection) -> int:
+    """Copies the points of the non-fallback economic_indicators JSON snapshots; returns the rows written."""
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'economic_indicators'")
+    if c.fetchone() is None:
+        return 0
+    c.execute("SELECT date, data FROM economic_indicators WHERE is_fallback = 0 ORDER BY date")
+    rows = []
+    for fetch_date, data_json in c.fetchall():
+        try:
+            rows.extend(snapshot_to_observations(json.loads(data_json), fetch_date))
+        except (json.JSONDecodeError, TypeError):
+            continue
+    return upsert_observations(conn, rows)
+
+# --- Incremental Fetch ---
+def get_last_periods(conn: sqlite3.Connection, source: str = WORLD_BANK_SOURCE) -> dict:
+    """{indicator: latest stored period} for one source."""
+    c = conn.cursor()
+    c.execute("SELECT indicator, MAX(period) FROM indicator_observations WHERE source = ? GROUP BY indicator", (source,))
+    return dict(c.fetchall())
+
+def build_incremental_date_ranges(last_periods: dict, indicators=INDICATORS, end_year: int = None,
+                                  start_year: int = HISTORY_START_YEAR) -> dict:
+    """
+    {indicator_name: "start:end"} covering only the years after each indicator's last stored period
+    (from `start_year` if nothing is stored); indicators already up to `end_year` are left out.
+    """
+    end_year = end_year or date.today().year
+    date_ranges = {}
+    for indicator_name in indicators:
+        last_period = last_periods.get(indicator_name)
+        first_year = int(last_period[:4]) + 1 if last_period else start_year
+        if first_year <= end_year:
+            date_ranges[indicator_name] = f"{first_year}:{end_year}"
+    return date_ranges
+
+def sync_indicator_history(
+    conn: sqlite3.Connection,
+    indicators=INDICATORS,
+    country: str = COUNTRY,
+    end_year: int = None,
+    start_year: int = HISTORY_START_YEAR,
+    base_url: str = BASE_URL,
+    rate_limiter=None,
+    max_workers: int = MAX_WORKERS
+) -> dict:
+    """
+    Fetches, concurrently, only the World Bank periods newer than those already stored and writes them in
+    one transaction on the calling thread. Returns {indicator_name: rows written}; failed fetches are
+    reported and left out, so the next sync asks for the same range again.
+    """
+    date_ranges = build_incremental_date_ranges(get_last_periods(conn), indicators, end_year, start_year)
+    if not date_ranges:
+        return {}
+    rate_limiter = rate_limiter or TokenBucket()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = dict(zip(date_ranges, executor.map(
+            lambda indicator_name: fetch_world_bank_series(indicators[indicator_name], country, date_ranges[indicator_name], base_url, rate_limiter),
+            date_ranges
+        )))
+
+    fetched_at = datetime.now().isoformat(timespec="seconds")
+    rows, written = [], {}
+    for indicator_name, observations in fetched.items():
+        if observations is None:
+            print(f"Failed to fetch {indicator_name} history for {date_ranges[indicator_name]}.")
+            continue
+        rows.extend((indicator_name, point["period"], point["value"], WORLD_BANK_SOURCE, fetched_at) for point in observations)
+        written[indicator_name] = len(observations)
+    upsert_observations(conn, rows)
+    return written
+
+# --- History Queries ---
+def _resolve_sources(history: pd.DataFrame, key_columns, source_priority: dict) -> pd.DataFrame:
+    """One row per key: the highest-priority source, then the most recent fetch."""
+    history = history.assign(priority=history["source"].map(source_priority).fillna(0))
+    history = history.sort_values([*key_columns, "priority", "fetched_at"], kind="stable")
+    return history.drop_duplicates(key_columns, keep="last")
+
+def load_indicator_series(conn: sqlite3.Connection, indicator: str, source: str = None,
+                          source_priority: dict = SOURCE_PRIORITY) -> pd.Series:
+    """
+    Observed values of one indicator indexed by period, oldest first. Without `source`, periods reported by
+    several sources are resolved by `source_priority`, then the most recent fetch.
+    """
+    query = "SELECT period, value, source, fetched_at FROM indicator_observations WHERE indicator = ?"
+    params = [indicator]
+    if source is not None:
+        query += " AND source = ?"
+        params.append(source)
+    history = _resolve_sources(pd.read_sql_query(query + " ORDER BY period", conn, params=params), ["period"], source_priority)
+    return pd.Series(history["value"].to_numpy(dtype=float), index=history["period"].to_numpy(), name=indicator, dtype=float)
+
+def load_observations_since(conn: sqlite3.Connection, last_periods: dict, source_priority: dict = SOURCE_PRIORITY) -> pd.DataFrame:
+    """
+    Long (indicator, period, value) observations after each indicator's given last period (all of them for
+    None), sources resolved as in load_indicator_series(), ordered by period then indicator.
+    """
+    if not last_periods:
+        return pd.DataFrame(columns=["indicator", "period", "value"])
+    clauses, params = [], []
+    for indicator, last_period in last_periods.items():
+        clauses.append("(indicator = ? AND period > ?)")
+        params.extend([indicator, last_period or ""])
+    history = pd.read_sql_query(f"SELECT indicator, period, value, source, fetched_at FROM indicator_observations WHERE {' OR '.join(clauses)}",
+                                conn, params=params)
+    history = _resolve_sources(history, ["indicator", "period"], source_priority)
+    return history.sort_values(["period", "indicator"])[["indicator", "period", "value"]].reset_index(drop=True)
+
+def load_indicator_frame(conn: sqlite3.Connection, indicators=None, since_period: str = None,
+                         source_priority: dict = SOURCE_PRIORITY) -> pd.DataFrame:
+    """Wide period x indicator history (NaN where an indicator has no observation), oldest first; sources resolved as in load_indicator_series()."""
+    query = "SELECT indicator, period, value, source, fetched_at FROM indicator_observations WHERE 1 = 1"
+    params = []
+    if indicators is not None:
+        indicators = list(indicators)
+        query += f" AND indicator IN ({', '.join('?' * len(indicators))})"
+        params.extend(indicators)
+    if since_period is not None:
+        query += " AND period >= ?"
+        params.append(since_period)
+    history = _resolve_sources(pd.read_sql_query(query, conn, params=params), ["indicator", "period"], source_priority)
+    return history.pivot(index="period", columns="indicator", values="value").sort_index()
+
+if __name__ == "__main__":
+    import time
+    from world_bank_stub import WorldBankStubServer, stub_indicator_value
+
+    print("--- Test Cases for the Indicator Store ---")
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE economic_indicators (date TEXT PRIMARY KEY, data TEXT, is_fallback BOOLEAN DEFAULT FALSE)")
+    conn.executemany("INSERT INTO economic_indicators VALUES (?, ?, ?)", [
+        ("2024-03-01", json.dumps({"cpi_inflation": {"year": "2022", "value": 6.7}, "gdp_growth": {"year": "2022", "value": 7.0}}), 0),
+        ("2024-09-01", json.dumps({"cpi_inflation": {"year": "2023", "value": 5.65}}), 0),
+        ("2024-10-01", json.dumps({"cpi_inflation": {"year": "N/A (Fallback)", "value": 5.0}}), 1)
+    ])
+    ensure_indicator_store_schema(conn)
+    ensure_indicator_store_schema(conn)
+    print(f"Back-filled CPI: {load_indicator_series(conn, 'cpi_inflation').to_dict()}")
+    print(f"Snapshot re-recorded: {record_snapshot_observations(conn, {'cpi_inflation': {'year': '2023', 'value': 5.65}})} rows changed (Expected 0)")
+
+    with WorldBankStubServer(latency=0.05) as stub:
+        first = sync_indicator_history(conn, end_year=2026, base_url=stub.base_url)
+        first_requests = stub.total_requests
+        second = sync_indicator_history(conn, end_year=2026, base_url=stub.base_url)
+        print(f"First sync: {first} in {first_requests} requests; last periods {get_last_periods(conn)}")
+        print(f"Second sync asks only for 2026 ({build_incremental_date_ranges(get_last_periods(conn), end_year=2026)}): {second}")
+        print(f"Up to date at end_year=2025: {build_incremental_date_ranges(get_last_periods(conn), end_year=2025)} (Expected {{}})")
+        print(f"GDP history fetched behind the 2022 snapshot: {sorted(load_indicator_series(conn, 'gdp_growth', source=WORLD_BANK_SOURCE).index)[:3]} (Expected from 2000)")
+    print(f"Stored 2024 GDP matches stub: {load_indicator_series(conn, 'gdp_growth')['2024'] == stub_indicator_value(INDICATORS['gdp_growth'], 2024)}")
+    print(load_indicator_frame(conn, since_period="2020").round(2))
+
+    print("\n--- History Query vs JSON Snapshots ---")
+    num_snapshots = 20000
+    conn.executemany("INSERT INTO economic_indicators VALUES (?, ?, 0)", [
+        (f"snapshot-{i:05d}", json.dumps({"cpi_inflation": {"year": str(2000 + i % 26), "value": 4 + i % 7}}), ) for i in range(num_snapshots)
+    ])
+    start_time = time.perf_counter()
+    cpi_by_year = {}
+    for (data_json,) in conn.execute("SELECT data FROM economic_indicators WHERE is_fallback = 0 ORDER BY date"):
+        cpi = json.loads(data_json).get("cpi_inflation") or {}
+        try:
+            cpi_by_year[int(cpi["year"])] = float(cpi["value"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    blob_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    cpi_series = load_indicator_series(conn, "cpi_inflation")
+    store_seconds = time.perf_counter() - start_time
+    print(f"CPI history from {num_snapshots:,} JSON snapshots {blob_seconds * 1000:.1f}ms vs indicator store {store_seconds * 1000:.1f}ms "
+          f"({len(cpi_series)} periods)")
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT period, value FROM indicator_observations WHERE indicator = 'cpi_inflation' ORDER BY period").fetchall()
+    print(f"Query plan: {plan[-1][-1]}")
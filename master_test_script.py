@@ -2,6 +2,7 @@
 
 from datetime import datetime, date
 import json
+import sqlite3
 
 # --- Consolidated Helper Functions (e.g., from profiling_logic or risk_assessment_logic) ---
 def calculate_age(dob_str: str, reference_date_str: str = None) -> int:
@@ -31,6 +32,25 @@ from ai_validation_logic import run_all_validations
 from communication_logic import generate_profile_transition_notification, generate_economic_slowdown_alert, send_app_notification
 from report_generation_logic import generate_investor_report_html, format_currency # format_currency is used for action_plan
 from compliance_logic import create_audit_log_entry, mask_sensitive_data
+from indicator_store_logic import ensure_indicator_store_schema, upsert_observations, FILE_DROP_SOURCE
+from early_warning_logic import ensure_early_warning_schema, process_new_observations
+from economic_regime_logic import ensure_economic_regime_schema, refresh_economic_regime, regime_economic_condition, describe_regime
+
+def build_regime_snapshot(economic_indicators) -> dict:
+    """The regime snapshot the app would store for the latest economic data (in-memory indicator store)."""
+    conn = sqlite3.connect(":memory:")
+    ensure_indicator_store_schema(conn)
+    ensure_early_warning_schema(conn)
+    ensure_economic_regime_schema(conn)
+    if economic_indicators is not None:
+        period = economic_indicators["data_month"].strftime("%Y-%m")
+        fetched_at = datetime.now().isoformat(timespec="seconds")
+        upsert_observations(conn, [("gdp_growth", period, float(economic_indicators["gdp_growth_rate"]), FILE_DROP_SOURCE, fetched_at),
+                                   ("cpi_inflation", period, float(economic_indicators["cpi_inflation"]), FILE_DROP_SOURCE, fetched_at)])
+        process_new_observations(conn, "monthly")
+    snapshot = refresh_economic_regime(conn)
+    conn.close()
+    return snapshot
 
 
 # --- Master Test Function ---
@@ -69,8 +89,9 @@ def run_comprehensive_test_scenario():
                 "occupation_type": investor_input_data["occupation"]
             }
 
-    latest_econ_data_for_val = get_latest_economic_data()
-    validation_results = run_all_validations(investor_input_data, economic_indicators=latest_econ_data_for_val, all_profiles_master_data=all_profile_definitions_for_ai_val)
+    regime_snapshot = build_regime_snapshot(get_latest_economic_data())
+    print(describe_regime(regime_snapshot))
+    validation_results = run_all_validations(investor_input_data, all_profiles_master_data=all_profile_definitions_for_ai_val, regime_snapshot=regime_snapshot)
     print(f"Input Validation Results: Overall Valid: {validation_results['overall_valid']}")
     if validation_results["issues"]:
         print("Validation Issues:")
@@ -128,6 +149,8 @@ def run_comprehensive_test_scenario():
     print(f"Recommended Monthly Savings: {format_currency(savings_details.get('final_monthly_savings_amount'))}")
     print(f"Disposable Monthly Income: {format_currency(savings_details.get('disposable_monthly_income'))}")
     print(f"Feasibility Index: {savings_details.get('feasibility_index')}%" )
+    economic_condition = regime_economic_condition(regime_snapshot)
+    print(f"Annual Savings Step-Up ({economic_condition}): {get_annual_savings_adjustment_rate(assigned_profile_id, economic_condition):.0%}")
 
     # 6. Financial Goals (Example)
     print("\n--- 6. Financial Goals ---")
@@ -185,7 +208,10 @@ def run_comprehensive_test_scenario():
         "dob": investor_input_data["dob"],
         "occupation": investor_input_data["occupation"],
         "mobile_number": investor_input_data["mobile_number"],
-        "email": investor_input_data["email"]
+        "email": investor_input_data["email"],
+        "monthly_rent": investor_input_data["monthly_rent"],
+        "monthly_emi": investor_input_data["monthly_emi"],
+        "num_dependents": investor_input_data["num_dependents_form"]
     }
 
     # Argument 2: profile_details
@@ -214,6 +240,7 @@ def run_comprehensive_test_scenario():
 
     # Argument 5: savings_summary
     savings_summary_arg = {
+        "household_monthly_income": savings_details.get("household_monthly_income"),
         "final_monthly_savings_amount": savings_details.get("final_monthly_savings_amount"),
         "disposable_monthly_income": savings_details.get("disposable_monthly_income"),
         "final_applicable_savings_rate": savings_details.get("final_applicable_savings_rate"),
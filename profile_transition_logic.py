@@ -0,0 +1,185 @@
+# profile_transition_logic.py
+
+import json
+import sqlite3
+from datetime import date
+
+from profiling_logic import WHITE_COLLAR_PROFILES, BLUE_COLLAR_PROFILES, calculate_age
+from communication_logic import generate_profile_transition_notification
+
+# --- Age Boundaries (derived from Framework Part 1, Section 3 profile tables) ---
+# The set of candidate profiles changes on the birthday an investor reaches a profile's AgeMin,
+# and on the birthday after a bounded AgeMax (e.g. AgeMax 30 -> leaves the band at 31). These include every
+# age band and life-cycle stage change of app.assign_investor_profile_id().
+PROFILE_AGE_BOUNDARIES = sorted(
+    {profile[2] for profile in WHITE_COLLAR_PROFILES + BLUE_COLLAR_PROFILES} |
+    {profile[3] + 1 for profile in WHITE_COLLAR_PROFILES + BLUE_COLLAR_PROFILES if profile[3] != float("inf")}
+)
+
+TRANSITION_DATE_COLUMN = "next_profile_transition_date"
+# Stored when no boundary remains (or the DOB is unusable), so NULL only ever means "not computed yet".
+NO_TRANSITION_DATE = "9999-12-31"
+
+def get_birthday_for_age(dob: date, age: int) -> date:
+    """
+    Returns the date on which an investor born on `dob` turns `age`.
+    Feb 29 birthdays fall on Mar 1 in non-leap years, consistent with calculate_age().
+    """
+    try:
+        return dob.replace(year=dob.year + age)
+    except ValueError:
+        return date(dob.year + age, 3, 1)
+
+def calculate_next_profile_transition_date(dob_str: str, reference_date_str: str = None) -> str | None:
+    """
+    Returns the next date (YYYY-MM-DD, strictly after the reference date) on which the investor
+    crosses a profile age boundary, or None if no boundary remains.
+    """
+    age = calculate_age(dob_str, reference_date_str)
+    dob = date.fromisoformat(dob_str)
+    for boundary_age in PROFILE_AGE_BOUNDARIES:
+        if boundary_age > age:
+            return get_birthday_for_age(dob, boundary_age).isoformat()
+    return None
+
+def _normalize_occupation(occupation_raw: str) -> str:
+    """Maps the app's occupation categories to "White-Collar"/"Blue-Collar"."""
+    occupation_raw = occupation_raw or ""
+    if "White-Collar" in occupation_raw: return "White-Collar"
+    if "Blue-Collar" in occupation_raw: return "Blue-Collar"
+    return "Other"
+
+def _count_dependents(dependents_json: str) -> int:
+    """Reads num_dependents from the investors.dependents JSON blob."""
+    if not dependents_json:
+        return 0
+    try:
+        return int(json.loads(dependents_json).get("num_dependents", 0) or 0)
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return 0
+
+# --- Database Integration ---
+def ensure_profile_transition_schema(conn: sqlite3.Connection):
+    """
+    Adds the indexed next_profile_transition_date column to the investors table (idempotent). Investors
+    without a date (saved before the column existed) are made due today, so the next daily run re-checks
+    their profile and schedules their next boundary.
+    """
+    c = conn.cursor()
+    c.execute("PRAGMA table_info(investors)")
+    existing_columns = [row[1] for row in c.fetchall()]
+    if TRANSITION_DATE_COLUMN not in existing_columns:
+        c.execute(f"ALTER TABLE investors ADD COLUMN {TRANSITION_DATE_COLUMN} TEXT")
+    c.execute(f"CREATE INDEX IF NOT EXISTS idx_investors_next_profile_transition ON investors ({TRANSITION_DATE_COLUMN})")
+    c.execute(f"UPDATE investors SET {TRANSITION_DATE_COLUMN} = ? WHERE {TRANSITION_DATE_COLUMN} IS NULL", (date.today().isoformat(),))
+    conn.commit()
+
+def refresh_profile_transition_dates(conn: sqlite3.Connection, investor_ids: list = None, reference_date_str: str = None) -> int:
+    """
+    Precomputes next_profile_transition_date for the given investors (all investors if None).
+    Returns the number of rows updated.
+    """
+    c = conn.cursor()
+    if investor_ids is None:
+        c.execute("SELECT investor_id, dob FROM investors")
+    else:
+        if not investor_ids:
+            return 0
+        placeholders = ",".join("?" * len(investor_ids))
+        c.execute(f"SELECT investor_id, dob FROM investors WHERE investor_id IN ({placeholders})", list(investor_ids))
+
+    updates = []
+    for investor_id, dob_str in c.fetchall():
+        try:
+            next_date = calculate_next_profile_transition_date(dob_str, reference_date_str)
+        except (TypeError, ValueError):
+            next_date = None
+        updates.append((next_date or NO_TRANSITION_DATE, investor_id))
+
+    c.executemany(f"UPDATE investors SET {TRANSITION_DATE_COLUMN} = ? WHERE investor_id = ?", updates)
+    conn.commit()
+    return len(updates)
+
+def run_daily_profile_transitions(conn: sqlite3.Connection, assign_profile, run_date_str: str = None, language: str = "en") -> list:
+    """
+    Daily job: reassigns the profile of every investor whose precomputed boundary date is due
+    (on or before the run date, so missed runs catch up) and emits transition notifications.
+    `assign_profile` is the assigner used when the profile is saved: it takes {"dob", "occupation",
+    "individual_income", "num_dependents"} (the investors columns) and returns a profile id, or None if none matches.
+    Only the due rows are read, via the index on next_profile_transition_date.
+    Returns a list of {"investor_id", "old_profile_id", "new_profile_id", "notification"} for changed profiles.
+    """
+    run_date_str = run_date_str or date.today().isoformat()
+    c = conn.cursor()
+    c.execute(f"""SELECT investor_id, dob, occupation, individual_income, dependents, investor_profile_id
+                  FROM investors WHERE {TRANSITION_DATE_COLUMN} <= ?""", (run_date_str,))
+    due_investors = c.fetchall()
+
+    transitions = []
+    profile_updates = []
+    date_updates = []
+    for investor_id, dob_str, occupation_raw, individual_income, dependents_json, old_profile_id in due_investors:
+        try:
+            next_date = calculate_next_profile_transition_date(dob_str, run_date_str)
+        except (TypeError, ValueError):
+            date_updates.append((NO_TRANSITION_DATE, investor_id))
+            continue
+        date_updates.append((next_date or NO_TRANSITION_DATE, investor_id))
+
+        new_profile_id = assign_profile({
+            "dob": dob_str, "occupation": occupation_raw, "individual_income": float(individual_income or 0.0),
+            "num_dependents": _count_dependents(dependents_json)
+        })
+        if new_profile_id is None or new_profile_id == old_profile_id:
+            continue
+
+        age = calculate_age(dob_str, run_date_str)
+        notification = generate_profile_transition_notification(
+            old_profile_id or "N/A", new_profile_id, f"age milestone ({age} years)", language
+        )
+        profile_updates.append((new_profile_id, investor_id))
+        transitions.append({
+            "investor_id": investor_id,
+            "old_profile_id": old_profile_id,
+            "new_profile_id": new_profile_id,
+            "notification": notification
+        })
+
+    c.executemany("UPDATE investors SET investor_profile_id = ? WHERE investor_id = ?", profile_updates)
+    c.executemany(f"UPDATE investors SET {TRANSITION_DATE_COLUMN} = ? WHERE investor_id = ?", date_updates)
+    conn.commit()
+    return transitions
+
+if __name__ == "__main__":
+    print("--- Test Cases for Profile Transition Scheduler ---")
+    print(f"Profile age boundaries: {PROFILE_AGE_BOUNDARIES}")
+
+    print(f"DOB 1995-06-15 as of 2025-05-14: Expected 2026-06-15 (turns 31), Got: {calculate_next_profile_transition_date('1995-06-15', '2025-05-14')}")
+    print(f"DOB 1996-02-29 as of 2025-05-14: Expected 2027-03-01 (turns 31), Got: {calculate_next_profile_transition_date('1996-02-29', '2025-05-14')}")
+    print(f"DOB 1950-01-01 as of 2025-05-14: Expected None, Got: {calculate_next_profile_transition_date('1950-01-01', '2025-05-14')}")
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE investors (investor_id TEXT PRIMARY KEY, dob TEXT, occupation TEXT,
+                    individual_income REAL, dependents TEXT, investor_profile_id TEXT)""")
+    conn.executemany("INSERT INTO investors VALUES (?, ?, ?, ?, ?, ?)", [
+        ("INV-1", "1995-06-15", "Salaried (White-Collar - Private Sector)", 50000, json.dumps({"num_dependents": 0}), "W2"),
+        ("INV-2", "1975-06-15", "Salaried (Blue-Collar - Skilled, e.g., Technician, Electrician)", 35000, json.dumps({"num_dependents": 2}), "B8"),
+        ("INV-3", "1990-01-01", "Salaried (White-Collar - Private Sector)", 80000, json.dumps({"num_dependents": 2}), "W5"),
+    ])
+    ensure_profile_transition_schema(conn)
+    print(f"Existing investors due today after the migration: {conn.execute(f'SELECT COUNT(*) FROM investors WHERE {TRANSITION_DATE_COLUMN} = DATE()').fetchone()[0]} (Expected 3)")
+    refresh_profile_transition_dates(conn, reference_date_str="2026-06-14")
+    print("\nPrecomputed dates:", conn.execute(f"SELECT investor_id, {TRANSITION_DATE_COLUMN} FROM investors").fetchall())
+
+    from profiling_logic import assign_investor_profile
+
+    def assign_profile_as_of_run_date(investor_data):
+        return assign_investor_profile(_normalize_occupation(investor_data["occupation"]), investor_data["dob"],
+                                       investor_data["individual_income"], investor_data["num_dependents"], "2026-06-15")
+
+    results = run_daily_profile_transitions(conn, assign_profile_as_of_run_date, "2026-06-15")
+    print("\nTransitions on 2026-06-15 (Expected INV-2 B8 -> B10; INV-1 has no matching profile at 31 and keeps W2):")
+    for transition in results:
+        print(f"  {transition['investor_id']}: {transition['old_profile_id']} -> {transition['new_profile_id']}")
+        print(f"    {transition['notification']['content']}")
+    print("Dates after run:", conn.execute(f"SELECT investor_id, {TRANSITION_DATE_COLUMN} FROM investors").fetchall())
@@ -1,7 +1,12 @@
 # report_generation_logic.py
 
 from datetime import datetime
-from weasyprint import HTML, CSS # Removed FontConfiguration import
+from functools import lru_cache
+
+from jinja2 import ChainableUndefined, DictLoader, Environment, Template
+from markupsafe import Markup
+
+from emergency_fund_logic import calculate_emergency_fund_batch, derive_essential_monthly_expenses
 
 # --- Formatting Utilities ---
 def format_currency(amount, currency_symbol="₹") -> str:
@@ -25,6 +30,225 @@ def format_percentage(value, decimals=2) -> str:
     except (ValueError, TypeError):
         return "N/A"
 
+def get_emergency_fund_summaries(reports: list) -> list:
+    """
+    Recommended emergency fund ({required_emergency_fund, recommended_months}) of each report's investor, in one
+    calculate_emergency_fund_batch() call; None where the savings summary has no household income.
+    """
+    with_income = [i for i, report in enumerate(reports) if report["savings_summary"].get("household_monthly_income") is not None]
+    summaries = [None] * len(reports)
+    if not with_income:
+        return summaries
+    investors = [reports[i]["investor_data"] for i in with_income]
+    savings = [reports[i]["savings_summary"] for i in with_income]
+    emergency_funds = calculate_emergency_fund_batch(
+        [reports[i]["profile_details"].get("profile_id") for i in with_income],
+        derive_essential_monthly_expenses({"household_monthly_income": [summary["household_monthly_income"] for summary in savings],
+                                           "final_monthly_savings_amount": [summary.get("final_monthly_savings_amount") for summary in savings]}),
+        [investor.get("monthly_emi", 0.0) or 0.0 for investor in investors],
+        [investor.get("monthly_rent", 0.0) or 0.0 for investor in investors],
+        [investor.get("num_dependents", 0) or 0 for investor in investors]
+    )
+    for position, i in enumerate(with_income):
+        summaries[i] = {"required_emergency_fund": emergency_funds["required_emergency_fund"][position].item(),
+                        "recommended_months": emergency_funds["recommended_months"][position].item()}
+    return summaries
+
+# --- Report Templates ---
+# Jinja2 with autoescaping, so investor-entered text is escaped. The report is one template with a block per
+# section: a full report renders in a single pass and render_report_section() renders one block alone.
+# The head (with the inline CSS) and footer never depend on the investor and are rendered once per process
+# and year. Templates are compiled once per process by get_report_template().
+REPORT_SECTIONS = ("profile", "risk", "goals", "savings", "allocation", "action_plan", "economic_outlook")
+REPORT_TEMPLATES = {
+    "head": """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; color: #333; }
+        .container { max-width: 800px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; }
+        h1, h2, h3 { color: #2c3e50; }
+        h1 { text-align: center; border-bottom: 2px solid #3498db; padding-bottom: 10px; }
+        h2 { border-bottom: 1px solid #eee; padding-bottom: 5px; margin-top: 30px; }
+        table { width: 100%; border-collapse: collapse; margin-top: 15px; }
+        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+        th { background-color: #f2f2f2; }
+        .section { margin-bottom: 20px; }
+        .footer { text-align: center; margin-top: 30px; font-size: 0.9em; color: #777; }
+        .summary-box { background-color: #eaf2f8; padding: 15px; border-radius: 5px; margin-bottom:20px;}
+    </style>
+""",
+    "footer": """<div class="footer">
+    <p>Disclaimer: This financial plan is based on the information provided and current market understanding. Investment in securities market are subject to market risks. Read all the related documents carefully before investing. Past performance is not indicative of future results. Consult with your MFD for personalized advice.</p>
+    <p>&copy; {{ year }} Your Financial Planning Service</p>
+</div>
+""",
+    "report": """{{ head }}    <title>{{ title }}</title>
+</head>
+<body>
+<div class="container">
+<h1>{{ title }}</h1>
+<p style="text-align:center; font-style:italic;">Report Generated: {{ report_date }}</p>
+{% if "profile" in sections %}{% block profile %}
+<div class="section">
+    <h2>1. Investor Profile</h2>
+    <p><strong>Name:</strong> {{ investor["name"] | d("N/A") }}</p>
+    <p><strong>Profile ID:</strong> {{ profile["profile_id"] | d("N/A") }}</p>
+    <p><strong>Profile Description:</strong> {{ profile["description"] | d("N/A") }}</p>
+    <p><strong>Date of Birth:</strong> {{ investor["dob"] | d("N/A") }}</p>
+    <p><strong>Occupation:</strong> {{ investor["occupation"] | d("N/A") }}</p>
+    <p><strong>Contact:</strong> {{ investor["mobile_number"] | d("N/A") }} | {{ investor["email"] | d("N/A") }}</p>
+</div>
+{% endblock %}{% endif %}
+{% if "risk" in sections %}{% block risk %}
+<div class="section summary-box">
+    <h2>2. Risk Assessment Summary</h2>
+    <p><strong>Overall Risk Score:</strong> {{ risk["total_score"] | d("N/A") }}/100</p>
+    <p><strong>Risk Rating:</strong> {{ risk["risk_rating"] | d("N/A") }}</p>
+    <p><em>Note: This score reflects your capacity and tolerance for investment risk.</em></p>
+</div>
+{% endblock %}{% endif %}
+{% if "goals" in sections %}{% block goals %}
+<div class="section">
+    <h2>3. Financial Goals Overview</h2>
+{% if goals %}
+    <table>
+        <thead>
+            <tr><th>Goal Type</th><th>Target Amount</th><th>Timeline (Years)</th><th>Priority</th><th>Suggested SIP (Base Case)</th></tr>
+        </thead>
+        <tbody>
+{% for goal in goals %}
+            <tr><td>{{ goal["goal_type"] | d("N/A") }}</td><td>{{ goal["target_amount"] | d(none) | currency }}</td><td>{{ goal["timeline_years"] | d("N/A") }}</td><td>{{ goal["priority_rank"] | d("N/A") }}</td><td>{{ goal["sip_scenarios"]["sip_base_case"] | d(none) | currency }}</td></tr>
+{% endfor %}
+        </tbody>
+    </table>
+{% else %}
+    <p>No financial goals have been defined yet.</p>
+{% endif %}
+</div>
+{% endblock %}{% endif %}
+{% if "savings" in sections %}{% block savings %}
+<div class="section summary-box">
+    <h2>4. Savings & Investment Potential</h2>
+    <p><strong>Recommended Monthly Savings:</strong> {{ savings["final_monthly_savings_amount"] | d(none) | currency }}</p>
+    <p><strong>Disposable Monthly Income:</strong> {{ savings["disposable_monthly_income"] | d(none) | currency }}</p>
+    <p><strong>Savings Rate (of Disposable Income):</strong> {{ savings["final_applicable_savings_rate"] | d(none) | percentage }}</p>
+{% set feasibility_index = savings["feasibility_index"] | d(none) %}
+    <p><strong>Feasibility Index:</strong> {{ (feasibility_index / 100 if feasibility_index is not none else none) | percentage }}</p>
+{% if emergency_fund %}
+    <p><strong>Recommended Emergency Fund:</strong> {{ emergency_fund["required_emergency_fund"] | currency }} ({{ "%g" | format(emergency_fund["recommended_months"]) }} months of essential expenses)</p>
+{% endif %}
+</div>
+{% endblock %}{% endif %}
+{% if "allocation" in sections %}{% block allocation %}
+<div class="section">
+    <h2>5. Suggested Asset Allocation</h2>
+    <p><em>Detailed asset allocation based on your profile and goals:</em></p>
+{% if allocation %}
+    <table><thead><tr><th>Asset Class</th><th>Allocation</th></tr></thead><tbody>
+{% for asset_class, share in allocation.items() %}
+        <tr><td>{{ asset_class }}</td><td>{{ share }}</td></tr>
+{% endfor %}
+    </tbody></table>
+{% else %}
+    <p>Asset allocation details will be provided upon plan finalization.</p>
+{% endif %}
+</div>
+{% endblock %}{% endif %}
+{% if "action_plan" in sections %}{% block action_plan %}
+<div class="section">
+    <h2>6. Recommended Action Plan</h2>
+{% if action_plan %}
+    <ul>
+{% for item in action_plan %}
+        <li>{{ item }}</li>
+{% endfor %}
+    </ul>
+{% else %}
+    <p>Specific action steps will be outlined upon plan finalization.</p>
+{% endif %}
+</div>
+{% endblock %}{% endif %}
+{% if "economic_outlook" in sections %}{% block economic_outlook %}
+<div class="section">
+    <h2>7. Current Economic Outlook & Considerations</h2>
+    <p><strong>GDP Growth Rate:</strong> {{ economic_outlook["gdp_growth_rate"] | d("N/A") }}%</p>
+    <p><strong>Inflation Rate (CPI):</strong> {{ economic_outlook["inflation_rate_cpi"] | d("N/A") }}%</p>
+    <p><strong>Repo Rate:</strong> {{ economic_outlook["repo_rate"] | d("N/A") }}%</p>
+    <p><em>Note: Economic conditions can impact investment returns. Regular reviews are advised.</em></p>
+</div>
+{% endblock %}{% endif %}
+{{ footer }}</div>
+</body>
+</html>
+"""
+}
+
+@lru_cache(maxsize=1)
+def get_report_environment() -> Environment:
+    """The process-wide Jinja2 environment for REPORT_TEMPLATES (autoescaped, no reload checks)."""
+    environment = Environment(loader=DictLoader(REPORT_TEMPLATES), autoescape=True, auto_reload=False,
+                              trim_blocks=True, lstrip_blocks=True, undefined=ChainableUndefined)
+    environment.filters["currency"] = format_currency
+    environment.filters["percentage"] = format_percentage
+    return environment
+
+@lru_cache(maxsize=None)
+def get_report_template(name: str) -> Template:
+    """A compiled report template; each is compiled once per process."""
+    return get_report_environment().get_template(name)
+
+@lru_cache(maxsize=4)
+def render_static_fragments(year: int) -> dict:
+    """The head and footer of the report as safe markup."""
+    return {"head": Markup(get_report_template("head").render()), "footer": Markup(get_report_template("footer").render(year=year))}
+
+def build_report_context(
+    investor_data: dict,
+    profile_details: dict,
+    risk_assessment: dict,
+    financial_goals: list,
+    savings_summary: dict,
+    asset_allocation_summary: dict,
+    action_plan: list,
+    economic_outlook: dict,
+    emergency_fund: dict = None
+) -> dict:
+    """Template context of a report; `emergency_fund` (see get_emergency_fund_summaries()) is computed if not given."""
+    if emergency_fund is None:
+        emergency_fund = get_emergency_fund_summaries([{"investor_data": investor_data, "profile_details": profile_details,
+                                                        "savings_summary": savings_summary}])[0]
+    return {
+        "investor": investor_data,
+        "profile": profile_details,
+        "risk": risk_assessment,
+        "goals": financial_goals or [],
+        "savings": savings_summary,
+        "emergency_fund": emergency_fund,
+        "allocation": asset_allocation_summary or {},
+        "action_plan": action_plan or [],
+        "economic_outlook": economic_outlook
+    }
+
+def render_report_section(section: str, context: dict) -> Markup:
+    """One report section (see REPORT_SECTIONS) as HTML, e.g. to refresh only the goals table."""
+    if section not in REPORT_SECTIONS:
+        raise ValueError(f"Unknown report section '{section}'. Choose from {REPORT_SECTIONS}.")
+    template = get_report_template("report")
+    return Markup("".join(template.blocks[section](template.new_context(context))))
+
+def render_report_document(context: dict, sections=REPORT_SECTIONS, generated_at: datetime = None) -> str:
+    """The full HTML report with the given sections, in REPORT_SECTIONS order."""
+    generated_at = generated_at or datetime.now()
+    static = render_static_fragments(generated_at.year)
+    return get_report_template("report").render(
+        context, head=static["head"], footer=static["footer"], sections=sections,
+        title=f"Financial Plan Investor Guide - {context['investor'].get('name', 'N/A')}",
+        report_date=generated_at.strftime("%Y-%m-%d %H:%M:%S")
+    )
+
 # --- HTML Report Generation (Framework Part 2, Sec 19) ---
 def generate_investor_report_html(
     investor_data: dict,
@@ -34,159 +258,31 @@ def generate_investor_report_html(
     savings_summary: dict,
     asset_allocation_summary: dict, 
     action_plan: list, 
-    economic_outlook: dict
+    economic_outlook: dict,
+    generated_at: datetime = None
 ) -> str:
     """
     Generates a comprehensive Investor Guide report in HTML format.
     """
-    investor_name = investor_data.get("name", "N/A")
-    investor_profile_id = profile_details.get("profile_id", "N/A")
-    investor_profile_desc = profile_details.get("description", "N/A")
-    risk_score = risk_assessment.get("total_score", "N/A")
-    risk_rating = risk_assessment.get("risk_rating", "N/A")
-    
-    report_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    title = f"Financial Plan Investor Guide - {investor_data.get('name', 'N/A')}"
-
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang=\"en\">
-    <head>
-        <meta charset=\"UTF-8\">
-        <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">
-        <title>{title}</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 20px; color: #333; }}
-            .container {{ max-width: 800px; margin: auto; padding: 20px; border: 1px solid #ddd; border-radius: 8px; }}
-            h1, h2, h3 {{ color: #2c3e50; }}
-            h1 {{ text-align: center; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
-            h2 {{ border-bottom: 1px solid #eee; padding-bottom: 5px; margin-top: 30px; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 15px; }}
-            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-            th {{ background-color: #f2f2f2; }}
-            .section {{ margin-bottom: 20px; }}
-            .footer {{ text-align: center; margin-top: 30px; font-size: 0.9em; color: #777; }}
-            .summary-box {{ background-color: #eaf2f8; padding: 15px; border-radius: 5px; margin-bottom:20px;}}
-        </style>
-    </head>
-    <body>
-        <div class=\"container\">
-            <h1>{title}</h1>
-            <p style=\"text-align:center; font-style:italic;\">Report Generated: {report_date}</p>
-
-            <div class=\"section\">
-                <h2>1. Investor Profile</h2>
-                <p><strong>Name:</strong> {investor_name}</p>
-                <p><strong>Profile ID:</strong> {investor_profile_id}</p>
-                <p><strong>Profile Description:</strong> {investor_profile_desc}</p>
-                <p><strong>Date of Birth:</strong> {investor_data.get('dob', 'N/A')}</p>
-                <p><strong>Occupation:</strong> {investor_data.get('occupation', 'N/A')}</p>
-                <p><strong>Contact:</strong> {investor_data.get('mobile_number', 'N/A')} | {investor_data.get('email', 'N/A')}</p>
-            </div>
-
-            <div class=\"section summary-box\">
-                <h2>2. Risk Assessment Summary</h2>
-                <p><strong>Overall Risk Score:</strong> {risk_score}/100</p>
-                <p><strong>Risk Rating:</strong> {risk_rating}</p>
-                <p><em>Note: This score reflects your capacity and tolerance for investment risk.</em></p>
-            </div>
-
-            <div class=\"section\">
-                <h2>3. Financial Goals Overview</h2>
-    """
-    if financial_goals:
-        html_content += """
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Goal Type</th>
-                            <th>Target Amount</th>
-                            <th>Timeline (Years)</th>
-                            <th>Priority</th>
-                            <th>Suggested SIP (Base Case)</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-        """
-        for goal in financial_goals:
-            sip_base_case = goal.get('sip_scenarios', {}).get('sip_base_case', 'N/A')
-            html_content += f"""
-                        <tr>
-                            <td>{goal.get('goal_type', 'N/A')}</td>
-                            <td>{format_currency(goal.get('target_amount'))}</td>
-                            <td>{goal.get('timeline_years', 'N/A')}</td>
-                            <td>{goal.get('priority_rank', 'N/A')}</td>
-                            <td>{format_currency(sip_base_case)}</td>
-                        </tr>
-            """
-        html_content += """
-                    </tbody>
-                </table>
-        """
-    else:
-        html_content += "<p>No financial goals have been defined yet.</p>"
-    html_content += "</div>"
+    context = build_report_context(investor_data, profile_details, risk_assessment, financial_goals,
+                                   savings_summary, asset_allocation_summary, action_plan, economic_outlook)
+    return render_report_document(context, generated_at=generated_at)
 
-    html_content += f"""
-            <div class=\"section summary-box\">
-                <h2>4. Savings & Investment Potential</h2>
-                <p><strong>Recommended Monthly Savings:</strong> {format_currency(savings_summary.get('final_monthly_savings_amount'))}</p>
-                <p><strong>Disposable Monthly Income:</strong> {format_currency(savings_summary.get('disposable_monthly_income'))}</p>
-                <p><strong>Savings Rate (of Disposable Income):</strong> {format_percentage(savings_summary.get('final_applicable_savings_rate'))}</p>
-                <p><strong>Feasibility Index:</strong> {format_percentage(savings_summary.get('feasibility_index')/100 if savings_summary.get('feasibility_index') is not None else None)}</p>
-            </div>
+def generate_investor_reports_html(reports: list, generated_at: datetime = None) -> list:
     """
-    
-    html_content += f"""
-            <div class=\"section\">
-                <h2>5. Suggested Asset Allocation</h2>
-                <p><em>Detailed asset allocation based on your profile and goals:</em></p>
+    HTML reports for a batch of investors; each item holds the generate_investor_report_html() arguments
+    by name. Emergency funds are calculated in one batch and all reports share one timestamp.
     """
-    if asset_allocation_summary:
-        html_content += "<table><thead><tr><th>Asset Class</th><th>Allocation</th></tr></thead><tbody>"
-        for asset_class, allocation in asset_allocation_summary.items():
-            html_content += f"<tr><td>{asset_class}</td><td>{allocation}</td></tr>"
-        html_content += "</tbody></table>"
-    else:
-        html_content += "<p>Asset allocation details will be provided upon plan finalization.</p>"
-    html_content += "</div>"
-
-    html_content += f"""
-            <div class=\"section\">
-                <h2>6. Recommended Action Plan</h2>
-    """
-    if action_plan:
-        html_content += "<ul>"
-        for item in action_plan:
-            html_content += f"<li>{item}</li>"
-        html_content += "</ul>"
-    else:
-        html_content += "<p>Specific action steps will be outlined upon plan finalization.</p>"
-    html_content += "</div>"
-
-    html_content += f"""
-            <div class=\"section\">
-                <h2>7. Current Economic Outlook & Considerations</h2>
-                <p><strong>GDP Growth Rate:</strong> {economic_outlook.get('gdp_growth_rate', 'N/A')}%</p>
-                <p><strong>Inflation Rate (CPI):</strong> {economic_outlook.get('inflation_rate_cpi', 'N/A')}%</p>
-                <p><strong>Repo Rate:</strong> {economic_outlook.get('repo_rate', 'N/A')}%</p>
-                <p><em>Note: Economic conditions can impact investment returns. Regular reviews are advised.</em></p>
-            </div>
-
-            <div class=\"footer\">
-                <p>Disclaimer: This financial plan is based on the information provided and current market understanding. Investment in securities market are subject to market risks. Read all the related documents carefully before investing. Past performance is not indicative of future results. Consult with your MFD for personalized advice.</p>
-                <p>&copy; {datetime.now().year} Your Financial Planning Service</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
+    generated_at = generated_at or datetime.now()
+    emergency_funds = get_emergency_fund_summaries(reports)
+    return [render_report_document(build_report_context(**report, emergency_fund=emergency_fund), generated_at=generated_at)
+            for report, emergency_fund in zip(reports, emergency_funds)]
 
 # --- PDF Generation using WeasyPrint ---
 def generate_pdf_report(html_content: str, output_pdf_path: str):
     """Converts HTML string to a PDF file using WeasyPrint."""
     try:
+        from weasyprint import HTML, CSS  # only PDF output needs WeasyPrint (and its system libraries), not HTML rendering
         # Use CSS for font definitions, including CJK fonts
         css_string = """
         @font-face {
@@ -222,7 +318,9 @@ if __name__ == "__main__":
         "dob": "1985-07-15", 
         "occupation": "White-Collar",
         "mobile_number": "9876543210",
-        "email": "priya.sharma@example.com"
+        "email": "priya.sharma@example.com",
+        "monthly_emi": 12000,
+        "num_dependents": 2
     }
     sample_profile = {"profile_id": "W8", "description": "Established Professional, Moderate Growth Focus"}
     sample_risk = {"total_score": 65, "risk_rating": "Moderate Growth"}
@@ -231,6 +329,7 @@ if __name__ == "__main__":
         {"goal_type": "Retirement", "target_amount": 10000000, "timeline_years": 20, "priority_rank": 2, "sip_scenarios": {"sip_base_case": 15000}}
     ]
     sample_savings = {
+        "household_monthly_income": 100000,
         "final_monthly_savings_amount": 25000,
         "disposable_monthly_income": 75000,
         "final_applicable_savings_rate": 0.3333,
@@ -245,6 +344,30 @@ if __name__ == "__main__":
         sample_savings, sample_asset_alloc, sample_actions, sample_econ
     )
     
+    context = build_report_context(sample_investor, sample_profile, sample_risk, sample_goals,
+                                   sample_savings, sample_asset_alloc, sample_actions, sample_econ)
+    print(f"Goals section alone:\n{render_report_section('goals', context)}")
+    escaped = generate_investor_report_html({**sample_investor, "name": "<script>alert(1)</script>"}, sample_profile, sample_risk,
+                                            sample_goals, sample_savings, sample_asset_alloc, sample_actions, sample_econ)
+    print(f"Investor-entered markup is escaped: {'<script>' not in escaped and '&lt;script&gt;' in escaped}")
+
+    import time
+    batch = [{"investor_data": {**sample_investor, "name": f"Investor {i}", "num_dependents": i % 4},
+              "profile_details": sample_profile, "risk_assessment": sample_risk,
+              "financial_goals": [{**goal, "target_amount": goal["target_amount"] + i} for goal in sample_goals],
+              "savings_summary": {**sample_savings, "final_monthly_savings_amount": 20000 + i % 1000},
+              "asset_allocation_summary": sample_asset_alloc, "action_plan": sample_actions, "economic_outlook": sample_econ}
+             for i in range(10000)]
+    start_time = time.perf_counter()
+    batch_html = generate_investor_reports_html(batch)
+    elapsed = time.perf_counter() - start_time
+    print(f"10,000-investor batch: {elapsed:.2f}s ({len(batch_html) / elapsed:,.0f} reports/s, {sum(map(len, batch_html)) / len(batch_html) / 1024:.1f} KB each)")
+    start_time = time.perf_counter()
+    for report in batch:
+        render_report_section("goals", {"goals": report["financial_goals"]})
+    elapsed = time.perf_counter() - start_time
+    print(f"Goals section only: {len(batch) / elapsed:,.0f} sections/s")
+
     with open("/home/ubuntu/sample_report.html", "w", encoding="utf-8") as f:
         f.write(html_output)
     print("Sample HTML report saved to /home/ubuntu/sample_report.html")
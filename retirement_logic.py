@@ -0,0 +1,219 @@
+# retirement_logic.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from financial_goals_logic import get_return_rates_for_fund_type, calculate_step_up_sip_grid
+
+# --- Retirement Assumptions (Master for Allocation towards Retirement Fund) ---
+DEFAULT_RETIREMENT_AGE = 60
+RETIREMENT_AGE_RANGE = (55, 65)
+DEFAULT_LONGEVITY_AGE = 85
+DEFAULT_INFLATION_RATE = 0.05
+ACCUMULATION_FUND_TYPE = "Multi Cap Fund"  # timeline > 10 years
+DECUMULATION_FUND_TYPE = "Balanced Advantage"
+RETURN_SCENARIOS = ("worst", "base", "best")
+DEPLETION_TOLERANCE = 1e-4  # shortfalls under 0.01% of a year's withdrawal are SIP rounding, not depletion
+
+def get_scenario_returns(fund_type: str) -> np.ndarray:
+    """(worst, base, best) annual returns for a fund type as an array, for the scenario axis."""
+    return np.array(get_return_rates_for_fund_type(fund_type))
+
+def calculate_retirement_corpus_present_value(
+    monthly_expenses,
+    retirement_ages=DEFAULT_RETIREMENT_AGE,
+    longevity_ages=DEFAULT_LONGEVITY_AGE,
+    post_retirement_returns=None,
+    inflation_rates=DEFAULT_INFLATION_RATE
+) -> np.ndarray:
+    """
+    Corpus needed at retirement, in today's rupees, to fund today's monthly expenses (growing with
+    inflation, withdrawn at the start of each year) until the longevity age. Because withdrawals
+    grow with inflation, the nominal corpus at retirement is this amount inflated to the retirement year.
+    Growing annuity-due: 12 * expenses * (1 - q^D) / (1 - q), q = (1 + inflation) / (1 + return), D = years in retirement.
+    """
+    if post_retirement_returns is None:
+        post_retirement_returns = get_return_rates_for_fund_type(DECUMULATION_FUND_TYPE)[1]
+    monthly_expenses, retirement_ages, longevity_ages, post_retirement_returns, inflation_rates = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (monthly_expenses, retirement_ages, longevity_ages, post_retirement_returns, inflation_rates))
+    )
+    years_in_retirement = np.maximum(longevity_ages - retirement_ages, 0)
+    growth_ratio = (1 + inflation_rates) / (1 + post_retirement_returns)
+    is_level = np.abs(growth_ratio - 1) < 1e-12
+    safe_gap = np.where(is_level, 1.0, 1 - growth_ratio)
+    annuity_factor = np.where(is_level, years_in_retirement, (1 - growth_ratio ** years_in_retirement) / safe_gap)
+    return monthly_expenses * 12 * annuity_factor
+
+def simulate_retirement_batch(
+    current_ages,
+    monthly_expenses,
+    current_corpus=0.0,
+    monthly_sips=0.0,
+    retirement_ages=DEFAULT_RETIREMENT_AGE,
+    longevity_ages=DEFAULT_LONGEVITY_AGE,
+    pre_retirement_returns=None,
+    post_retirement_returns=None,
+    inflation_rates=DEFAULT_INFLATION_RATE,
+    sip_step_up_rates=0.0,
+    return_paths: bool = False
+) -> dict:
+    """
+    Year-by-year retirement cash flows for every investor x return scenario at once.
+    Accumulation: start-of-month SIPs (raised by the step-up each year) compound monthly at the
+    pre-retirement return, as in calculate_sip(). Decumulation: inflation-adjusted annual expenses are
+    withdrawn at the start of each year and the rest earns the post-retirement return, up to the longevity age.
+    Inputs broadcast (e.g. investor columns of shape (N, 1) with scenario returns of shape (1, 3));
+    returns default to the worst/base/best returns of ACCUMULATION_FUND_TYPE and DECUMULATION_FUND_TYPE.
+    Returns arrays: "corpus_at_retirement", "corpus_at_longevity", "depletion_age" (NaN if the money lasts),
+    "is_sustainable", and "corpus_paths" (..., years) if `return_paths`.
+    """
+    if pre_retirement_returns is None:
+        pre_retirement_returns = get_scenario_returns(ACCUMULATION_FUND_TYPE)
+    if post_retirement_returns is None:
+        post_retirement_returns = get_scenario_returns(DECUMULATION_FUND_TYPE)
+    (current_ages, monthly_expenses, current_corpus, monthly_sips, retirement_ages, longevity_ages,
+     pre_retirement_returns, post_retirement_returns, inflation_rates, sip_step_up_rates) = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (
+            current_ages, monthly_expenses, current_corpus, monthly_sips, retirement_ages, longevity_ages,
+            pre_retirement_returns, post_retirement_returns, inflation_rates, sip_step_up_rates))
+    )
+    monthly_rate = pre_retirement_returns / 12
+    has_return = monthly_rate > 0
+    yearly_growth = (1 + monthly_rate) ** 12
+    sip_year_factor = np.where(has_return, (yearly_growth - 1) / (monthly_rate + ~has_return) * (1 + monthly_rate), 12.0)
+
+    num_years = int(np.max(longevity_ages - current_ages, initial=0))
+    corpus = current_corpus.copy()
+    corpus_at_retirement = np.where(current_ages >= retirement_ages, corpus, 0.0)
+    depletion_age = np.full(corpus.shape, np.nan)
+    corpus_paths = np.zeros(corpus.shape + (num_years + 1,)) if return_paths else None
+    if return_paths:
+        corpus_paths[..., 0] = corpus
+
+    for year in range(num_years):
+        age = current_ages + year
+        is_accumulating = age < retirement_ages
+        is_retired = ~is_accumulating & (age < longevity_ages)
+
+        annual_sip_value = monthly_sips * (1 + sip_step_up_rates) ** year * sip_year_factor
+        accumulated = corpus * yearly_growth + annual_sip_value
+
+        withdrawal = monthly_expenses * 12 * (1 + inflation_rates) ** year
+        newly_depleted = is_retired & np.isnan(depletion_age) & (corpus < withdrawal * (1 - DEPLETION_TOLERANCE))
+        depletion_age = np.where(newly_depleted, age, depletion_age)
+        decumulated = np.maximum(corpus - withdrawal, 0) * (1 + post_retirement_returns)
+
+        corpus = np.where(is_accumulating, accumulated, np.where(is_retired, decumulated, corpus))
+        corpus_at_retirement = np.where(age + 1 == retirement_ages, corpus, corpus_at_retirement)
+        if return_paths:
+            corpus_paths[..., year + 1] = corpus
+
+    results = {
+        "corpus_at_retirement": corpus_at_retirement,
+        "corpus_at_longevity": corpus,
+        "depletion_age": depletion_age,
+        "is_sustainable": np.isnan(depletion_age)
+    }
+    if return_paths:
+        results["corpus_paths"] = corpus_paths
+    return results
+
+def solve_retirement_plan_batch(
+    current_ages,
+    monthly_expenses,
+    current_corpus=0.0,
+    retirement_ages=DEFAULT_RETIREMENT_AGE,
+    longevity_ages=DEFAULT_LONGEVITY_AGE,
+    pre_retirement_returns=None,
+    post_retirement_returns=None,
+    inflation_rates=DEFAULT_INFLATION_RATE,
+    sip_step_up_rates=0.0
+) -> dict:
+    """
+    Closed-form corpus and starting monthly SIP needed so the money lasts to the longevity age.
+    Returns "required_corpus" (nominal, at retirement) and "required_monthly_sip" (0 if the current
+    corpus already suffices); broadcasting and defaults as in simulate_retirement_batch().
+    """
+    if pre_retirement_returns is None:
+        pre_retirement_returns = get_scenario_returns(ACCUMULATION_FUND_TYPE)
+    if post_retirement_returns is None:
+        post_retirement_returns = get_scenario_returns(DECUMULATION_FUND_TYPE)
+    current_ages, retirement_ages, inflation_rates = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (current_ages, retirement_ages, inflation_rates))
+    )
+    years_to_retirement = np.maximum(retirement_ages - current_ages, 0)
+    required_corpus = calculate_retirement_corpus_present_value(
+        monthly_expenses, retirement_ages, longevity_ages, post_retirement_returns, inflation_rates
+    ) * (1 + inflation_rates) ** years_to_retirement
+    required_monthly_sip = calculate_step_up_sip_grid(
+        required_corpus, years_to_retirement, pre_retirement_returns, sip_step_up_rates, current_corpus
+    )
+    return {"required_corpus": required_corpus, "required_monthly_sip": required_monthly_sip}
+
+def assess_retirement_readiness_batch(investors: pd.DataFrame, **assumptions) -> pd.DataFrame:
+    """
+    Book-wide retirement readiness for the worst/base/best scenarios.
+    `investors` needs current_age and monthly_household_expenses, and optionally retirement_corpus,
+    monthly_sip, retirement_age and longevity_age. Extra keyword arguments override the assumptions
+    of simulate_retirement_batch(). Returns one row per investor with, per scenario, the projected and
+    required corpus, the required SIP, the depletion age and readiness (projected / required corpus).
+    """
+    def column(name, default):
+        values = investors[name].fillna(default) if name in investors else pd.Series(default, index=investors.index)
+        return values.to_numpy(dtype=float)[:, None]
+
+    inputs = {
+        "current_ages": column("current_age", 0),
+        "monthly_expenses": column("monthly_household_expenses", 0),
+        "current_corpus": column("retirement_corpus", 0),
+        "retirement_ages": column("retirement_age", DEFAULT_RETIREMENT_AGE),
+        "longevity_ages": column("longevity_age", DEFAULT_LONGEVITY_AGE),
+        **assumptions
+    }
+    simulation = simulate_retirement_batch(monthly_sips=column("monthly_sip", 0), **inputs)
+    plan = solve_retirement_plan_batch(**inputs)
+
+    readiness = pd.DataFrame(index=investors.index)
+    for scenario_index, scenario in enumerate(RETURN_SCENARIOS):
+        required_corpus = np.broadcast_to(plan["required_corpus"], simulation["corpus_at_retirement"].shape)[:, scenario_index]
+        projected_corpus = simulation["corpus_at_retirement"][:, scenario_index]
+        readiness[f"projected_corpus_{scenario}"] = np.round(projected_corpus, 0)
+        readiness[f"required_corpus_{scenario}"] = np.round(required_corpus, 0)
+        readiness[f"required_monthly_sip_{scenario}"] = np.broadcast_to(plan["required_monthly_sip"], simulation["corpus_at_retirement"].shape)[:, scenario_index]
+        readiness[f"depletion_age_{scenario}"] = simulation["depletion_age"][:, scenario_index]
+        readiness[f"readiness_ratio_{scenario}"] = np.round(np.divide(projected_corpus, required_corpus, out=np.ones_like(required_corpus), where=required_corpus > 0), 3)
+    return readiness
+
+if __name__ == "__main__":
+    print("--- Test Cases for Retirement Logic ---")
+
+    present_value = calculate_retirement_corpus_present_value(25000).item()
+    print(f"Corpus for ₹25,000/month from 60 to 85, in today's rupees: ₹{present_value:,.0f} (vs flat 20x annual expenses: ₹{25000 * 12 * 20:,.0f})")
+
+    plan = solve_retirement_plan_batch(35, 25000, current_corpus=200000)
+    print("Age 35, ₹25,000/month, ₹2,00,000 saved (worst/base/best):")
+    print(f"  Required corpus at 60: {np.round(plan['required_corpus'], 0)}")
+    print(f"  Required monthly SIP: {plan['required_monthly_sip']}")
+    check = simulate_retirement_batch(35, 25000, 200000, plan["required_monthly_sip"])
+    print(f"  Simulated with those SIPs, money lasts to 85: {check['is_sustainable']}, corpus left: {np.round(check['corpus_at_longevity'], 0)}")
+    short = simulate_retirement_batch(35, 25000, 200000, plan["required_monthly_sip"] * 0.7)
+    print(f"  At 70% of those SIPs, depletion age: {short['depletion_age']}")
+    stepped = solve_retirement_plan_batch(35, 25000, current_corpus=200000, sip_step_up_rates=0.05)
+    print(f"  Starting SIP with a 5% annual step-up: {stepped['required_monthly_sip']}")
+
+    rng = np.random.default_rng(11)
+    num_investors = 100000
+    book = pd.DataFrame({
+        "current_age": rng.integers(22, 60, num_investors),
+        "monthly_household_expenses": rng.integers(10, 150, num_investors) * 1000.0,
+        "retirement_corpus": rng.choice([0.0, 100000.0, 1000000.0], num_investors),
+        "monthly_sip": rng.integers(0, 60, num_investors) * 500.0
+    })
+    start_time = time.perf_counter()
+    readiness = assess_retirement_readiness_batch(book)
+    print(f"\nRetirement readiness for {num_investors} investors x 3 scenarios in {time.perf_counter() - start_time:.2f}s")
+    for scenario in RETURN_SCENARIOS:
+        print(f"  {scenario}: {(readiness[f'readiness_ratio_{scenario}'] >= 1).mean():.1%} on track, "
+              f"{readiness[f'depletion_age_{scenario}'].notna().mean():.1%} run out before {DEFAULT_LONGEVITY_AGE}")
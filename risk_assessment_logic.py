@@ -3,6 +3,10 @@
 from datetime import datetime, date
 import json
 
+from emergency_fund_logic import calculate_emergency_fund_requirement, derive_essential_monthly_expenses
+from profiling_logic import assign_investor_profile
+from savings_logic import calculate_savings_details
+
 # Assuming profiling_logic.calculate_age can be imported or is available
 # For now, let's redefine it here if it's simple enough or assume it's passed.
 
@@ -39,43 +43,24 @@ def calculate_required_emergency_fund(
     occupation: str,
     monthly_rent: float,
     monthly_emi: float,
-    # Framework implies essential expenses. Using a simplified proxy for now.
-    # A more detailed approach would be: total_household_monthly_income - (rent + emi + other_essential_non_discretionary_expenses)
-    # For now, let's use a percentage of income as proxy for essential expenses if rent/emi are not comprehensive.
-    # The framework (Part 1, Sec 10) mentions 3-6 months of expenses.
-    # The app.py used: total_income - (total_income * 0.2) as monthly_expenses proxy.
-    # Let's use a simple proxy: (total_household_monthly_income - monthly_rent - monthly_emi) if this is positive, else a fraction of income.
-    # Or, more directly, the framework says X months of *expenses*. If we assume savings rate of Y%, then expenses are (1-Y%) * income.
-    # Let's use a simple proxy for monthly expenses: 70% of total household income, or income - rent - emi if that's lower and positive.
-    # Framework (Part 1, Sec 10) suggests 3 months for White-Collar, 6 months for Blue-Collar.
+    profile_id: str = None, # e.g. "W5"; unassigned profiles use the framework's 2-4 month base range
+    num_dependents: int = 0
 ) -> float:
     """
-    Calculates the required emergency fund based on framework guidelines (simplified).
+    Calculates the required emergency fund with the profile-driven engine (emergency_fund_logic).
+    Essential monthly expenses are household income less the framework's calculated monthly savings.
     """
     if total_household_monthly_income <= 0:
         return 0.0
-
-    # Simplified monthly expenses proxy
-    # Option 1: Fixed percentage (e.g., 70% of income)
-    # monthly_expenses_proxy = total_household_monthly_income * 0.70
-    # Option 2: Income net of major fixed costs, if substantial
-    net_income_after_housing = total_household_monthly_income - monthly_rent - monthly_emi
-    if net_income_after_housing > (total_household_monthly_income * 0.20): # Ensure it's a reasonable amount for expenses
-        monthly_expenses_proxy = net_income_after_housing * 0.8 # Assuming 80% of this remainder is essential
-    else:
-        monthly_expenses_proxy = total_household_monthly_income * 0.60 # Fallback to 60% of gross as essential
-    
-    if monthly_expenses_proxy < 0: monthly_expenses_proxy = 0
-
-    required_months = 0
-    if occupation == "Blue-Collar":
-        required_months = 6
-    elif occupation == "White-Collar":
-        required_months = 3
-    else: # Default or unknown
-        required_months = 4 # Average
-        
-    return required_months * monthly_expenses_proxy
+    savings = calculate_savings_details({
+        "individual_monthly_income": total_household_monthly_income,
+        "occupation": occupation,
+        "monthly_rent": monthly_rent,
+        "monthly_emi": monthly_emi
+    })
+    return calculate_emergency_fund_requirement(
+        profile_id, derive_essential_monthly_expenses(savings), monthly_emi, monthly_rent, num_dependents
+    )["required_emergency_fund"]
 
 def calculate_risk_score(
     dob_str: str, # YYYY-MM-DD
@@ -128,7 +113,8 @@ def calculate_risk_score(
     score_details["stated_risk_preferences"] = round(stated_risk_points, 2)
 
     # 2. Emergency Fund Adequacy (Max 20 points)
-    required_fund = calculate_required_emergency_fund(total_household_monthly_income, occupation, monthly_rent, monthly_emi)
+    profile_id = assign_investor_profile(occupation, dob_str, total_household_monthly_income, num_dependents, plan_in_action_date_str)
+    required_fund = calculate_required_emergency_fund(total_household_monthly_income, occupation, monthly_rent, monthly_emi, profile_id, num_dependents)
     emergency_points = 0
     if required_fund > 0:
         adequacy_ratio = current_emergency_fund / required_fund
@@ -226,7 +212,7 @@ if __name__ == "__main__":
         occupation="White-Collar",
         total_household_monthly_income=120000,
         num_dependents=0,
-        current_emergency_fund=500000, # Required for 120k income, WC (3mo) = 3 * (120k*0.6) = 216k. Ratio > 1.5 -> 20pts
+        current_emergency_fund=500000, # Expenses 120k - 21k savings = 99k; base 4mo x 2.0 (rent + EMI) = 8mo -> 792k. Ratio 0.63 -> 9pts
         monthly_rent=20000,
         monthly_emi=5000, # DSR = 25k/120k = 0.208 -> 9 pts
         market_linked_experience="Yes", # 5 pts
@@ -234,12 +220,12 @@ if __name__ == "__main__":
         # Age 30 -> 15 pts (Lifecycle)
         # Income 120k, WC -> 8+2 = 10 pts (Income Stability)
         # Dependents 0 -> 5 pts
-        # Total = 15(stated) + 20(emergency) + 9(debt) + 15(lifecycle) + 10(income) + 5(deps) + 5(exp) = 79
+        # Total = 15(stated) + 9(emergency) + 9(debt) + 15(lifecycle) + 10(income) + 5(deps) + 5(exp) = 68
     )
     rating1 = get_risk_rating(score1)
     print(f"Test 1 Score: {score1}, Rating: {rating1}")
     print(f"Details 1: {json.dumps(details1, indent=2)}")
-    # Expected around 79 (High)
+    # Expected around 68 (High)
 
     # Test Case 2: Older, lower income, blue-collar, many dependents, low emergency fund, high debt, no experience
     score2, details2 = calculate_risk_score(
@@ -247,7 +233,7 @@ if __name__ == "__main__":
         occupation="Blue-Collar",
         total_household_monthly_income=25000,
         num_dependents=3,
-        current_emergency_fund=10000, # Required for 25k income, BC (6mo) = 6 * (25k*0.6) = 90k. Ratio <0.25 -> 2pts
+        current_emergency_fund=10000, # Expenses 22.5k; base 4mo x 2.0 (rent + EMI) x 1.5 (3 deps), capped at 8mo -> 180k. Ratio <0.25 -> 2pts
         monthly_rent=5000,
         monthly_emi=8000, # DSR = 13k/25k = 0.52 -> 0 pts
         market_linked_experience="No", # 1 pt
@@ -1,6 +1,10 @@
 # savings_logic.py
 
-from typing import Dict, Any
+import time
+import random
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
 
 # --- Framework Definitions (Part 1, Section 8 & 9) ---
 
@@ -50,20 +54,76 @@ MAX_TOTAL_DEPENDENT_DEDUCTION_RATE = 0.30
 MAX_DISPOSABLE_INCOME_AS_FRACTION_OF_HOUSEHOLD = 0.70
 MIN_SAVINGS_RATE_OF_HOUSEHOLD_INCOME = 0.10
 
-# Annual Savings Adjustment Rates (Framework Part 1, Section 9 - simplified placeholder)
-ANNUAL_ADJUSTMENT_RATES_PLACEHOLDER: Dict[str, Dict[str, float]] = {
+# Annual Savings Adjustment Rates (Framework Part 1, Section 9)
+# B8 has no fallback rate in the framework ("N/A"), so it keeps its base rate in a slowdown.
+ANNUAL_ADJUSTMENT_RATES: Dict[str, Dict[str, float]] = {
     "default": {"base_rate": 0.05, "fallback_rate": 0.025},
     "W1": {"base_rate": 0.07, "fallback_rate": 0.035},
-    "B8": {"base_rate": 0.04, "fallback_rate": 0.02},
+    "W2": {"base_rate": 0.06, "fallback_rate": 0.03},
+    "W3": {"base_rate": 0.05, "fallback_rate": 0.025},
+    "W4": {"base_rate": 0.06, "fallback_rate": 0.03},
+    "W5": {"base_rate": 0.05, "fallback_rate": 0.025},
+    "W6": {"base_rate": 0.04, "fallback_rate": 0.02},
+    "W7": {"base_rate": 0.05, "fallback_rate": 0.025},
+    "W8": {"base_rate": 0.04, "fallback_rate": 0.02},
+    "W9": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "W10": {"base_rate": 0.04, "fallback_rate": 0.02},
+    "W11": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "W12": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "W13": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "W14": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "W15": {"base_rate": 0.01, "fallback_rate": 0.005},
+    "B1": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "B2": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "B3": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B4": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "B5": {"base_rate": 0.03, "fallback_rate": 0.015},
+    "B6": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B7": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B8": {"base_rate": 0.03, "fallback_rate": 0.03},
+    "B9": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B10": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B11": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B12": {"base_rate": 0.01, "fallback_rate": 0.005},
+    "B13": {"base_rate": 0.02, "fallback_rate": 0.01},
+    "B14": {"base_rate": 0.01, "fallback_rate": 0.005},
+    "B15": {"base_rate": 0.01, "fallback_rate": 0.005},
 }
 
+# The fallback rate applies in an economic slowdown to low-income profiles only (Framework Part 1, Section 9,
+# Modifiers); every other profile keeps its base rate.
+SLOWDOWN_FALLBACK_PROFILES = frozenset({"W1", "W4", "W7", "W10", "W13", "B1", "B4", "B7", "B10", "B13"})
+
+# Adjustment Rate Modifiers (Framework Part 1, Section 9)
+ADJUSTMENT_HOME_OWNERSHIP_BONUS = 0.005
+ADJUSTMENT_NO_EMI_BONUS = 0.005
+ADJUSTMENT_GOAL_COMPLETED_BONUS_PER_DEPENDENT = 0.005
+ADJUSTMENT_MAX_GOAL_COMPLETED_BONUS = 0.015
+ADJUSTMENT_RURAL_BONUS = 0.005
+
+DEFAULT_PROJECTION_YEARS = 30
+
+# Economic conditions of the adjustment rate; map the shared regime snapshot with
+# economic_regime_logic.regime_economic_condition() rather than deriving one per investor.
+ECONOMIC_CONDITIONS = ("Normal", "Slowdown")
+
 def get_annual_savings_adjustment_rate(profile_id: str, economic_condition: str = "Normal") -> float:
-    """Gets the annual savings adjustment rate for a given profile and economic condition."""
-    profile_rates = ANNUAL_ADJUSTMENT_RATES_PLACEHOLDER.get(profile_id, ANNUAL_ADJUSTMENT_RATES_PLACEHOLDER["default"])
-    if economic_condition == "Slowdown":
+    """
+    Gets the annual savings adjustment rate for a given profile and economic condition ("Normal" or "Slowdown").
+    A slowdown lowers the rate to the fallback rate for SLOWDOWN_FALLBACK_PROFILES only.
+    """
+    if economic_condition not in ECONOMIC_CONDITIONS:
+        raise ValueError(f"Unknown economic condition '{economic_condition}'. Choose from {ECONOMIC_CONDITIONS}.")
+    profile_rates = ANNUAL_ADJUSTMENT_RATES.get(profile_id, ANNUAL_ADJUSTMENT_RATES["default"])
+    if economic_condition == "Slowdown" and profile_id in SLOWDOWN_FALLBACK_PROFILES:
         return profile_rates["fallback_rate"]
     return profile_rates["base_rate"]
 
+def round_savings_amount(amount):
+    """Framework rounding for savings: nearest 100 below 4,000, else nearest 500. Works on scalars and arrays."""
+    rounding_step = 500.0 - 400.0 * (np.asarray(amount) < 4000)
+    return np.rint(amount / rounding_step) * rounding_step
+
 def calculate_savings_details(investor_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Calculates detailed savings information based on investor data and framework rules.
@@ -163,6 +223,360 @@ def calculate_savings_details(investor_data: Dict[str, Any]) -> Dict[str, Any]:
 
     return results
 
+# --- Batch (Columnar) Savings Engine ---
+BATCH_SAVINGS_RESULT_KEYS = [
+    "household_monthly_income", "total_dependent_deduction_rate", "dependent_deduction_amount",
+    "disposable_monthly_income", "base_savings_rate_from_slab", "total_modifiers_bonus_rate",
+    "final_applicable_savings_rate", "calculated_savings_from_disposable",
+    "min_savings_based_on_household_income", "final_monthly_savings_amount",
+    "blended_savings_rate_of_household_income", "feasibility_index"
+]
+
+def explode_dependents(dependents_per_investor: List[list]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flattens per-investor dependent lists ([{"age": 8}, ...]) into columnar arrays.
+    Returns (dependent_investor_index, dependent_ages), preserving dependent order within each investor.
+    """
+    owners, ages = [], []
+    for investor_index, dependents in enumerate(dependents_per_investor):
+        for dep in dependents or []:
+            owners.append(investor_index)
+            ages.append(dep.get("age", 0))
+    return np.asarray(owners, dtype=np.int64), np.asarray(ages, dtype=float)
+
+def round_2dp(values: np.ndarray) -> np.ndarray:
+    """
+    Rounds to 2 decimals exactly like Python's round(x, 2) (correctly rounded, half-even).
+    np.round scales by 100 first, which can land exactly on a half-cent "tie" that the true
+    value is slightly above or below; the exact rounding error of the scaling (Dekker's
+    two-product) decides those cases without falling back to Python. Exact ties stay half-even.
+    """
+    shape = np.shape(values)
+    values = np.ravel(np.asarray(values, dtype=float))
+    scaled = values * 100.0
+    cents = np.rint(scaled)
+    tie_index = np.flatnonzero((scaled - np.floor(scaled)) == 0.5)
+    if tie_index.size:
+        tie_values = values[tie_index]
+        split = 134217729.0 * tie_values  # Veltkamp split: 2**27 + 1
+        values_hi = split - (split - tie_values)
+        values_lo = tie_values - values_hi
+        scaling_error = (values_hi * 100.0 - scaled[tie_index]) + values_lo * 100.0  # 100.0 splits exactly (hi=100, lo=0)
+        inexact = scaling_error != 0
+        cents[tie_index[inexact]] = np.floor(scaled[tie_index[inexact]]) + (scaling_error[inexact] > 0)
+    return (cents / 100.0).reshape(shape)
+
+def _build_slab_lookup(blue_collar_slabs: list, white_collar_slabs: list, bound_key: str, value_key: str):
+    """
+    Stacks Blue-/White-Collar slab lists into (upper_bounds, values) matrices indexed by
+    [is_white_collar, slab]. The last upper bound of each list is float("inf") and is dropped.
+    """
+    upper_bounds = np.array([[row[bound_key] for row in slabs[:-1]] for slabs in (blue_collar_slabs, white_collar_slabs)], dtype=float)
+    slab_values = np.array([[row[value_key] for row in slabs] for slabs in (blue_collar_slabs, white_collar_slabs)], dtype=float)
+    return upper_bounds, slab_values
+
+SAVINGS_SLAB_LOOKUP = _build_slab_lookup(BLUE_COLLAR_SAVINGS_SLABS, WHITE_COLLAR_SAVINGS_SLABS, "max_disposable_income", "rate")
+SPOUSE_MODIFIER_LOOKUP = _build_slab_lookup(BC_SPOUSE_INCOME_MODIFIERS, WC_SPOUSE_INCOME_MODIFIERS, "max_ratio", "bonus")
+
+def _lookup_slab_values(values: np.ndarray, is_white_collar: np.ndarray, slab_lookup) -> np.ndarray:
+    """Vectorized first-match slab lookup (value <= upper bound) per occupation."""
+    upper_bounds, slab_values = slab_lookup
+    # Count the bounds exceeded per occupation in int8, then pick the occupation arithmetically: cheaper
+    # than selecting each row's bounds with np.where.
+    blue_collar_index, white_collar_index = np.zeros((2, len(values)), dtype=np.int8)
+    for blue_collar_bound, white_collar_bound in upper_bounds.T:
+        blue_collar_index += values > blue_collar_bound
+        white_collar_index += values > white_collar_bound
+    white_collar_index += np.int8(slab_values.shape[1])
+    white_collar_index -= blue_collar_index
+    white_collar_index *= is_white_collar.view(np.int8)
+    blue_collar_index += white_collar_index
+    return np.take(slab_values.ravel(), blue_collar_index)
+
+ZERO_INCOME_RESULT_KEYS = (
+    "total_dependent_deduction_rate", "dependent_deduction_amount", "disposable_monthly_income", "base_savings_rate_from_slab",
+    "total_modifiers_bonus_rate", "final_applicable_savings_rate", "calculated_savings_from_disposable",
+    "min_savings_based_on_household_income", "final_monthly_savings_amount", "feasibility_index"
+)
+
+# Rows per block: keeps the ~30 temporaries of a block inside the CPU cache, which matters
+# more than NumPy call overhead once books reach tens of thousands of investors.
+BATCH_BLOCK_SIZE = 8192
+
+def _calculate_savings_block(
+    individual_income, spouse_income, monthly_rent, monthly_emi, goals_completed,
+    is_white_collar, is_rural, owns_home, total_dependent_deduction_rate
+) -> Dict[str, np.ndarray]:
+    """Savings computation for one block of rows (see calculate_savings_details_batch)."""
+    # Branch-free selection: boolean masks multiply as exact 0/1 factors, which is much cheaper
+    # than np.where on randomly mixed books. Denominators are made safe (1.0) where masked out.
+    household_income = individual_income + spouse_income
+    has_income = household_income > 0
+    safe_household_income = household_income * has_income + ~has_income
+
+    total_dependent_deduction_rate = np.minimum(total_dependent_deduction_rate, MAX_TOTAL_DEPENDENT_DEDUCTION_RATE)
+    dependent_deduction_amount = household_income * total_dependent_deduction_rate
+
+    disposable_income = household_income - monthly_rent - monthly_emi - dependent_deduction_amount
+    disposable_income = np.maximum(0, np.minimum(disposable_income, household_income * MAX_DISPOSABLE_INCOME_AS_FRACTION_OF_HOUSEHOLD))
+    has_disposable = disposable_income > 0
+
+    base_savings_rate = _lookup_slab_values(disposable_income, is_white_collar, SAVINGS_SLAB_LOOKUP)
+
+    # Modifiers are accumulated in the same order as the scalar function so float sums match bit for bit.
+    modifier_bonus_rate = is_rural * RURAL_SAVINGS_BONUS_RATE
+    modifier_bonus_rate = modifier_bonus_rate + owns_home * HOME_OWNERSHIP_BONUS_RATE
+    modifier_bonus_rate = modifier_bonus_rate + (monthly_emi == 0) * NO_EMI_BONUS_RATE
+    modifier_bonus_rate = modifier_bonus_rate + np.minimum(goals_completed * GOAL_COMPLETED_BONUS_PER_DEPENDENT, MAX_GOAL_COMPLETED_BONUS)
+    spouse_income_ratio = spouse_income / safe_household_income
+    spouse_bonus = _lookup_slab_values(spouse_income_ratio, is_white_collar, SPOUSE_MODIFIER_LOOKUP)
+    modifier_bonus_rate = modifier_bonus_rate + (has_income & (spouse_income > 0)) * spouse_bonus
+
+    final_applicable_savings_rate = base_savings_rate + modifier_bonus_rate
+    calculated_savings = disposable_income * final_applicable_savings_rate
+    min_savings_household = household_income * MIN_SAVINGS_RATE_OF_HOUSEHOLD_INCOME
+
+    final_savings = np.maximum(calculated_savings, min_savings_household) * has_disposable
+    final_savings = round_savings_amount(final_savings)
+
+    blended_rate = ((final_savings / safe_household_income) * 100) * has_income
+    safe_disposable_income = disposable_income + ~has_disposable
+    feasibility_index = (((disposable_income - final_savings) / safe_disposable_income) * 100) * has_disposable
+    feasibility_index = np.maximum(0, feasibility_index)
+
+    results = {
+        "household_monthly_income": household_income,
+        "total_dependent_deduction_rate": total_dependent_deduction_rate,
+        "dependent_deduction_amount": round_2dp(dependent_deduction_amount),
+        "disposable_monthly_income": round_2dp(disposable_income),
+        "base_savings_rate_from_slab": base_savings_rate,
+        "total_modifiers_bonus_rate": modifier_bonus_rate,
+        "final_applicable_savings_rate": final_applicable_savings_rate,
+        "calculated_savings_from_disposable": round_2dp(calculated_savings),
+        "min_savings_based_on_household_income": round_2dp(min_savings_household),
+        "final_monthly_savings_amount": final_savings,
+        "blended_savings_rate_of_household_income": round_2dp(blended_rate),
+        "feasibility_index": round_2dp(feasibility_index)
+    }
+    # Investors without household income get all zeros, like the scalar early return. They are few, so
+    # zeroing them by index is cheaper than multiplying every result by the mask.
+    no_income = np.flatnonzero(~has_income)
+    if no_income.size:
+        for key in ZERO_INCOME_RESULT_KEYS:
+            results[key][no_income] = 0.0
+    return results
+
+def calculate_savings_details_batch(
+    investors,
+    dependent_investor_index=None,
+    dependent_ages=None
+) -> Dict[str, np.ndarray]:
+    """
+    Columnar version of calculate_savings_details() for a whole book of investors.
+    `investors` is a pandas DataFrame or a dict of equal-length arrays keyed like the scalar
+    investor_data dict (dependents excluded). Dependents are passed exploded: one entry per
+    dependent with the row position of its investor (see explode_dependents()).
+    Returns a dict of arrays keyed like the scalar results; values match the scalar function exactly.
+    """
+    num_investors = len(investors["occupation"])
+
+    def column(name, default):
+        if name in investors:
+            return np.asarray(investors[name], dtype=float)
+        return np.full(num_investors, default, dtype=float)
+
+    individual_income = column("individual_monthly_income", 0.0)
+    spouse_income = column("spouse_monthly_income", 0.0)
+    monthly_rent = column("monthly_rent", 0.0)
+    monthly_emi = column("monthly_emi", 0.0)
+    goals_completed = column("num_education_marriage_goals_completed_for_dependents", 0)
+    is_white_collar = np.asarray(investors["occupation"]) == "White-Collar"
+    is_rural = np.asarray(investors["urban_rural_status"]) == "Rural" if "urban_rural_status" in investors else np.zeros(num_investors, dtype=bool)
+    owns_home = np.asarray(investors["home_ownership"]).astype(bool) if "home_ownership" in investors else np.zeros(num_investors, dtype=bool)
+
+    # Dependent deduction: first matching band per dependent, summed per investor in dependent order.
+    total_dependent_deduction_rate = np.zeros(num_investors)
+    if dependent_ages is not None and len(dependent_ages) > 0:
+        ages = np.asarray(dependent_ages, dtype=float)
+        dependent_rates = np.zeros(len(ages))
+        matched = np.zeros(len(ages), dtype=bool)
+        for rate_info in DEPENDENT_DEDUCTION_RATES:
+            in_band = ~matched & (ages >= rate_info["min_age"]) & (ages <= rate_info["max_age"])
+            dependent_rates += in_band * rate_info["rate"]
+            matched |= in_band
+        total_dependent_deduction_rate = np.bincount(
+            np.asarray(dependent_investor_index, dtype=np.int64), weights=dependent_rates, minlength=num_investors
+        )
+
+    results = {key: np.empty(num_investors) for key in BATCH_SAVINGS_RESULT_KEYS}
+    for start in range(0, num_investors, BATCH_BLOCK_SIZE):
+        block = slice(start, start + BATCH_BLOCK_SIZE)
+        block_results = _calculate_savings_block(
+            individual_income[block], spouse_income[block], monthly_rent[block], monthly_emi[block],
+            goals_completed[block], is_white_collar[block], is_rural[block], owns_home[block],
+            total_dependent_deduction_rate[block]
+        )
+        for key, values in block_results.items():
+            results[key][block] = values
+    return results
+
+# --- Multi-Year Savings Trajectory (Framework Part 1, Sections 8 & 9) ---
+def get_annual_adjustment_rates_batch(investors, profile_ids) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-investor (normal, slowdown) annual adjustment rates: the profile's base/fallback rate
+    plus the Section 9 modifiers (home ownership, no EMI, completed dependent goals, rural).
+    Profiles outside SLOWDOWN_FALLBACK_PROFILES keep their base rate in a slowdown.
+    """
+    profile_ids = np.asarray(profile_ids, dtype=object)
+    num_investors = len(profile_ids)
+    unique_ids, inverse = np.unique(profile_ids.astype(str), return_inverse=True)
+    profile_rates = [ANNUAL_ADJUSTMENT_RATES.get(pid, ANNUAL_ADJUSTMENT_RATES["default"]) for pid in unique_ids]
+    base_rates = np.array([rates["base_rate"] for rates in profile_rates])[inverse]
+    fallback_rates = np.array([
+        rates["fallback_rate"] if pid in SLOWDOWN_FALLBACK_PROFILES else rates["base_rate"]
+        for pid, rates in zip(unique_ids, profile_rates)
+    ])[inverse]
+
+    def column(name, default):
+        if name in investors:
+            return np.asarray(investors[name])
+        return np.full(num_investors, default)
+
+    modifier = column("home_ownership", False).astype(bool) * ADJUSTMENT_HOME_OWNERSHIP_BONUS
+    modifier = modifier + (column("monthly_emi", 0.0).astype(float) == 0) * ADJUSTMENT_NO_EMI_BONUS
+    goals_completed = column("num_education_marriage_goals_completed_for_dependents", 0).astype(float)
+    modifier = modifier + np.minimum(goals_completed * ADJUSTMENT_GOAL_COMPLETED_BONUS_PER_DEPENDENT, ADJUSTMENT_MAX_GOAL_COMPLETED_BONUS)
+    modifier = modifier + (column("urban_rural_status", "") == "Rural") * ADJUSTMENT_RURAL_BONUS
+    return base_rates + modifier, fallback_rates + modifier
+
+def project_savings_trajectory_batch(
+    investors,
+    profile_ids,
+    dependent_investor_index=None,
+    dependent_ages=None,
+    num_years: int = DEFAULT_PROJECTION_YEARS,
+    slowdown_years=None
+) -> Dict[str, np.ndarray]:
+    """
+    Projects monthly savings for a whole book, year by year.
+    Year 0 is today's final_monthly_savings_amount. Each later year escalates the previous year's
+    amount by the investor's adjustment rate (fallback rate in years listed in `slowdown_years`);
+    the reported amount is rounded per the framework, while the escalation carries the unrounded
+    amount so small raises are not swallowed by the ₹500 rounding step. Dependents are aged forward one year at a time, and the
+    escalated amount is scaled by how the aged dependents change the savings calculation.
+    Inputs are the same columnar inputs as calculate_savings_details_batch(), plus profile IDs.
+    Returns "years", "monthly_savings" (investors x years+1), "annual_adjustment_rates"
+    (investors x years) and "book_monthly_savings" (total per year).
+    """
+    slowdown_years = set(slowdown_years or [])
+    num_investors = len(profile_ids)
+    investors = {key: np.asarray(values) for key, values in investors.items()}  # convert once, reused every year
+    normal_rates, slowdown_rates = get_annual_adjustment_rates_batch(investors, profile_ids)
+    if dependent_ages is None:
+        dependent_investor_index, dependent_ages = np.zeros(0, dtype=np.int64), np.zeros(0)
+    dependent_ages = np.asarray(dependent_ages, dtype=float)
+
+    base_savings = calculate_savings_details_batch(investors, dependent_investor_index, dependent_ages)["final_monthly_savings_amount"]
+    has_savings = base_savings > 0
+    safe_base_savings = base_savings + ~has_savings
+    has_dependents = np.bincount(np.asarray(dependent_investor_index, dtype=np.int64), minlength=num_investors) > 0
+
+    monthly_savings = np.zeros((num_investors, num_years + 1))
+    adjustment_rates = np.zeros((num_investors, num_years))
+    monthly_savings[:, 0] = base_savings
+    escalated_savings = base_savings
+    dependent_factor = np.ones(num_investors)
+    for year in range(1, num_years + 1):
+        year_rates = slowdown_rates if year in slowdown_years else normal_rates
+        adjustment_rates[:, year - 1] = year_rates
+        escalated_savings = escalated_savings * (1 + year_rates)
+
+        # Only investors with dependents need the savings calculation redone; it uses today's
+        # income and expenses so the factor isolates the effect of the dependents' new ages.
+        if has_dependents.any():
+            aged_savings = calculate_savings_details_batch(
+                investors, dependent_investor_index, dependent_ages + year
+            )["final_monthly_savings_amount"]
+            dependent_factor = (aged_savings / safe_base_savings) * has_savings
+        monthly_savings[:, year] = round_savings_amount(escalated_savings * dependent_factor)
+
+    return {
+        "years": np.arange(num_years + 1),
+        "monthly_savings": monthly_savings,
+        "annual_adjustment_rates": adjustment_rates,
+        "book_monthly_savings": monthly_savings.sum(axis=0)
+    }
+
+def project_savings_trajectory(
+    investor_data: Dict[str, Any],
+    profile_id: str,
+    num_years: int = DEFAULT_PROJECTION_YEARS,
+    slowdown_years=None
+) -> List[Dict[str, Any]]:
+    """Single-investor trajectory: list of {"year", "monthly_savings", "adjustment_rate"}."""
+    investors = {key: [value] for key, value in investor_data.items() if key != "dependents"}
+    owner_index, ages = explode_dependents([investor_data.get("dependents") or []])
+    projection = project_savings_trajectory_batch(investors, [profile_id], owner_index, ages, num_years, slowdown_years)
+    trajectory = []
+    for year in projection["years"]:
+        trajectory.append({
+            "year": int(year),
+            "monthly_savings": float(projection["monthly_savings"][0, year]),
+            "adjustment_rate": float(projection["annual_adjustment_rates"][0, year - 1]) if year > 0 else 0.0
+        })
+    return trajectory
+
+def verify_batch_against_scalar(investor_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Equivalence harness: runs calculate_savings_details() per row and calculate_savings_details_batch()
+    once over the same rows, compares every result key exactly and times both paths.
+    """
+    start = time.perf_counter()
+    scalar_results = [calculate_savings_details(row) for row in investor_rows]
+    scalar_seconds = time.perf_counter() - start
+
+    columns = {key: np.asarray([row.get(key) for row in investor_rows]) for key in (
+        "occupation", "individual_monthly_income", "spouse_monthly_income", "monthly_rent", "monthly_emi",
+        "urban_rural_status", "home_ownership", "num_education_marriage_goals_completed_for_dependents"
+    )}
+    dependent_investor_index, dependent_ages = explode_dependents([row.get("dependents") for row in investor_rows])
+
+    start = time.perf_counter()
+    batch_results = calculate_savings_details_batch(columns, dependent_investor_index, dependent_ages)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = []
+    for i, scalar_result in enumerate(scalar_results):
+        for key, scalar_value in scalar_result.items():
+            if scalar_value != batch_results[key][i]:
+                mismatches.append({"row": i, "key": key, "scalar": scalar_value, "batch": float(batch_results[key][i])})
+    return {
+        "num_investors": len(investor_rows),
+        "mismatches": mismatches,
+        "scalar_seconds": scalar_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": scalar_seconds / batch_seconds if batch_seconds > 0 else float("inf")
+    }
+
+def _generate_random_investor_rows(num_investors: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Random investor rows covering zero income, zero EMI, slab edges and 0-4 dependents."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(num_investors):
+        individual_income = rng.choice([0, 15000, 30000, rng.randrange(0, 300000, 500), round(rng.uniform(5000, 250000), 2)])
+        rows.append({
+            "occupation": rng.choice(["White-Collar", "Blue-Collar"]),
+            "individual_monthly_income": individual_income,
+            "spouse_monthly_income": rng.choice([0, 0, rng.randrange(0, 150000, 1000), round(rng.uniform(0, 80000), 2)]),
+            "monthly_rent": rng.choice([0, rng.randrange(0, 40000, 500)]),
+            "monthly_emi": rng.choice([0, 0, rng.randrange(0, 50000, 500), round(rng.uniform(0, 30000), 2)]),
+            "dependents": [{"age": rng.randint(0, 25)} for _ in range(rng.randint(0, 4))],
+            "urban_rural_status": rng.choice(["Urban", "Rural"]),
+            "home_ownership": rng.choice([True, False]),
+            "num_education_marriage_goals_completed_for_dependents": rng.randint(0, 4)
+        })
+    return rows
+
 if __name__ == "__main__":
     print("--- Test Cases for Savings Logic ---")
 
@@ -218,5 +632,30 @@ if __name__ == "__main__":
     print(f"Default Normal: {get_annual_savings_adjustment_rate('WXYZ', 'Normal')}")
     print(f"Default Slowdown: {get_annual_savings_adjustment_rate('WXYZ', 'Slowdown')}")
     print(f"W1 Normal: {get_annual_savings_adjustment_rate('W1', 'Normal')}")
+    print(f"W1 Slowdown (low income, fallback): {get_annual_savings_adjustment_rate('W1', 'Slowdown')} (Expected 0.035)")
+    print(f"W5 Slowdown (not low income, base): {get_annual_savings_adjustment_rate('W5', 'Slowdown')} (Expected 0.05)")
     print(f"B8 Slowdown: {get_annual_savings_adjustment_rate('B8', 'Slowdown')}")
 
+    print("\nBatch Engine Equivalence (100,000 random investors):")
+    harness = verify_batch_against_scalar(_generate_random_investor_rows(100000))
+    print(f"Mismatches: {len(harness['mismatches'])} (Expected 0)")
+    for mismatch in harness["mismatches"][:5]:
+        print(f"  {mismatch}")
+    print(f"Scalar: {harness['scalar_seconds']:.3f}s, Batch: {harness['batch_seconds']:.4f}s, Speedup: {harness['speedup']:.0f}x (target 100x)")
+
+    for trajectory_profile in ("W4", "W5"):
+        print(f"\nSavings Trajectory (White-Collar Rural, {trajectory_profile}, slowdown in years 2-3):")
+        for point in project_savings_trajectory(wc_rural_data, trajectory_profile, num_years=10, slowdown_years={2, 3}):
+            print(f"  Year {point['year']}: {point['monthly_savings']:.0f} (adjustment {point['adjustment_rate']:.3f})")
+
+    book_rows = _generate_random_investor_rows(100000)
+    book_columns = {key: [row[key] for row in book_rows] for key in book_rows[0] if key != "dependents"}
+    book_owner_index, book_dependent_ages = explode_dependents([row["dependents"] for row in book_rows])
+    book_profile_ids = [("W" if row["occupation"] == "White-Collar" else "B") + str(random.Random(i).randint(1, 15)) for i, row in enumerate(book_rows)]
+    start_time = time.perf_counter()
+    book_projection = project_savings_trajectory_batch(
+        book_columns, book_profile_ids, book_owner_index, book_dependent_ages, slowdown_years={5, 6, 15}
+    )
+    print(f"\nBook-wide SIP capacity projection (100,000 investors, 30 years) in {time.perf_counter() - start_time:.2f}s:")
+    for year in (0, 1, 5, 6, 10, 20, 30):
+        print(f"  Year {year}: {book_projection['book_monthly_savings'][year]:,.0f} per month")
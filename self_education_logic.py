@@ -0,0 +1,243 @@
+# self_education_logic.py
+
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from financial_goals_logic import (calculate_sip_grid, suggest_fund_types_batch, get_goal_base_return_rates, DEFAULT_ALLOCATION_RISK_PROFILE,
+                                   SELF_EDUCATION_PRIORITY_RANKS, DEFAULT_SELF_EDUCATION_PRIORITY)
+from fund_returns_logic import get_latest_return_master_version
+
+# --- Eligibility (Self-Education Goal Mechanism, Section 1) ---
+SELF_EDUCATION_GOAL_TYPE = "Self-Education"
+SELF_EDUCATION_AGE_RANGE = (22, 28)  # Young Adult
+SELF_EDUCATION_PROFILES = ("W1", "W2", "W3", "B1", "B2", "B3")
+
+# --- Validation (Section 2) ---
+SELF_EDUCATION_TIMELINE_RANGE = (1, 10)  # years from the current year
+SELF_EDUCATION_COST_RANGE = (50000, 1000000)
+
+# --- Default Targets (Section 3, 2025 costs) ---
+# Programme: (cost_min, cost_max, default_timeline_years). Certifications are short-term, degrees medium-term.
+# The default cost is the low end of the range, as in the document's MBA example.
+SELF_EDUCATION_PROGRAMS = {
+    "White-Collar": {
+        "Postgraduate Degree": (300000, 700000, 5),
+        "Professional Certification": (100000, 300000, 3)
+    },
+    "Blue-Collar": {
+        "Vocational Training": (50000, 200000, 3),
+        "Part-Time Degree/Certification": (100000, 300000, 5)
+    }
+}
+DEFAULT_SELF_EDUCATION_PROGRAM = {"White-Collar": "Postgraduate Degree", "Blue-Collar": "Vocational Training"}
+SELF_EDUCATION_INFLATION_RATE = 0.05
+SELF_EDUCATION_TARGET_ROUNDING = 100  # ₹3,47,287 -> ₹3,47,300
+
+# --- Prioritization (Section 4) ---
+# SELF_EDUCATION_PRIORITY_RANKS ({"High": 2, "Medium": 3, "Low": 5}, on the financial_goals_logic.GOAL_PRIORITIES
+# scale) and DEFAULT_SELF_EDUCATION_PRIORITY live in financial_goals_logic, which also sorts goals by them.
+SELF_EDUCATION_HIGH_PRIORITY_YEARS = 3  # timelines shorter than this are elevated to High
+
+# --- Minimum Allocation (Section 4) ---
+# At least this much per month or 10% of ideal monthly savings, whichever is lower.
+SELF_EDUCATION_MINIMUM_SIP = {"White-Collar": 500, "Blue-Collar": 200}
+SELF_EDUCATION_MINIMUM_SAVINGS_SHARE = 0.10
+
+def get_occupation_type(profile_ids):
+    """'White-Collar' for W profiles, 'Blue-Collar' otherwise (scalar or array)."""
+    occupation_types = np.where(np.char.startswith(np.asarray(profile_ids, dtype=object).astype(str), "W"), "White-Collar", "Blue-Collar").astype(object)
+    return occupation_types.item() if occupation_types.ndim == 0 else occupation_types
+
+def is_self_education_eligible_batch(ages, profile_ids) -> np.ndarray:
+    """Young Adults aged 22-28 in profiles W1-W3/B1-B3."""
+    ages = np.asarray(ages, dtype=float)
+    return (ages >= SELF_EDUCATION_AGE_RANGE[0]) & (ages <= SELF_EDUCATION_AGE_RANGE[1]) & np.isin(np.asarray(profile_ids, dtype=object), SELF_EDUCATION_PROFILES)
+
+def is_self_education_eligible(age: int, profile_id: str) -> bool:
+    """Whether the MFD interface should offer the Self-Education goal to this investor."""
+    return bool(is_self_education_eligible_batch(age, profile_id))
+
+def validate_self_education_goal(target_year: int, estimated_cost: float, current_year: int = None) -> list:
+    """Validation messages for an MFD-entered goal; empty if valid."""
+    current_year = current_year or date.today().year
+    errors = []
+    min_years, max_years = SELF_EDUCATION_TIMELINE_RANGE
+    if not current_year + min_years <= target_year <= current_year + max_years:
+        errors.append(f"Target year must be between {current_year + min_years} and {current_year + max_years}.")
+    min_cost, max_cost = SELF_EDUCATION_COST_RANGE
+    if not min_cost <= estimated_cost <= max_cost:
+        errors.append(f"Estimated cost must be between ₹{min_cost:,} and ₹{max_cost:,}.")
+    return errors
+
+def calculate_self_education_target(estimated_costs, target_years, current_year: int = None):
+    """Estimated cost in today's rupees inflated at 5% a year to the target year, rounded to ₹100 (scalar or array)."""
+    current_year = current_year or date.today().year
+    years = np.maximum(np.asarray(target_years, dtype=float) - current_year, 0)
+    adjusted = np.asarray(estimated_costs, dtype=float) * (1 + SELF_EDUCATION_INFLATION_RATE) ** years
+    return np.round(adjusted / SELF_EDUCATION_TARGET_ROUNDING) * SELF_EDUCATION_TARGET_ROUNDING
+
+def get_self_education_priority(priority_levels, timeline_years):
+    """financial_goals.priority for the MFD's High/Medium/Low choice (default Medium); timelines under 3 years rank High (scalar or array)."""
+    priority_levels = np.asarray(priority_levels, dtype=object)
+    ranks = pd.Series(priority_levels.ravel()).map(SELF_EDUCATION_PRIORITY_RANKS).fillna(
+        SELF_EDUCATION_PRIORITY_RANKS[DEFAULT_SELF_EDUCATION_PRIORITY]).to_numpy(dtype=np.int64).reshape(priority_levels.shape)
+    ranks = np.where(np.asarray(timeline_years, dtype=float) < SELF_EDUCATION_HIGH_PRIORITY_YEARS, SELF_EDUCATION_PRIORITY_RANKS["High"], ranks)
+    return ranks.item() if ranks.ndim == 0 else ranks
+
+def calculate_self_education_minimum_sip(occupation_types, monthly_savings):
+    """Minimum monthly allocation: ₹500 (White-Collar) / ₹200 (Blue-Collar) or 10% of monthly savings, whichever is lower (scalar or array)."""
+    occupation_types = np.asarray(occupation_types, dtype=object)
+    floors = pd.Series(occupation_types.ravel()).map(SELF_EDUCATION_MINIMUM_SIP).fillna(
+        SELF_EDUCATION_MINIMUM_SIP["Blue-Collar"]).to_numpy(dtype=float).reshape(occupation_types.shape)
+    minimum = np.minimum(floors, np.maximum(np.asarray(monthly_savings, dtype=float), 0) * SELF_EDUCATION_MINIMUM_SAVINGS_SHARE)
+    return minimum.item() if minimum.ndim == 0 else minimum
+
+def build_self_education_goals(
+    investors: pd.DataFrame,
+    current_year: int = None,
+    risk_profile: str = DEFAULT_ALLOCATION_RISK_PROFILE
+) -> pd.DataFrame:
+    """
+    Self-Education goals for a cohort in one pass. `investors` has investor_id, age, investor_profile_id and
+    optionally final_monthly_savings_amount, risk_profile and the MFD's inputs (programme, estimated_cost,
+    target_year, priority_level); missing inputs get the occupation's default programme, cost and timeline.
+    Ineligible investors are dropped. Returns one goal per investor with target_amount, priority, fund_type,
+    required_sip and minimum_sip, ready for allocate_savings_to_goals_batch() and save_self_education_goals().
+    """
+    current_year = current_year or date.today().year
+    goals = investors[is_self_education_eligible_batch(investors["age"], investors["investor_profile_id"])].copy()
+    goals["occupation_type"] = get_occupation_type(goals["investor_profile_id"])
+    for column in ("program", "estimated_cost", "target_year", "priority_level", "final_monthly_savings_amount", "risk_profile"):
+        if column not in goals:
+            goals[column] = np.nan
+    defaults = pd.DataFrame([
+        {"occupation_type": occupation_type, "program": program, "default_cost": cost_min, "default_years": timeline_years}
+        for occupation_type, programs in SELF_EDUCATION_PROGRAMS.items()
+        for program, (cost_min, _, timeline_years) in programs.items()
+    ])
+    goals["program"] = goals["program"].fillna(goals["occupation_type"].map(DEFAULT_SELF_EDUCATION_PROGRAM))
+    goals = goals.merge(defaults, on=["occupation_type", "program"], how="left")
+    goals["estimated_cost"] = goals["estimated_cost"].fillna(goals["default_cost"])
+    goals["target_year"] = goals["target_year"].fillna(current_year + goals["default_years"]).astype(np.int64)
+    goals["priority_level"] = goals["priority_level"].fillna(DEFAULT_SELF_EDUCATION_PRIORITY)
+
+    timeline_years = np.maximum(goals["target_year"].to_numpy(dtype=float) - current_year, 1)
+    goals["goal_type"] = SELF_EDUCATION_GOAL_TYPE
+    goals["goal_name"] = "Self-Education (" + goals["program"].astype(str) + ")"
+    goals["target_amount"] = calculate_self_education_target(goals["estimated_cost"].to_numpy(dtype=float), goals["target_year"].to_numpy(), current_year)
+    goals["priority"] = get_self_education_priority(goals["priority_level"].to_numpy(dtype=object), timeline_years)
+    goals["fund_type"] = suggest_fund_types_batch(goals["goal_type"].to_numpy(dtype=object), timeline_years,
+                                                  goals["risk_profile"].fillna(risk_profile).to_numpy(dtype=object))["fund_type"].to_numpy()
+    goals["required_sip"] = calculate_sip_grid(goals["target_amount"].to_numpy(), timeline_years, get_goal_base_return_rates(goals))
+    goals["minimum_sip"] = np.minimum(
+        calculate_self_education_minimum_sip(goals["occupation_type"].to_numpy(dtype=object), goals["final_monthly_savings_amount"].fillna(0).to_numpy(dtype=float)),
+        goals["required_sip"].to_numpy()
+    )
+    return goals.drop(columns=["default_cost", "default_years"]).reset_index(drop=True)
+
+# --- Database Integration ---
+def ensure_self_education_schema(conn: sqlite3.Connection):
+    """Adds financial_goals.minimum_sip (idempotent): the monthly floor allocate_savings_to_goals_batch() reserves for a goal."""
+    c = conn.cursor()
+    c.execute("PRAGMA table_info(financial_goals)")
+    if "minimum_sip" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE financial_goals ADD COLUMN minimum_sip REAL")
+    conn.commit()
+
+def save_self_education_goals(conn: sqlite3.Connection, goals: pd.DataFrame) -> int:
+    """
+    Inserts MFD-confirmed Self-Education goals (replacing each investor's existing one), with their minimum_sip and
+    pinned to the current return master version, in one transaction. They are manual goals (is_auto_generated = 0), so automatic goal regeneration never removes them.
+    """
+    c = conn.cursor()
+    c.executemany("DELETE FROM financial_goals WHERE investor_id = ? AND goal_type = ?",
+                  [(investor_id, SELF_EDUCATION_GOAL_TYPE) for investor_id in goals["investor_id"].unique()])
+    creation_date = date.today().isoformat()
+    return_master_version = get_latest_return_master_version()
+    c.executemany(
+        """INSERT INTO financial_goals (investor_id, goal_name, goal_type, target_amount, target_year, priority, notes, creation_date, is_auto_generated, minimum_sip,
+                                      return_master_version)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)""",
+        [(row.investor_id, row.goal_name, SELF_EDUCATION_GOAL_TYPE, float(row.target_amount), int(row.target_year), int(row.priority),
+          f"₹{row.estimated_cost:,.0f} in today's rupees, inflated at {SELF_EDUCATION_INFLATION_RATE:.0%} a year. Priority: {row.priority_level}.",
+          creation_date, float(row.minimum_sip), return_master_version)
+         for row in goals.itertuples(index=False)]
+    )
+    conn.commit()
+    return len(goals)
+
+if __name__ == "__main__":
+    print("--- Test Cases for Self-Education Goals ---")
+    print(f"25yo W2 eligible: {is_self_education_eligible(25, 'W2')} (Expected True); 29yo W3: {is_self_education_eligible(29, 'W3')}; 25yo W5: {is_self_education_eligible(25, 'W5')}")
+    print(f"Validation (2040, ₹20,000): {validate_self_education_goal(2040, 20000, current_year=2025)}")
+    print(f"₹3,00,000 from 2025 to 2028: {calculate_self_education_target(300000, 2028, current_year=2025):,.0f} (Expected 347,300)")
+    print(f"Priority Low, 2 yrs: {get_self_education_priority('Low', 2)} (Expected 2, elevated); Low, 5 yrs: {get_self_education_priority('Low', 5)}")
+    print(f"Minimum SIP W, ₹3,200 savings: {calculate_self_education_minimum_sip('White-Collar', 3200)} (Expected 320.0)")
+
+    # Section 9 example: 25yo W2, ₹40,000 income, ₹3,00,000 MBA in 2028, 8% savings rate
+    from financial_goals_logic import allocate_savings_to_goals
+    example = build_self_education_goals(pd.DataFrame([{
+        "investor_id": "INV-1", "age": 25, "investor_profile_id": "W2", "program": "Postgraduate Degree",
+        "estimated_cost": 300000, "target_year": 2028, "final_monthly_savings_amount": 3200
+    }]), current_year=2025).iloc[0]
+    print(f"Example goal: {example['goal_name']}, ₹{example['target_amount']:,.0f} by {example['target_year']}, P{example['priority']}, "
+          f"{example['fund_type']}, required SIP {example['required_sip']:,.2f}, minimum {example['minimum_sip']}")
+    allocation = allocate_savings_to_goals(3200, [
+        {"goal_name": "Emergency Fund", "goal_type": "Emergency Fund", "target_amount": 120000, "target_year": 2026, "priority": 1},
+        example.to_dict()
+    ], current_year=2025)
+    for item in allocation["allocations"]:
+        print(f"  P{item['priority']} {item['goal_name']}: required {item['required_sip']}, allocated {item['allocated_sip']}, target {item['target_year']} -> {item['projected_target_year']}")
+    from financial_goals_logic import prioritize_goals, get_goal_sort_key, get_goal_type_priority
+    for priority_level in SELF_EDUCATION_PRIORITY_RANKS:
+        unsaved_goals = [{"goal_type": "Retirement"}, {"goal_type": "Child Education"}, {"goal_type": "Self-Education", "priority_level": priority_level}, {"goal_type": "Emergency Fund"}]
+        stored_goals = [{"goal_type": g["goal_type"], "priority": get_goal_type_priority(g["goal_type"], g.get("priority_level"))} for g in unsaved_goals]
+        unsaved_order = [g["goal_type"] for g in prioritize_goals(unsaved_goals)]
+        print(f"Unsaved goals, {priority_level} Self-Education: {unsaved_order}; "
+              f"same order once stored: {[g['goal_type'] for g in sorted(stored_goals, key=get_goal_sort_key)] == unsaved_order}")
+
+    import time
+    rng = np.random.default_rng(41)
+    num_investors = 500000
+    book = pd.DataFrame({
+        "investor_id": [f"INV-{i:06d}" for i in range(num_investors)],
+        "age": rng.integers(22, 61, num_investors),
+        "investor_profile_id": rng.choice(["W1", "W2", "W3", "W5", "W9", "B1", "B2", "B3", "B8"], num_investors),
+        "final_monthly_savings_amount": rng.integers(5, 80, num_investors) * 100.0
+    })
+    start_time = time.perf_counter()
+    cohort = build_self_education_goals(book, current_year=2025)
+    print(f"\n{len(cohort):,} of {num_investors:,} investors offered a Self-Education goal in {time.perf_counter() - start_time:.2f}s")
+    print(cohort.groupby(["occupation_type", "program"])[["target_amount", "required_sip", "minimum_sip"]].mean().round(2))
+
+    from financial_goals_logic import allocate_savings_to_goals_batch
+    book_goals = pd.concat([
+        cohort[["investor_id", "goal_name", "goal_type", "target_amount", "target_year", "priority", "fund_type", "minimum_sip"]],
+        pd.DataFrame({"investor_id": cohort["investor_id"], "goal_name": "Emergency Fund", "goal_type": "Emergency Fund",
+                      "target_amount": 100000.0, "target_year": 2026, "priority": 1, "fund_type": "Liquid Fund"})
+    ], ignore_index=True)
+    savings_by_investor = book.set_index("investor_id")["final_monthly_savings_amount"]
+    start_time = time.perf_counter()
+    book_allocation = allocate_savings_to_goals_batch(book_goals, savings_by_investor, current_year=2025)
+    self_education_allocation = book_allocation[book_allocation["goal_type"] == SELF_EDUCATION_GOAL_TYPE]
+    print(f"Allocated {len(book_allocation):,} goals in {time.perf_counter() - start_time:.2f}s; Self-Education goals below their minimum: "
+          f"{(self_education_allocation['allocated_sip'] < self_education_allocation['minimum_sip'] - 0.01).sum()} (Expected 0)")
+    sample_investor = cohort["investor_id"].iloc[0]
+    scalar_check = allocate_savings_to_goals(savings_by_investor[sample_investor], book_goals[book_goals["investor_id"] == sample_investor].to_dict("records"), current_year=2025)
+    print(f"Batch matches scalar for one investor: "
+          f"{[a['allocated_sip'] for a in scalar_check['allocations']] == book_allocation[book_allocation['investor_id'] == sample_investor]['allocated_sip'].tolist()}")
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE financial_goals (goal_id INTEGER PRIMARY KEY AUTOINCREMENT, investor_id TEXT, goal_name TEXT, goal_type TEXT,
+                    target_amount REAL, target_year INTEGER, current_savings_for_goal REAL DEFAULT 0, priority INTEGER, notes TEXT,
+                    creation_date TEXT, is_auto_generated BOOLEAN DEFAULT FALSE)""")
+    ensure_self_education_schema(conn)
+    from fund_returns_logic import ensure_fund_return_schema
+    ensure_fund_return_schema(conn)
+    print(f"Saved {save_self_education_goals(conn, cohort.head(1000))} goals; re-saving replaces: "
+          f"{save_self_education_goals(conn, cohort.head(1000)) and conn.execute('SELECT COUNT(*) FROM financial_goals').fetchone()[0]} (Expected 1000)")
+    stored_goals = pd.read_sql_query("SELECT investor_id, goal_type, target_amount, target_year, priority, minimum_sip FROM financial_goals", conn)
+    print(f"Stored minimum_sip matches the built goals: {np.allclose(stored_goals['minimum_sip'], cohort.head(1000)['minimum_sip'])}")
@@ -0,0 +1,121 @@
+# world_bank_stub.py
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Local stand-in for the World Bank v2 indicator API, for deterministic offline runs of economic_data_fetcher.
+STUB_INDICATOR_PATH = re.compile(r"^/v2/country/(?P<country>[^/]+)/indicator/(?P<indicator>[^/]+)$")
+STUB_INDICATOR_NAMES = {
+    "NY.GDP.MKTP.KD.ZG": "GDP growth (annual %)",
+    "FP.CPI.TOTL.ZG": "Inflation, consumer prices (annual %)"
+}
+DEFAULT_STUB_DATE_RANGE = "2020:2025"
+
+def stub_indicator_value(indicator_code: str, year: int) -> float | None:
+    """Deterministic value in [-2, 10) for an indicator-year; the latest year is null, as the live API often reports."""
+    digest = hashlib.sha256(f"{indicator_code}:{year}".encode()).digest()
+    return round(int.from_bytes(digest[:4], "big") / 2**32 * 12 - 2, 3)
+
+def build_stub_payload(country: str, indicator_code: str, date_range: str) -> list:
+    """World Bank JSON shape: [page metadata, [entries newest first]]."""
+    start_year, end_year = (int(year) for year in (date_range or DEFAULT_STUB_DATE_RANGE).split(":"))
+    entries = [{
+        "indicator": {"id": indicator_code, "value": STUB_INDICATOR_NAMES.get(indicator_code, indicator_code)},
+        "country": {"id": country, "value": country},
+        "countryiso3code": "",
+        "date": str(year),
+        "value": None if year == end_year else stub_indicator_value(indicator_code, year),
+        "unit": "",
+        "obs_status": "",
+        "decimal": 1
+    } for year in range(end_year, start_year - 1, -1)]
+    return [{"page": 1, "pages": 1, "per_page": 50, "total": len(entries), "sourceid": "2"}, entries]
+
+class WorldBankStubServer:
+    """
+    Threaded HTTP server serving /v2/country/<country>/indicator/<code>?date=<start:end>&format=json.
+    `latency` delays every response; the first `throttle_first` requests for each indicator get HTTP 429
+    with a Retry-After of `retry_after` seconds, to exercise the fetcher's backoff. Use as a context manager.
+    """
+
+    def __init__(self, latency: float = 0.05, throttle_first: int = 0, retry_after: float = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.request_counts = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                match = STUB_INDICATOR_PATH.match(parsed.path)
+                if not match:
+                    self._send(404, {"message": "Not found"})
+                    return
+                with stub._lock:
+                    count = stub.request_counts.get(match["indicator"], 0) + 1
+                    stub.request_counts[match["indicator"]] = count
+                time.sleep(stub.latency)
+                if count <= stub.throttle_first:
+                    self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(stub.retry_after)})
+                    return
+                query = parse_qs(parsed.query)
+                self._send(200, build_stub_payload(match["country"], match["indicator"], query.get("date", [None])[0]))
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out and hung up
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    @property
+    def total_requests(self) -> int:
+        with self._lock:
+            return sum(self.request_counts.values())
+
+    def start(self) -> str:
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == "__main__":
+    from urllib.request import urlopen
+    print("--- World Bank Stub Server ---")
+    with WorldBankStubServer(latency=0) as stub:
+        with urlopen(f"{stub.base_url}/country/IN/indicator/NY.GDP.MKTP.KD.ZG?date=2020:2025&format=json") as response:
+            print(json.dumps(json.load(response), indent=2)[:600])